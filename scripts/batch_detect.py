@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Batch Detect - Org-wide language detection over many repository roots
+
+Purpose: Run LanguageDetector.scan_directory() over a list or glob of
+         repository roots in a process pool, so ~2,000 mirrors pay for
+         interpreter start-up once per worker instead of once per repo. One
+         NDJSON record is written per repo as soon as it finishes. Input is
+         consumed lazily with a bounded number of repos in flight, and the
+         checkpoint stores a low-watermark plus the few repos finished out
+         of order, so memory stays flat whatever the repo count and an
+         interrupted run resumes where it stopped. Repos that failed (including
+         those lost with a crashed worker) are retried when the run resumes.
+Usage: python batch_detect.py [roots or globs...] [--from-file LIST] [options]
+Example: python batch_detect.py '/mirrors/*/' --workers 8 --checkpoint batch.ckpt --output detect.ndjson
+"""
+
+import argparse
+import glob
+import importlib
+import json
+import logging
+import os
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Iterator, Optional
+
+from content_sniffer import ContentSniffer
+
+language_detector = importlib.import_module('language-detector')
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+
+# Repos in flight per worker process
+QUEUE_DEPTH_PER_WORKER = 4
+# Never run further ahead of the oldest unfinished repo than this, which
+# bounds the out-of-order set kept in the checkpoint
+MAX_AHEAD = 1024
+PROGRESS_EVERY = 100
+
+
+class CheckpointMismatch(Exception):
+    """The checkpoint was written for a different list of repositories."""
+
+
+def iter_repositories(patterns: Iterable[str], list_file: Optional[str] = None) -> Iterator[str]:
+    """Yield repository roots lazily from paths/globs and an optional list file ('-' = stdin)."""
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            for path in glob.iglob(pattern):
+                if os.path.isdir(path):
+                    yield path.rstrip(os.sep) or os.sep
+        else:
+            yield pattern
+    if list_file:
+        handle = sys.stdin if list_file == '-' else open(list_file, 'r', encoding='utf-8')
+        try:
+            for line in handle:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield line
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+
+
+class Checkpoint:
+    """Resumable progress over an ordered stream of repositories.
+
+    Everything before ``watermark`` is done; repos finished beyond it are
+    kept by index (with their path, so a changed input list is detected)
+    until the watermark catches up. Repos whose record was an error count
+    towards the watermark but are also kept in ``failed``, and are not done.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.watermark = 0
+        self.watermark_path = None
+        self.done_ahead: Dict[int, str] = {}
+        self.failed: Dict[int, str] = {}
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> 'Checkpoint':
+        checkpoint = cls(path)
+        if not path or not os.path.exists(path):
+            return checkpoint
+        with open(path, 'r', encoding='utf-8') as handle:
+            data = json.load(handle)
+        if data.get('version') != CHECKPOINT_VERSION:
+            raise CheckpointMismatch(f"unsupported checkpoint version {data.get('version')}")
+        checkpoint.watermark = int(data['watermark'])
+        checkpoint.watermark_path = data.get('watermark_path')
+        checkpoint.done_ahead = {int(index): repo for index, repo in data.get('done_ahead', {}).items()}
+        checkpoint.failed = {int(index): repo for index, repo in data.get('failed', {}).items()}
+        return checkpoint
+
+    def is_done(self, index: int, repo: str) -> bool:
+        if index in self.failed:
+            if self.failed[index] != repo:
+                raise CheckpointMismatch(f"repo #{index} is {repo}, checkpoint expected {self.failed[index]}")
+            return False
+        if index < self.watermark:
+            if index == self.watermark - 1 and repo != self.watermark_path:
+                raise CheckpointMismatch(f"repo #{index} is {repo}, checkpoint expected {self.watermark_path}")
+            return True
+        expected = self.done_ahead.get(index)
+        if expected is not None and expected != repo:
+            raise CheckpointMismatch(f"repo #{index} is {repo}, checkpoint expected {expected}")
+        return expected is not None
+
+    def mark_done(self, index: int, repo: str, failed: bool = False):
+        if failed:
+            self.failed[index] = repo
+        else:
+            self.failed.pop(index, None)
+        if index < self.watermark:  # a retried failure
+            return
+        self.done_ahead[index] = repo
+        while self.watermark in self.done_ahead:
+            self.watermark_path = self.done_ahead.pop(self.watermark)
+            self.watermark += 1
+
+    def save(self):
+        if not self.path:
+            return
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as handle:
+            json.dump({
+                'version': CHECKPOINT_VERSION,
+                'watermark': self.watermark,
+                'watermark_path': self.watermark_path,
+                'done_ahead': {str(index): repo for index, repo in sorted(self.done_ahead.items())},
+                'failed': {str(index): repo for index, repo in sorted(self.failed.items())},
+            }, handle)
+        os.replace(temporary, self.path)
+
+
+def _init_worker():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C is handled (once) by the parent
+
+
+def detect_repository(repo: str, options: Dict) -> Dict:
+    """Worker: the NDJSON record for one repository (never raises)."""
+    started = time.monotonic()
+    try:
+        sniffer = ContentSniffer() if options.get('sniff_content') else None
+        detector = language_detector.LanguageDetector(
+            repo, max_depth=options.get('max_depth', 3), source=options.get('source'),
+            use_cache=options.get('use_cache', False), sniffer=sniffer)
+        result = detector.scan_directory()
+    except Exception as e:
+        return {'repo': repo, 'status': STATUS_ERROR, 'error': f'{type(e).__name__}: {e}',
+                'seconds': round(time.monotonic() - started, 3)}
+    return {'repo': repo, 'status': STATUS_OK, 'seconds': round(time.monotonic() - started, 3),
+            'result': result}
+
+
+def run_batch(repos: Iterable[str], options: Dict, output, checkpoint: Checkpoint,
+              workers: int) -> Dict[str, int]:
+    """Detect every repo not yet in ``checkpoint``, writing records to ``output`` as they finish."""
+    stats = {'completed': 0, 'failed': 0, 'skipped': 0}
+    window = max(1, workers) * QUEUE_DEPTH_PER_WORKER
+    pending: Dict = {}
+    started = time.monotonic()
+
+    def drain(block_until: int):
+        while len(pending) > block_until:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index, repo, submitted = pending.pop(future)
+                try:
+                    record = future.result()
+                except BrokenProcessPool as e:
+                    # A worker died (OOM kill, segfault): every repo it had in flight is lost
+                    record = {'repo': repo, 'status': STATUS_ERROR, 'error': f'{type(e).__name__}: {e}',
+                              'seconds': round(time.monotonic() - submitted, 3)}
+                output.write(json.dumps(record) + '\n')
+                output.flush()  # the record is out before the checkpoint says so
+                checkpoint.mark_done(index, repo, failed=record['status'] != STATUS_OK)
+                checkpoint.save()
+                stats['completed' if record['status'] == STATUS_OK else 'failed'] += 1
+                if record['status'] != STATUS_OK:
+                    logger.warning(f"⚠️  {repo}: {record['error']}")
+                done = stats['completed'] + stats['failed']
+                if done % PROGRESS_EVERY == 0:
+                    logger.info(f"📦 {done} repositories in {time.monotonic() - started:.0f}s")
+
+    def new_pool() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=max(1, workers), initializer=_init_worker)
+
+    pool = new_pool()
+    try:
+        for index, repo in enumerate(repos):
+            if checkpoint.is_done(index, repo):
+                stats['skipped'] += 1
+                continue
+            drain(window - 1)
+            while pending and index - checkpoint.watermark >= MAX_AHEAD:
+                drain(len(pending) - 1)
+            try:
+                future = pool.submit(detect_repository, repo, options)
+            except BrokenProcessPool:
+                logger.warning("⚠️  A worker process died, starting a new pool")
+                pool.shutdown()
+                pool = new_pool()
+                future = pool.submit(detect_repository, repo, options)
+            pending[future] = (index, repo, time.monotonic())
+        drain(0)
+    finally:
+        pool.shutdown()
+    return stats
+
+
+def main() -> int:
+    """Main entry point with proper error handling."""
+    parser = argparse.ArgumentParser(
+        description='🏢 Detect languages across many repositories in one process pool',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+    python batch_detect.py '/mirrors/*/'                        # Every mirror, NDJSON on stdout
+    python batch_detect.py --from-file repos.txt --workers 16   # Roots listed one per line
+    python batch_detect.py '/mirrors/*/' --checkpoint b.ckpt --output out.ndjson   # Resumable
+        """
+    )
+    parser.add_argument('repos', nargs='*', help='Repository roots or glob patterns')
+    parser.add_argument('--from-file', help="File listing repository roots, one per line ('-' for stdin)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes (default: CPU count)')
+    parser.add_argument('--output', help='Append NDJSON records to this file (default: stdout)')
+    parser.add_argument('--checkpoint',
+                        help='Progress file; rerunning with the same inputs skips finished repos')
+    parser.add_argument('--depth', type=int, default=3, help='Maximum directory depth to scan (default: 3)')
+    parser.add_argument('--source', choices=language_detector.FILE_SOURCES,
+                        default=language_detector.SOURCE_FILESYSTEM,
+                        help='Where to read each repo\'s file list from (default: filesystem)')
+    parser.add_argument('--cache', action='store_true', help='Use the per-repo detection cache')
+    parser.add_argument('--sniff-content', action='store_true',
+                        help='Identify files with unknown extensions from their first bytes')
+    args = parser.parse_args()
+
+    if not args.repos and not args.from_file:
+        parser.error('give repository roots, globs or --from-file')
+
+    try:
+        options = {'max_depth': args.depth, 'source': args.source, 'use_cache': args.cache,
+                   'sniff_content': args.sniff_content}
+        checkpoint = Checkpoint.load(args.checkpoint)
+        if checkpoint.watermark or checkpoint.done_ahead:
+            logger.info(f"♻️  Resuming after {checkpoint.watermark + len(checkpoint.done_ahead)} repositories, "
+                        f"retrying {len(checkpoint.failed)} that failed")
+        output = open(args.output, 'a', encoding='utf-8') if args.output else sys.stdout
+        try:
+            stats = run_batch(iter_repositories(args.repos, args.from_file), options, output,
+                              checkpoint, args.workers)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        logger.info(f"✅ {stats['completed']} detected, {stats['failed']} failed, "
+                    f"{stats['skipped']} already done")
+        return 1 if stats['failed'] else 0
+    except CheckpointMismatch as e:
+        logger.error(f"❌ Checkpoint does not match the repository list ({e}); "
+                     f"remove {args.checkpoint} to start over")
+        return 1
+    except KeyboardInterrupt:
+        logger.error("Operation cancelled by user")
+        return 130
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
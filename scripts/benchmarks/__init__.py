@@ -0,0 +1,16 @@
+"""
+SAST pipeline benchmarks
+
+Deterministic synthetic project trees and scanner reports (synthetic.py)
+and timed, memory-measured runs of language detection and results
+processing (suite.py), with JSON baselines for catching regressions in CI.
+Run with ``python -m benchmarks`` from the scripts directory.
+"""
+
+from benchmarks.suite import CASES, DEFAULT_THRESHOLD, build_report, compare_to_baseline, run_suite
+from benchmarks.synthetic import ReportSpec, TreeSpec, generate_reports, generate_tree
+
+__all__ = [
+    'CASES', 'DEFAULT_THRESHOLD', 'ReportSpec', 'TreeSpec', 'build_report',
+    'compare_to_baseline', 'generate_reports', 'generate_tree', 'run_suite',
+]
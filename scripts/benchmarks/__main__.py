@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+SAST Benchmarks - Time language detection and results processing
+
+Purpose: Generate a deterministic synthetic project and scanner reports,
+         run each benchmark case in a fresh interpreter and report time,
+         throughput and peak memory. Results can be saved as a JSON baseline
+         and later runs compared against it, failing when a case got slower
+         (or bigger) than the threshold allows.
+Usage: python -m benchmarks [options]   (from the scripts directory)
+Example: python -m benchmarks --preset small --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.suite import CASES, DEFAULT_THRESHOLD, build_report, child_main, compare_to_baseline, run_suite
+from benchmarks.synthetic import ReportSpec, TreeSpec, describe, generate_reports, generate_tree, parse_language_mix
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+PRESETS = {
+    'small': {'files': 2000, 'depth': 4, 'ignored_files': 500, 'findings': 10000},
+    'medium': {'files': 20000, 'depth': 6, 'ignored_files': 5000, 'findings': 100000},
+    'large': {'files': 200000, 'depth': 8, 'ignored_files': 50000, 'findings': 1000000},
+}
+
+
+def _prepare(work_dir: Path, kind: str, spec, generate) -> Path:
+    """Generate an input once per spec; a work dir kept with --work-dir is reused."""
+    key = hashlib.sha1(json.dumps(describe(spec), sort_keys=True).encode()).hexdigest()[:12]
+    target = work_dir / f'{kind}-{key}'
+    marker = work_dir / f'{kind}-{key}.done'
+    if marker.exists():
+        logger.info(f"♻️  Reusing {kind} {target}")
+        return target
+    shutil.rmtree(target, ignore_errors=True)
+    logger.info(f"🏗️  Generating {kind} in {target}...")
+    stats = generate(target, spec)
+    marker.write_text(json.dumps(stats) + '\n')
+    logger.info(f"✅ {kind}: {stats}")
+    return target
+
+
+def main() -> int:
+    """Main entry point with proper error handling."""
+    parser = argparse.ArgumentParser(
+        description='⏱️  Benchmark SAST language detection and results processing',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+    python -m benchmarks --preset small                          # Quick run
+    python -m benchmarks --files 50000 --languages python=1,go=1 # Custom tree
+    python -m benchmarks --save-baseline baseline.json           # Record a baseline
+    python -m benchmarks --baseline baseline.json --threshold 0.1
+        """
+    )
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='medium',
+                        help='Input size; the options below override it (default: medium)')
+    parser.add_argument('--files', type=int, help='Files in the synthetic tree')
+    parser.add_argument('--depth', type=int, help='Maximum directory depth')
+    parser.add_argument('--languages', type=parse_language_mix,
+                        help='Language weights, e.g. python=3,javascript=2,go=1')
+    parser.add_argument('--ignored-files', type=int, help='Files under node_modules, venv, build...')
+    parser.add_argument('--manifest-density', type=float, help='Chance that a directory holds a manifest')
+    parser.add_argument('--findings', type=int, help='Findings across the synthetic reports')
+    parser.add_argument('--overlap', type=float, help='Share of findings reported by several scanners')
+    parser.add_argument('--seed', type=int, default=1, help='Generator seed (default: 1)')
+    parser.add_argument('--cases', default=','.join(CASES),
+                        help=f"Comma-separated cases to run (default: {','.join(CASES)})")
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case; the best is kept (default: 3)')
+    parser.add_argument('--work-dir', help='Keep generated inputs here and reuse them on later runs')
+    parser.add_argument('--output', help='Write the results JSON here (default: stdout)')
+    parser.add_argument('--save-baseline', help='Also save the results as a baseline file')
+    parser.add_argument('--baseline', help='Compare against this baseline; exit 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Allowed slowdown / memory growth as a fraction (default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    parser.add_argument('--case-inputs', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    try:
+        if args.run_case:
+            return child_main(args.run_case, json.loads(args.case_inputs))
+
+        cases = [case.strip() for case in args.cases.split(',') if case.strip()]
+        unknown = [case for case in cases if case not in CASES]
+        if unknown:
+            logger.error(f"❌ Unknown benchmark cases: {', '.join(unknown)}")
+            return 1
+
+        preset = PRESETS[args.preset]
+        tree_spec = TreeSpec(
+            files=args.files if args.files is not None else preset['files'],
+            depth=args.depth if args.depth is not None else preset['depth'],
+            ignored_files=args.ignored_files if args.ignored_files is not None else preset['ignored_files'],
+            seed=args.seed,
+            **{name: value for name, value in (('languages', args.languages),
+                                               ('manifest_density', args.manifest_density)) if value is not None})
+        report_spec = ReportSpec(
+            findings=args.findings if args.findings is not None else preset['findings'],
+            seed=args.seed,
+            **({'overlap': args.overlap} if args.overlap is not None else {}))
+        needs = {name for case in cases for name in CASES[case][1]}
+
+        work_dir = Path(args.work_dir) if args.work_dir else Path(tempfile.mkdtemp(prefix='sast-bench-'))
+        work_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            inputs = {}
+            if 'tree' in needs:
+                inputs['tree'] = str(_prepare(work_dir, 'tree', tree_spec, generate_tree))
+                inputs['max_depth'] = tree_spec.depth + 1  # directories at max_depth are not counted
+            if 'reports' in needs:
+                inputs['reports'] = str(_prepare(work_dir, 'reports', report_spec, generate_reports))
+            results = run_suite(cases, inputs, max(1, args.repeat))
+        finally:
+            if not args.work_dir:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+        report = build_report(results, {
+            'tree': describe(tree_spec) if 'tree' in needs else None,
+            'reports': describe(report_spec) if 'reports' in needs else None,
+        })
+        text = json.dumps(report, indent=2) + '\n'
+        if args.output:
+            Path(args.output).write_text(text)
+        else:
+            sys.stdout.write(text)
+        if args.save_baseline:
+            Path(args.save_baseline).write_text(text)
+            logger.info(f"💾 Baseline saved to {args.save_baseline}")
+
+        if args.baseline:
+            with open(args.baseline, 'r', encoding='utf-8') as handle:
+                baseline = json.load(handle)
+            regressions = compare_to_baseline(report, baseline, args.threshold)
+            for regression in regressions:
+                logger.error(f"❌ Regression: {regression}")
+            if regressions:
+                return 1
+            logger.info(f"✅ No regressions beyond {args.threshold:.0%} of {args.baseline}")
+        return 0
+    except KeyboardInterrupt:
+        logger.error("Operation cancelled by user")
+        return 130
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
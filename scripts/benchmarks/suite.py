@@ -0,0 +1,176 @@
+"""
+Benchmark cases, runner and baseline comparison
+
+Purpose: Each case runs in its own interpreter (python -m benchmarks
+         --run-case) so its peak RSS, taken from os.wait4() like
+         scan_orchestrator.py does for scanners, is not inflated by the
+         generator or by earlier cases. The child reports only the time
+         spent in the measured code; interpreter start-up is excluded.
+"""
+
+import importlib
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BASELINE_VERSION = 1
+DEFAULT_THRESHOLD = 0.2
+# Slowdowns smaller than this are timer and scheduler noise, whatever the ratio
+MIN_REGRESSION_SECONDS = 0.05
+
+PACKAGE_PARENT = str(Path(__file__).resolve().parent.parent)
+
+
+def _detect(tree: str, max_depth: int) -> Dict:
+    language_detector = importlib.import_module('language-detector')
+    started = time.perf_counter()
+    result = language_detector.LanguageDetector(tree, max_depth=max_depth).scan_directory()
+    return {'seconds': time.perf_counter() - started,
+            'items': result['total_files_scanned'], 'unit': 'files'}
+
+
+def _recommend(tree: str, max_depth: int, iterations: int = 20000) -> Dict:
+    language_detector = importlib.import_module('language-detector')
+    detector = language_detector.LanguageDetector(tree, max_depth=max_depth)
+    detected = detector.scan_directory()['detected_languages']
+    started = time.perf_counter()
+    for _ in range(iterations):
+        detector._generate_recommendations(detected)
+    return {'seconds': time.perf_counter() - started, 'items': iterations, 'unit': 'calls'}
+
+
+def _process(reports: str, scanners: Optional[List[str]] = None) -> Dict:
+    process_results = importlib.import_module('process_results')
+    process_results.logger.disabled = True  # threshold errors are expected on synthetic data
+    results_dir = Path(tempfile.mkdtemp(prefix='results-', dir=os.path.dirname(reports)))
+    thresholds = {'severity_threshold': 'medium', 'max_critical': 0, 'max_high': 5}
+    try:
+        started = time.perf_counter()
+        for scanner in scanners or process_results.REPORT_FILES:
+            process_results.process_scanner(scanner, Path(reports), results_dir, 'full', '')
+        overall = process_results.generate_overall_summary(results_dir, 'full', '', thresholds)
+        seconds = time.perf_counter() - started
+    finally:
+        shutil.rmtree(results_dir, ignore_errors=True)
+    return {'seconds': seconds, 'items': overall['raw_total_findings'], 'unit': 'findings',
+            'distinct_findings': overall['total_findings']}
+
+
+def _end_to_end(tree: str, max_depth: int, reports: str) -> Dict:
+    detection = _detect(tree, max_depth)
+    processing = _process(reports)
+    return {'seconds': detection['seconds'] + processing['seconds'],
+            'items': detection['items'], 'unit': 'files',
+            'detection_seconds': detection['seconds'], 'processing_seconds': processing['seconds']}
+
+
+# case name: (function, inputs it needs)
+CASES: Dict[str, tuple] = {
+    'detection': (_detect, ('tree', 'max_depth')),
+    'recommendations': (_recommend, ('tree', 'max_depth')),
+    'processing': (_process, ('reports',)),
+    'end_to_end': (_end_to_end, ('tree', 'max_depth', 'reports')),
+}
+
+
+def run_case_in_child(case: str, inputs: Dict) -> Dict:
+    """Run one case in a fresh interpreter; adds its peak RSS to the child's report."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, (PACKAGE_PARENT, env.get('PYTHONPATH'))))
+    command = [sys.executable, '-m', 'benchmarks', '--run-case', case, '--case-inputs', json.dumps(inputs)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, env=env)
+    output = process.stdout.read()
+    process.stdout.close()
+    if hasattr(os, 'wait4'):
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        peak_rss_kb = usage.ru_maxrss
+    else:
+        process.wait()
+        peak_rss_kb = None
+    if process.returncode != 0:
+        raise RuntimeError(f"benchmark case {case} exited with {process.returncode}")
+    result = json.loads(output)
+    result['peak_rss_kb'] = peak_rss_kb
+    return result
+
+
+def child_main(case: str, inputs: Dict) -> int:
+    """Entry point of the child interpreter: run the case, print its JSON report."""
+    function, _ = CASES[case]
+    print(json.dumps(function(**inputs)))
+    return 0
+
+
+def run_suite(cases: List[str], inputs: Dict, repeat: int,
+              runner: Callable[[str, Dict], Dict] = run_case_in_child) -> Dict[str, Dict]:
+    """Run every case ``repeat`` times; keeps the best time and the largest peak RSS."""
+    results = {}
+    for case in cases:
+        _, needs = CASES[case]
+        runs = [runner(case, {name: inputs[name] for name in needs}) for _ in range(repeat)]
+        best = min(runs, key=lambda run: run['seconds'])
+        rss = [run['peak_rss_kb'] for run in runs if run.get('peak_rss_kb') is not None]
+        result = dict(best)
+        result.update(
+            median_seconds=statistics.median(run['seconds'] for run in runs),
+            throughput=best['items'] / best['seconds'] if best['seconds'] else None,
+            peak_rss_kb=max(rss) if rss else None,
+            repeat=repeat,
+        )
+        results[case] = result
+        logger.info(f"⏱️  {case}: {result['seconds']:.3f}s, "
+                    f"{result['throughput'] or 0:,.0f} {result['unit']}/s"
+                    + (f", peak {result['peak_rss_kb'] / 1024:.1f} MiB" if rss else ''))
+    return results
+
+
+def build_report(results: Dict[str, Dict], parameters: Dict) -> Dict:
+    return {
+        'version': BASELINE_VERSION,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'parameters': parameters,
+        'results': results,
+    }
+
+
+def compare_to_baseline(report: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Regressions of ``report`` against ``baseline``: slower or bigger by more than ``threshold``.
+
+    Raises ValueError when a case was run on different inputs than in the
+    baseline, since its numbers are then not comparable.
+    """
+    if baseline.get('version') != BASELINE_VERSION:
+        raise ValueError(f"unsupported baseline version {baseline.get('version')}")
+    regressions = []
+    for case, result in report['results'].items():
+        base = baseline['results'].get(case)
+        if not base:
+            continue
+        for name in CASES[case][1]:
+            if name in report['parameters'] and \
+                    report['parameters'][name] != (baseline.get('parameters') or {}).get(name):
+                raise ValueError(f"baseline {case} was recorded with different {name} parameters")
+        if base['seconds'] and result['seconds'] > base['seconds'] * (1 + threshold) \
+                and result['seconds'] - base['seconds'] >= MIN_REGRESSION_SECONDS:
+            regressions.append(f"{case}: {result['seconds']:.3f}s vs baseline {base['seconds']:.3f}s "
+                               f"(+{result['seconds'] / base['seconds'] - 1:.0%})")
+        if base.get('peak_rss_kb') and result.get('peak_rss_kb') \
+                and result['peak_rss_kb'] > base['peak_rss_kb'] * (1 + threshold):
+            regressions.append(f"{case}: peak RSS {result['peak_rss_kb']} KiB vs baseline "
+                               f"{base['peak_rss_kb']} KiB (+{result['peak_rss_kb'] / base['peak_rss_kb'] - 1:.0%})")
+    return regressions
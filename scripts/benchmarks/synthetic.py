@@ -0,0 +1,239 @@
+"""
+Deterministic synthetic inputs for the benchmarks
+
+Purpose: Build project trees and scanner reports of a given shape from a
+         seed, so the same parameters always produce byte-identical inputs
+         and timings from different commits or machines are comparable.
+         Reports are written one finding at a time, so 1M findings need no
+         more memory than ten.
+"""
+
+import importlib
+import json
+import os
+import random
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+language_detector = importlib.import_module('language-detector')
+
+# Directories the detector prunes; files placed here measure how cheap pruning is
+IGNORED_DIR_NAMES = ('node_modules', 'venv', 'vendor', 'build', 'dist', '__pycache__')
+
+# Files no language claims (docs, data), as a share of the source files
+UNCLASSIFIED_NAMES = ('README.md', 'notes.txt', 'data.csv', 'logo.svg', 'config.ini')
+
+DEFAULT_LANGUAGE_MIX = {'python': 4, 'javascript': 3, 'typescript': 2, 'java': 1, 'go': 1}
+
+# Share of findings per report format
+REPORT_SHARES = (('semgrep', 0.5), ('bandit', 0.3), ('codeql', 0.2))
+
+# (CWE number, check name, vulnerable line) used for every synthetic finding
+FINDING_KINDS = (
+    (89, 'sql-injection', 'cursor.execute("SELECT * FROM t WHERE id=" + user_id)'),
+    (78, 'command-injection', 'subprocess.call(cmd, shell=True)'),
+    (79, 'xss', 'return HttpResponse(request.GET["q"])'),
+    (22, 'path-traversal', 'open(os.path.join(base, name)).read()'),
+    (798, 'hardcoded-secret', 'password = "hunter2"'),
+    (327, 'weak-crypto', 'hashlib.md5(data).hexdigest()'),
+)
+
+SEMGREP_LEVELS = ('ERROR', 'WARNING', 'INFO')
+BANDIT_LEVELS = ('HIGH', 'MEDIUM', 'LOW')
+SARIF_SCORES = ('9.1', '7.5', '5.0', '2.0')
+
+
+class TreeSpec(NamedTuple):
+    """Shape of a synthetic project tree."""
+    files: int = 20000
+    depth: int = 6
+    files_per_dir: int = 20
+    languages: Dict[str, int] = DEFAULT_LANGUAGE_MIX
+    ignored_files: int = 5000
+    manifest_density: float = 0.05   # chance that a directory holds a manifest
+    unclassified_ratio: float = 0.1
+    seed: int = 1
+
+
+class ReportSpec(NamedTuple):
+    """Size and shape of a set of synthetic scanner reports."""
+    findings: int = 100000
+    overlap: float = 0.2             # share of findings also reported by another scanner
+    seed: int = 1
+
+
+def parse_language_mix(text: str) -> Dict[str, int]:
+    """Parse 'python=3,go=1' into weights; unknown languages raise ValueError."""
+    mix = {}
+    for part in filter(None, (piece.strip() for piece in text.split(','))):
+        lang, _, weight = part.partition('=')
+        if lang not in language_detector.LANGUAGE_PATTERNS:
+            raise ValueError(f"Unknown language in mix: {lang}")
+        mix[lang] = int(weight or 1)
+    if not mix:
+        raise ValueError("Language mix is empty")
+    return mix
+
+
+def _write_file(path: str, text: str):
+    with open(path, 'w', encoding='utf-8') as handle:
+        handle.write(text)
+
+
+def _plan_directories(rng: random.Random, count: int, depth: int) -> List[str]:
+    """Relative directory paths: each new directory hangs off a random shallower one."""
+    directories = ['']
+    depths = [0]
+    for index in range(1, count):
+        while True:
+            parent = rng.randrange(len(directories))
+            if depths[parent] < depth:
+                break
+        name = f'pkg{index}'
+        directories.append(f'{directories[parent]}/{name}' if directories[parent] else name)
+        depths.append(depths[parent] + 1)
+    return directories
+
+
+def generate_tree(root: Path, spec: TreeSpec) -> Dict[str, int]:
+    """Create the tree described by ``spec`` under ``root``; returns file counts by kind."""
+    rng = random.Random(spec.seed)
+    directories = _plan_directories(rng, max(1, spec.files // max(1, spec.files_per_dir)), spec.depth)
+    for rel_dir in directories:
+        os.makedirs(os.path.join(root, rel_dir), exist_ok=True)
+
+    languages = sorted(spec.languages)
+    weights = [spec.languages[lang] for lang in languages]
+    stats = {'source': 0, 'unclassified': 0, 'manifests': 0, 'ignored': 0, 'directories': len(directories)}
+    for index in range(spec.files):
+        rel_dir = directories[rng.randrange(len(directories))]
+        if rng.random() < spec.unclassified_ratio:
+            name = f'{index}_{rng.choice(UNCLASSIFIED_NAMES)}'
+            stats['unclassified'] += 1
+        else:
+            lang = rng.choices(languages, weights)[0]
+            extension = rng.choice(language_detector.LANGUAGE_PATTERNS[lang]['extensions'])
+            name = f'file{index}{extension}'
+            stats['source'] += 1
+        _write_file(os.path.join(root, rel_dir, name), f'// synthetic file {index}\n')
+
+    for rel_dir in directories:
+        if rng.random() >= spec.manifest_density:
+            continue
+        lang = rng.choices(languages, weights)[0]
+        names = [name for name in language_detector.LANGUAGE_PATTERNS[lang]['files'] if '*' not in name]
+        if names:
+            _write_file(os.path.join(root, rel_dir, rng.choice(names)), '\n')
+            stats['manifests'] += 1
+
+    for index in range(spec.ignored_files):
+        rel_dir = directories[rng.randrange(min(len(directories), 10))]
+        ignored = os.path.join(root, rel_dir, rng.choice(IGNORED_DIR_NAMES), f'dep{index % 50}')
+        os.makedirs(ignored, exist_ok=True)
+        _write_file(os.path.join(ignored, f'mod{index}.js'), 'module.exports = {};\n')
+        stats['ignored'] += 1
+    return stats
+
+
+def _site(number: int) -> Tuple[str, int, int]:
+    """(path, line, kind index) of finding site ``number``; every scanner agrees on it."""
+    return (f'src/pkg{number % 97}/module{number // 97 % 1013}.py',
+            1 + number * 7919 % 4000, number % len(FINDING_KINDS))
+
+
+def _semgrep_item(rng: random.Random, path: str, line: int, kind: int) -> Dict:
+    cwe, name, code = FINDING_KINDS[kind]
+    return {
+        'check_id': f'python.lang.security.{name}',
+        'path': path,
+        'start': {'line': line, 'col': 5},
+        'end': {'line': line, 'col': 40},
+        'extra': {
+            'severity': rng.choice(SEMGREP_LEVELS),
+            'message': f'Possible {name.replace("-", " ")}',
+            'lines': code,
+            'metadata': {'cwe': [f'CWE-{cwe}: synthetic'], 'confidence': 'MEDIUM'},
+        },
+    }
+
+
+def _bandit_item(rng: random.Random, path: str, line: int, kind: int) -> Dict:
+    cwe, name, code = FINDING_KINDS[kind]
+    return {
+        'filename': path,
+        'line_number': line,
+        'line_range': [line],
+        'test_id': f'B{600 + kind}',
+        'test_name': name,
+        'issue_severity': rng.choice(BANDIT_LEVELS),
+        'issue_confidence': 'MEDIUM',
+        'issue_cwe': {'id': cwe, 'link': f'https://cwe.mitre.org/data/definitions/{cwe}.html'},
+        'issue_text': f'Possible {name.replace("-", " ")}',
+        'code': f'{line - 1} \n{line} {code}\n{line + 1} \n',
+    }
+
+
+def _sarif_item(rng: random.Random, path: str, line: int, kind: int) -> Dict:
+    _, name, code = FINDING_KINDS[kind]
+    return {
+        'ruleId': f'py/{name}',
+        'message': {'text': f'Possible {name.replace("-", " ")}'},
+        'locations': [{'physicalLocation': {
+            'artifactLocation': {'uri': path},
+            'region': {'startLine': line, 'snippet': {'text': code}},
+        }}],
+    }
+
+
+def _sarif_rules() -> List[Dict]:
+    return [{'id': f'py/{name}',
+             'properties': {'security-severity': SARIF_SCORES[index % len(SARIF_SCORES)],
+                            'tags': ['security', f'external/cwe/cwe-{cwe:03d}']}}
+            for index, (cwe, name, _) in enumerate(FINDING_KINDS)]
+
+
+REPORT_LAYOUT = {
+    # scanner: (file name, text before the findings, text after, item builder)
+    'semgrep': ('semgrep-results.json', '{"results": [\n', '\n], "errors": []}\n', _semgrep_item),
+    'bandit': ('bandit-report.json', '{"errors": [], "results": [\n', '\n]}\n', _bandit_item),
+    'codeql': ('codeql-results-python.sarif',
+               '{"version": "2.1.0", "runs": [{"tool": {"driver": {"name": "CodeQL", "rules": '
+               + json.dumps(_sarif_rules()) + '}}, "results": [\n',
+               '\n]}]}\n', _sarif_item),
+}
+
+
+def generate_reports(reports_dir: Path, spec: ReportSpec) -> Dict[str, int]:
+    """Write semgrep, bandit and SARIF reports holding ``spec.findings`` findings in total.
+
+    A share ``spec.overlap`` of each scanner's findings is drawn from a site
+    pool shared by all scanners, so deduplication has real work to do.
+    Returns the number of findings written per scanner.
+    """
+    rng = random.Random(spec.seed)
+    shared_sites = max(1, int(spec.findings * spec.overlap / 2))
+    next_unique = shared_sites
+    counts = {}
+    os.makedirs(reports_dir, exist_ok=True)
+    for position, (scanner, share) in enumerate(REPORT_SHARES):
+        count = (spec.findings - sum(counts.values()) if position == len(REPORT_SHARES) - 1
+                 else int(spec.findings * share))
+        file_name, head, tail, build = REPORT_LAYOUT[scanner]
+        with open(os.path.join(reports_dir, file_name), 'w', encoding='utf-8') as handle:
+            handle.write(head)
+            for index in range(count):
+                if rng.random() < spec.overlap:
+                    number = rng.randrange(shared_sites)
+                else:
+                    number, next_unique = next_unique, next_unique + 1
+                if index:
+                    handle.write(',\n')
+                handle.write(json.dumps(build(rng, *_site(number))))
+            handle.write(tail)
+        counts[scanner] = count
+    return counts
+
+
+def describe(spec: Optional[NamedTuple]) -> Optional[Dict]:
+    """JSON-friendly form of a spec, as stored in results and baselines."""
+    return None if spec is None else dict(spec._asdict())
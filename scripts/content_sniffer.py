@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Content Sniffer - Bounded-read language detection for unresolved files
+
+Purpose: Identify the language of files the extension index cannot place
+         (extensionless scripts such as bin/deploy or manage) from their
+         first bytes: shebang lines, Emacs/Vim modelines and a few cheap
+         markers. Reads are capped per file and by a global byte budget.
+Usage: used through `language-detector.py --sniff-content`
+Example: python language-detector.py . --sniff-content --sniff-bytes 256
+"""
+
+import io
+import os
+import re
+import stat
+import threading
+from typing import Dict, Optional
+
+DEFAULT_BYTES_PER_FILE = 512
+DEFAULT_BYTE_BUDGET = 64 * 1024 * 1024
+
+# Suffixes that are never worth opening: documentation, data and binaries
+NON_SOURCE_SUFFIXES = frozenset({
+    '.md', '.rst', '.txt', '.json', '.yml', '.yaml', '.toml', '.xml', '.csv', '.lock',
+    '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.pdf', '.zip', '.gz', '.tar',
+    '.jar', '.class', '.so', '.dll', '.exe', '.o', '.a', '.pyc', '.woff', '.woff2',
+})
+
+# Interpreter (shebang) and editor mode names -> LANGUAGE_PATTERNS keys
+LANGUAGE_ALIASES = {
+    'python': 'python', 'pypy': 'python',
+    'node': 'javascript', 'nodejs': 'javascript', 'javascript': 'javascript', 'js': 'javascript',
+    'ts-node': 'typescript', 'tsx': 'typescript', 'typescript': 'typescript',
+    'ruby': 'ruby', 'jruby': 'ruby',
+    'php': 'php',
+    'java': 'java',
+    'go': 'go', 'gorun': 'go',
+    'csharp': 'csharp', 'cs': 'csharp', 'dotnet-script': 'csharp',
+    'c': 'cpp', 'cpp': 'cpp', 'c++': 'cpp',
+    'kotlin': 'kotlin', 'kotlinc': 'kotlin',
+    'swift': 'swift',
+    'rust': 'rust', 'rust-script': 'rust',
+}
+
+_VERSION_SUFFIX = re.compile(r'[\d.]+$')
+_EMACS_MODE = re.compile(rb'-\*-\s*(?:.*?mode:\s*)?([\w+#-]+)\s*;?.*?-\*-', re.IGNORECASE)
+_VIM_MODELINE = re.compile(rb'(?:^|\s)(?:vim?|ex):.*?\b(?:ft|filetype|syntax)=([\w+#-]+)', re.IGNORECASE)
+
+
+def _normalize(name: str) -> Optional[str]:
+    name = name.lower()
+    return LANGUAGE_ALIASES.get(name) or LANGUAGE_ALIASES.get(_VERSION_SUFFIX.sub('', name))
+
+
+def language_from_shebang(line: bytes) -> Optional[str]:
+    """Map a ``#!`` line to a language, following ``/usr/bin/env [-S] prog``."""
+    words = line[2:].decode('utf-8', 'replace').split()
+    if not words:
+        return None
+    program = os.path.basename(words[0])
+    if program == 'env':
+        args = [word for word in words[1:] if not word.startswith('-') and '=' not in word]
+        if not args:
+            return None
+        program = os.path.basename(args[0])
+    return _normalize(program)
+
+
+def language_from_head(head: bytes) -> Optional[str]:
+    """Classify the first bytes of a file, or return None if nothing matches."""
+    lines = head.split(b'\n', 5)
+    if head.startswith(b'#!'):
+        lang = language_from_shebang(lines[0])
+        if lang:
+            return lang
+    if head.startswith(b'<?php'):
+        return 'php'
+    for line in lines[:5]:
+        match = _EMACS_MODE.search(line) or _VIM_MODELINE.search(line)
+        if match:
+            lang = _normalize(match.group(1).decode('ascii', 'replace'))
+            if lang:
+                return lang
+    return None
+
+
+class ContentSniffer:
+    """Reads at most ``bytes_per_file`` from a file into a per-thread buffer.
+
+    The total number of bytes read across all threads is capped by
+    ``byte_budget``; once exhausted, further files are not opened.
+    """
+
+    def __init__(self, bytes_per_file: int = DEFAULT_BYTES_PER_FILE,
+                 byte_budget: int = DEFAULT_BYTE_BUDGET):
+        self.bytes_per_file = max(1, bytes_per_file)
+        self.byte_budget = byte_budget
+        self.bytes_read = 0
+        self.files_sniffed = 0
+        self.files_detected = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def budget_exhausted(self) -> bool:
+        return self.bytes_read >= self.byte_budget
+
+    def _reserve(self) -> int:
+        with self._lock:
+            allowance = min(self.bytes_per_file, self.byte_budget - self.bytes_read)
+            if allowance > 0:
+                self.bytes_read += allowance
+                self.files_sniffed += 1
+            return allowance
+
+    def _refund(self, unused: int):
+        if unused:
+            with self._lock:
+                self.bytes_read -= unused
+
+    def sniff(self, path: str) -> Optional[str]:
+        """Return the language of ``path`` from its content, if recognisable."""
+        if self.budget_exhausted:
+            return None
+        try:
+            fd = os.open(path, os.O_RDONLY | getattr(os, 'O_NONBLOCK', 0))
+        except OSError:
+            return None
+        try:
+            if not stat.S_ISREG(os.fstat(fd).st_mode):
+                return None
+            allowance = self._reserve()
+            if allowance <= 0:
+                return None
+            buffer = getattr(self._local, 'buffer', None)
+            if buffer is None or len(buffer) < self.bytes_per_file:
+                buffer = self._local.buffer = bytearray(self.bytes_per_file)
+            view = memoryview(buffer)[:allowance]
+            try:
+                with io.FileIO(fd, closefd=False) as handle:
+                    size = handle.readinto(view) or 0
+            except OSError:
+                size = 0
+            self._refund(allowance - size)
+            lang = language_from_head(bytes(view[:size]))
+        finally:
+            os.close(fd)
+        if lang:
+            with self._lock:
+                self.files_detected += 1
+        return lang
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            'files_sniffed': self.files_sniffed,
+            'files_detected': self.files_detected,
+            'bytes_read': self.bytes_read,
+            'byte_budget': self.byte_budget,
+            'budget_exhausted': self.budget_exhausted,
+        }
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Detection Cache - Persistent per-directory results for language-detector.py
+
+Purpose: Remember what the language detector found in every directory,
+         keyed on the directory's mtime and inode, so repeat runs on a
+         persistent CI workspace only re-list directories that changed.
+Usage: used through `language-detector.py --cache` / `--rebuild-cache`
+Example: python language-detector.py /workspace --cache --json
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+CACHE_DIR_NAME = '.sast-cache'
+CACHE_FILE_NAME = 'langdetect.json'
+CACHE_FORMAT_VERSION = 2
+
+# Upper bound on remembered directories; least recently seen entries go first
+DEFAULT_MAX_ENTRIES = 200_000
+
+# Directories modified this close to the scan cannot be trusted yet: a later
+# change within the same timestamp tick would leave the mtime unchanged.
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def config_fingerprint(*parts: Any) -> str:
+    """Hash the detector settings that influence per-directory results."""
+    blob = json.dumps(parts, sort_keys=True, default=sorted)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()[:16]
+
+
+class DetectionCache:
+    """On-disk map of directory -> (mtime, inode, payload).
+
+    Keys are paths relative to the scanned root. Payloads are whatever the
+    detector stores (JSON-serializable); the cache only decides whether a
+    stored payload is still valid for the directory as it is on disk now.
+    """
+
+    def __init__(self, cache_file: Path, fingerprint: str,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, rebuild: bool = False):
+        self.cache_file = Path(cache_file)
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._run = 1
+        self._entries: Dict[str, list] = {}
+        self._seen = set()
+        self._started_ns = time.time_ns()
+        if not rebuild:
+            self._load()
+
+    @classmethod
+    def for_project(cls, project_path: Path, fingerprint: str, cache_dir: Optional[str] = None,
+                    **kwargs) -> 'DetectionCache':
+        """Create a cache stored under ``cache_dir`` (default: <project>/.sast-cache)."""
+        directory = Path(cache_dir) if cache_dir else Path(project_path) / CACHE_DIR_NAME
+        return cls(directory / CACHE_FILE_NAME, fingerprint, **kwargs)
+
+    def _load(self):
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return
+        if (not isinstance(data, dict) or data.get('version') != CACHE_FORMAT_VERSION
+                or data.get('fingerprint') != self.fingerprint):
+            return
+        self._entries = data.get('directories', {})
+        self._run = data.get('run', 0) + 1
+
+    def lookup(self, key: str, stat: os.stat_result,
+               is_valid: Optional[Callable[[Any], bool]] = None) -> Optional[Any]:
+        """Return the stored payload for ``key`` if the directory is unchanged.
+
+        ``is_valid`` can reject a payload for reasons the directory stat does
+        not capture (e.g. an edited .gitignore above it).
+        """
+        self._seen.add(key)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_ino \
+                and (is_valid is None or is_valid(entry[3])):
+            entry[2] = self._run
+            self.hits += 1
+            return entry[3]
+        self.misses += 1
+        return None
+
+    def store(self, key: str, stat: os.stat_result, payload: Any):
+        """Remember ``payload`` for the directory ``key`` as of ``stat``."""
+        self._seen.add(key)
+        if stat.st_mtime_ns >= self._started_ns - RACY_WINDOW_NS:
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = [stat.st_mtime_ns, stat.st_ino, self._run, payload]
+
+    def _evict(self, root: Path):
+        """Drop directories that no longer exist, then the least recently seen."""
+        for key in [k for k in self._entries if k not in self._seen]:
+            if not (root / key).is_dir():
+                del self._entries[key]
+        overflow = len(self._entries) - self.max_entries
+        if overflow > 0:
+            oldest = sorted(self._entries, key=lambda k: self._entries[k][2])[:overflow]
+            for key in oldest:
+                del self._entries[key]
+
+    def save(self, root: Path):
+        """Evict stale entries and atomically write the cache file."""
+        self._evict(Path(root))
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.cache_file.with_name(self.cache_file.name + f'.{os.getpid()}.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as handle:
+            json.dump({
+                'version': CACHE_FORMAT_VERSION,
+                'fingerprint': self.fingerprint,
+                'run': self._run,
+                'directories': self._entries,
+            }, handle, separators=(',', ':'))
+        os.replace(tmp_file, self.cache_file)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
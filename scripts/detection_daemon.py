@@ -0,0 +1,540 @@
+#!/usr/bin/env python3
+"""
+Detection Daemon - Live language-detector.py results over a Unix socket
+
+Purpose: Keep the per-directory detection state of one project in memory
+         and answer detector_client.py queries from it, so pre-commit hooks
+         and editor tasks no longer pay interpreter startup plus a full walk
+         on every call. Directory changes arrive through inotify; when
+         inotify is unavailable (not Linux, watch limit reached) every
+         watched directory is stat()ed before answering instead. Only the
+         directories an event touched are listed and classified again.
+         Changes to a .gitignore or to the pipeline configuration rebuild
+         the whole state, as they change what the walk skips.
+Usage: python detection_daemon.py {serve|start|stop|status} [path] [options]
+Example: python detection_daemon.py start . && python detector_client.py . --scanners-only
+"""
+
+import argparse
+import ctypes
+import errno
+import importlib
+import json
+import logging
+import os
+import select
+import signal
+import socketserver
+import struct
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from detector_client import (CACHE_DIR_NAME, DEFAULT_DEPTH, MAX_MESSAGE_BYTES, PROTOCOL_VERSION,
+                             request, socket_path_for)
+from ignore_rules import GITIGNORE, IgnoreMatcher, excludes_from_config
+from sast_config import DEFAULT_CONFIG_FILE, load_ci_config
+
+language_detector = importlib.import_module('language-detector')
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+LOG_FILE_NAME = 'detector.log'
+DEFAULT_SYNC_SECONDS = 5.0
+START_TIMEOUT_SECONDS = 30.0
+
+# inotify(7) event bits
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+LISTING_EVENTS = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+WATCH_MASK = LISTING_EVENTS | IN_CLOSE_WRITE | IN_ONLYDIR  # IN_CLOSE_WRITE: .gitignore edited in place
+_EVENT = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+
+def _depth(rel_dir: str) -> int:
+    return rel_dir.count(os.sep) + 1 if rel_dir else 0
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class InotifyWatcher:
+    """Directory watches through the Linux inotify API (via libc, no extra dependency)."""
+
+    kind = 'inotify'
+
+    def __init__(self, state: 'DetectionState'):
+        self.state = state
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._libc.inotify_rm_watch.argtypes = (ctypes.c_int, ctypes.c_int)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._paths: Dict[int, str] = {}
+        self._wds: Dict[str, int] = {}
+
+    def watch(self, rel_dir: str):
+        path = os.path.join(self.state.root, rel_dir) if rel_dir else self.state.root
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOENT or error == errno.ENOTDIR:
+                return  # already gone: its parent's event brings it up to date
+            raise OSError(error, f'inotify_add_watch failed for {path}')
+        previous = self._paths.get(wd)
+        if previous is not None and previous != rel_dir:  # same inode, moved
+            self._wds.pop(previous, None)
+        self._paths[wd] = rel_dir
+        self._wds[rel_dir] = wd
+
+    def unwatch(self, rel_dir: str):
+        wd = self._wds.pop(rel_dir, None)
+        if wd is not None and self._paths.get(wd) == rel_dir:
+            del self._paths[wd]
+            self._libc.inotify_rm_watch(self.fd, wd)
+
+    def sync(self):
+        """Apply every queued event to the state."""
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b'\0')
+                offset += _EVENT.size + length
+                self._handle(wd, mask, os.fsdecode(name))
+
+    def _handle(self, wd: int, mask: int, name: str):
+        if mask & IN_Q_OVERFLOW:
+            self.state.invalidate('inotify queue overflow')
+            return
+        rel_dir = self._paths.get(wd)
+        if rel_dir is None:
+            return
+        if mask & IN_IGNORED:
+            del self._paths[wd]
+            if self._wds.get(rel_dir) == wd:
+                del self._wds[rel_dir]
+            return
+        if name == GITIGNORE:
+            self.state.invalidate(f'{os.path.join(rel_dir, name)} changed')
+        elif mask & LISTING_EVENTS:
+            self.state.mark_dirty(rel_dir)
+        # Other files being written need nothing: classification looks at
+        # names only. A removed or moved directory is handled through its
+        # parent's listing event.
+
+    def wait(self, timeout: float):
+        select.select([self.fd], [], [], timeout)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback: compare directory and .gitignore stats before every answer."""
+
+    kind = 'polling'
+
+    def __init__(self, state: 'DetectionState'):
+        self.state = state
+        self._signatures: Dict[str, Tuple] = {}
+
+    def _signature(self, rel_dir: str) -> Tuple:
+        path = os.path.join(self.state.root, rel_dir) if rel_dir else self.state.root
+        return _file_signature(path), _file_signature(os.path.join(path, GITIGNORE))
+
+    def watch(self, rel_dir: str):
+        self._signatures[rel_dir] = self._signature(rel_dir)
+
+    def unwatch(self, rel_dir: str):
+        self._signatures.pop(rel_dir, None)
+
+    def sync(self):
+        for rel_dir, (directory, gitignore) in list(self._signatures.items()):
+            current = self._signature(rel_dir)
+            if current[1] != gitignore:
+                self.state.invalidate(f'{os.path.join(rel_dir, GITIGNORE)} changed')
+                return
+            if current[0] != directory:
+                self._signatures[rel_dir] = current
+                self.state.mark_dirty(rel_dir)
+
+    def wait(self, timeout: float):
+        time.sleep(timeout)
+
+    def close(self):
+        pass
+
+
+class DetectionState:
+    """Per-directory detection results of one project, kept current by a watcher.
+
+    ``tree`` maps every walked directory (relative, '' for the root) to its
+    counts and the names of the subdirectories the walk descends into, the
+    same data scan_directory() merges. Callers hold ``lock``.
+    """
+
+    def __init__(self, root: str, depth: int = DEFAULT_DEPTH, config_file: str = DEFAULT_CONFIG_FILE,
+                 use_ignore: bool = True, use_inotify: bool = True):
+        self.root = os.path.realpath(root)
+        self.depth = depth
+        self.config_file = os.path.abspath(config_file)
+        self.use_ignore = use_ignore
+        self.lock = threading.Lock()
+        self.tree: Dict[str, Tuple[object, List[str]]] = {}
+        self.detector = None
+        self.watcher = None
+        if use_inotify and sys.platform.startswith('linux'):
+            try:
+                self.watcher = InotifyWatcher(self)
+            except OSError as e:
+                logger.warning(f"⚠️  inotify unavailable ({e}), polling directories instead")
+        if self.watcher is None:
+            self.watcher = PollingWatcher(self)
+        self._dirty: Set[str] = set()
+        self._rebuild_reason: Optional[str] = 'startup'
+        self._config_signature = None
+        self._results = None
+        self.started = time.time()
+        self.rebuilds = 0
+        self.refreshes = 0
+        self.queries = 0
+
+    @property
+    def settings(self) -> Dict:
+        return {'root': self.root, 'depth': self.depth, 'ignore': self.use_ignore, 'config': self.config_file}
+
+    def mark_dirty(self, rel_dir: str):
+        if rel_dir in self.tree:
+            self._dirty.add(rel_dir)
+
+    def invalidate(self, reason: str):
+        self._rebuild_reason = self._rebuild_reason or reason
+
+    def current(self) -> Dict:
+        """The detection results for the tree as it is now."""
+        try:
+            return self._current()
+        except OSError as e:
+            if not isinstance(self.watcher, InotifyWatcher) or e.errno != errno.ENOSPC:
+                raise
+            logger.warning("⚠️  inotify watch limit reached (fs.inotify.max_user_watches), "
+                           "polling directories instead")
+            self.watcher.close()
+            self.watcher = PollingWatcher(self)
+            self.tree = {}
+            self.invalidate('switched to polling')
+            return self._current()
+
+    def _current(self) -> Dict:
+        self.watcher.sync()
+        config_signature = _file_signature(self.config_file)
+        if config_signature != self._config_signature:
+            if self._config_signature is not None:
+                self.invalidate(f'{self.config_file} changed')
+            self._config_signature = config_signature
+        if self._rebuild_reason is not None:
+            self._rebuild()
+        elif self._dirty:
+            self._refresh()
+        return self._results
+
+    def _rebuild(self):
+        started = time.perf_counter()
+        reason, self._rebuild_reason = self._rebuild_reason, None
+        ignore_matcher = None
+        if self.use_ignore:
+            ignore_matcher = IgnoreMatcher(self.root, excludes_from_config(load_ci_config(self.config_file)))
+        self.detector = language_detector.LanguageDetector(self.root, max_depth=self.depth,
+                                                           ignore_matcher=ignore_matcher)
+        for rel_dir in list(self.tree):
+            self.watcher.unwatch(rel_dir)
+        self.tree = {}
+        self._dirty.clear()
+        self._walk('')
+        self._results = self.detector.collect_results(self._ordered())
+        self.rebuilds += 1
+        logger.info(f"🔄 Rebuilt detection state ({reason}): {len(self.tree)} directories "
+                    f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    def _refresh(self):
+        """List the dirty directories again, walking added and dropping removed subtrees."""
+        for rel_dir in sorted(self._dirty, key=_depth):
+            if rel_dir not in self.tree:
+                continue  # dropped with a removed parent
+            old_subdirs = self.tree[rel_dir][1]
+            counts, subdirs = self.detector.scan_one_directory(rel_dir)
+            self.tree[rel_dir] = (counts, subdirs)
+            child_depth = _depth(rel_dir) + 1
+            for name in set(old_subdirs) - set(subdirs):
+                self._drop(os.path.join(rel_dir, name) if rel_dir else name)
+            if child_depth < self.detector.walk_depth:
+                for name in set(subdirs) - set(old_subdirs):
+                    self._walk(os.path.join(rel_dir, name) if rel_dir else name)
+        self._dirty.clear()
+        self._results = self.detector.collect_results(self._ordered())
+        self.refreshes += 1
+
+    def _walk(self, rel_dir: str):
+        """Add ``rel_dir`` and its subtree, watching each directory before it is listed."""
+        walk_depth = self.detector.walk_depth
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            self.watcher.watch(current)
+            counts, subdirs = self.detector.scan_one_directory(current)
+            self.tree[current] = (counts, subdirs)
+            if _depth(current) + 1 < walk_depth:
+                stack.extend(os.path.join(current, name) if current else name for name in reversed(subdirs))
+
+    def _drop(self, rel_dir: str):
+        """Forget ``rel_dir`` and everything below it."""
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            entry = self.tree.pop(current, None)
+            self._dirty.discard(current)
+            self.watcher.unwatch(current)
+            if entry is not None:
+                stack.extend(os.path.join(current, name) for name in entry[1])
+
+    def _ordered(self) -> Iterator[Tuple[int, object]]:
+        """(depth, counts) of every directory in the walk's pre-order."""
+        stack = ['']
+        while stack:
+            rel_dir = stack.pop()
+            entry = self.tree.get(rel_dir)
+            if entry is None:
+                continue
+            yield _depth(rel_dir), entry[0]
+            stack.extend(os.path.join(rel_dir, name) if rel_dir else name for name in reversed(entry[1]))
+
+    def status(self) -> Dict:
+        return dict(self.settings, pid=os.getpid(), watcher=self.watcher.kind, directories=len(self.tree),
+                    rebuilds=self.rebuilds, refreshes=self.refreshes, queries=self.queries,
+                    uptime_seconds=round(time.time() - self.started, 1))
+
+    def run(self, interval: float, stop: threading.Event):
+        """Keep applying events in the background so the kernel queue does not overflow."""
+        while not stop.is_set():
+            self.watcher.wait(interval)
+            if isinstance(self.watcher, PollingWatcher):
+                continue  # stats are compared when a query comes in
+            try:
+                with self.lock:
+                    self.watcher.sync()
+            except Exception as e:
+                logger.error(f"Unexpected error while applying file-system events: {e}")
+
+
+def make_handler(state: DetectionState, server_stopping: threading.Event):
+    class QueryHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            line = self.rfile.readline(MAX_MESSAGE_BYTES)
+            try:
+                message = json.loads(line)
+                response = self.respond(message)
+            except ValueError as e:
+                response = {'ok': False, 'error': f'malformed request: {e}'}
+            except Exception as e:
+                logger.error(f"Unexpected error while answering a query: {e}")
+                response = {'ok': False, 'error': str(e)}
+            self.wfile.write(json.dumps(response, separators=(',', ':')).encode('utf-8') + b'\n')
+
+        def respond(self, message: Dict) -> Dict:
+            if not isinstance(message, dict) or message.get('version') != PROTOCOL_VERSION:
+                return {'ok': False, 'error': f'expected protocol version {PROTOCOL_VERSION}'}
+            command = message.get('command')
+            if command == 'status':
+                with state.lock:
+                    return {'ok': True, 'status': state.status()}
+            if command == 'shutdown':
+                server_stopping.set()
+                return {'ok': True}
+            if command != 'detect':
+                return {'ok': False, 'error': f'unknown command: {command}'}
+            wanted = {key: message.get(key) for key in state.settings}
+            if wanted != state.settings:
+                return {'ok': False, 'error': 'daemon serves other settings', 'settings': state.settings}
+            with state.lock:
+                state.queries += 1
+                return {'ok': True, 'results': state.current()}
+
+        def finish(self):
+            super().finish()
+            if server_stopping.is_set():
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+    return QueryHandler
+
+
+class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def daemon_status(socket_path: str) -> Optional[Dict]:
+    """Status of the daemon listening on ``socket_path``; None if there is none."""
+    try:
+        response = request(socket_path, {'command': 'status'})
+    except (OSError, ValueError):
+        return None
+    return response.get('status') if response.get('ok') else None
+
+
+def serve(state: DetectionState, socket_path: str, sync_interval: float) -> int:
+    if daemon_status(socket_path) is not None:
+        logger.error(f"❌ A daemon is already listening on {socket_path}")
+        return 1
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)  # left behind by a daemon that did not shut down cleanly
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+
+    with state.lock:
+        state.current()
+    stopping = threading.Event()
+    server = UnixServer(socket_path, make_handler(state, stopping))
+    os.chmod(socket_path, 0o600)
+    stop = threading.Event()
+    thread = threading.Thread(target=state.run, args=(sync_interval, stop), name='detection-watcher',
+                              daemon=True)
+    thread.start()
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+    logger.info(f"🚀 Serving detection for {state.root} on {socket_path} ({state.watcher.kind})")
+    try:
+        server.serve_forever()
+    finally:
+        stop.set()
+        server.server_close()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+        state.watcher.close()
+    logger.info("👋 Detection daemon stopped")
+    return 0
+
+
+def start(args: argparse.Namespace, socket_path: str) -> int:
+    """Run ``serve`` in the background and wait until it answers."""
+    status = daemon_status(socket_path)
+    if status is not None:
+        logger.info(f"✅ Already running (pid {status['pid']}) on {socket_path}")
+        return 0
+    log_path = os.path.join(os.path.dirname(socket_path), LOG_FILE_NAME)
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    command = [sys.executable, os.path.abspath(__file__), 'serve', args.path, '--socket', socket_path,
+               '--depth', str(args.depth), '--config', args.config,
+               '--sync-interval', str(args.sync_interval)]
+    if args.no_ignore:
+        command.append('--no-ignore')
+    if args.poll:
+        command.append('--poll')
+    with open(log_path, 'a', encoding='utf-8') as log:
+        process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                                   start_new_session=True)
+    deadline = time.monotonic() + START_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        status = daemon_status(socket_path)
+        if status is not None:
+            logger.info(f"✅ Detection daemon started (pid {status['pid']}, {status['watcher']}, "
+                        f"{status['directories']} directories) on {socket_path}")
+            return 0
+        if process.poll() is not None:
+            break
+        time.sleep(0.05)
+    logger.error(f"❌ Detection daemon did not come up, see {log_path}")
+    return 1
+
+
+def main() -> int:
+    """Main entry point with proper error handling."""
+    parser = argparse.ArgumentParser(
+        description='🛰️  Keep language detection results live and serve them over a Unix socket',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+    python detection_daemon.py start                   # Background daemon for the current directory
+    python detector_client.py --scanners-only          # Answered by the daemon (direct scan without one)
+    python detection_daemon.py status                  # Watcher kind, directories, queries served
+    python detection_daemon.py stop                    # Shut it down
+    python detection_daemon.py serve /path/to/project  # Run in the foreground
+        """
+    )
+    parser.add_argument('command', choices=('serve', 'start', 'stop', 'status'))
+    parser.add_argument('path', nargs='?', default='.',
+                        help='Project path to watch (default: current directory)')
+    parser.add_argument('--socket',
+                        help=f'Unix socket to listen on (default: <path>/{CACHE_DIR_NAME}/detector.sock)')
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH,
+                        help=f'Maximum directory depth, as language-detector.py --depth (default: {DEFAULT_DEPTH})')
+    parser.add_argument('--config', default=DEFAULT_CONFIG_FILE,
+                        help=f'Pipeline configuration whose sast.*.exclude_paths are skipped '
+                             f'(default: {DEFAULT_CONFIG_FILE})')
+    parser.add_argument('--no-ignore', action='store_true',
+                        help='Do not skip paths matched by .gitignore files or the configured exclude_paths')
+    parser.add_argument('--poll', action='store_true',
+                        help='Compare directory stats on every query instead of using inotify')
+    parser.add_argument('--sync-interval', type=float, default=DEFAULT_SYNC_SECONDS,
+                        help=f'Seconds between background passes over queued inotify events '
+                             f'(default: {DEFAULT_SYNC_SECONDS})')
+    args = parser.parse_args()
+
+    try:
+        socket_path = args.socket or socket_path_for(args.path)
+        if args.command == 'status':
+            status = daemon_status(socket_path)
+            if status is None:
+                logger.info(f"⚠️  No detection daemon on {socket_path}")
+                return 1
+            print(json.dumps(status, indent=2))
+            return 0
+        if args.command == 'stop':
+            try:
+                request(socket_path, {'command': 'shutdown'})
+            except (OSError, ValueError):
+                logger.info(f"⚠️  No detection daemon on {socket_path}")
+                return 0
+            deadline = time.monotonic() + START_TIMEOUT_SECONDS
+            while os.path.exists(socket_path) and time.monotonic() < deadline:
+                time.sleep(0.05)
+            logger.info("✅ Detection daemon stopped")
+            return 0
+        if args.command == 'start':
+            return start(args, socket_path)
+
+        if not os.path.isdir(args.path):
+            raise FileNotFoundError(f"Project path does not exist: {args.path}")
+        state = DetectionState(args.path, args.depth, args.config, not args.no_ignore, not args.poll)
+        return serve(state, socket_path, args.sync_interval)
+    except KeyboardInterrupt:
+        logger.error("Operation cancelled by user")
+        return 130
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
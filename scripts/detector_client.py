@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Detector Client - language-detector.py answers from a running detection daemon
+
+Purpose: Ask detection_daemon.py for the current detection of a project
+         over its Unix socket and print it the way
+         `language-detector.py --json` or `--scanners-only` would, so
+         pre-commit hooks and editor tasks pay interpreter startup plus one
+         socket round trip instead of a full walk. When no daemon serves the
+         project with the same settings, or the arguments ask for anything
+         the daemon does not keep (human-readable output, --profile,
+         --sniff-content, ...), language-detector.py runs directly with the
+         same arguments. Only light standard library modules are imported.
+Usage: python detector_client.py [path] [--json | --scanners-only] [detector options]
+Example: python detector_client.py . --scanners-only
+"""
+
+import json
+import os
+import socket
+import sys
+from pathlib import PurePath
+from typing import Dict, List, Optional
+
+CACHE_DIR_NAME = '.sast-cache'  # same as detection_cache.CACHE_DIR_NAME (not imported: startup time)
+SOCKET_NAME = 'detector.sock'
+PROTOCOL_VERSION = 1
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_DEPTH = 3
+DEFAULT_CONFIG_FILE = 'ci-config.yaml'
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+DETECTOR_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'language-detector.py')
+
+# Client options that language-detector.py does not know (dropped when falling back)
+CLIENT_OPTIONS = {'--socket': True, '--timeout': True, '--no-daemon': False}
+
+
+def socket_path_for(project_path: str) -> str:
+    """Default socket of the daemon serving ``project_path``."""
+    return os.path.join(os.path.realpath(project_path), CACHE_DIR_NAME, SOCKET_NAME)
+
+
+def request(socket_path: str, message: Dict, timeout: float = DEFAULT_TIMEOUT) -> Dict:
+    """Send one JSON request line and return the JSON response line.
+
+    Raises OSError when no daemon listens on ``socket_path`` and ValueError
+    on a malformed response.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(dict(message, version=PROTOCOL_VERSION)).encode('utf-8') + b'\n')
+        chunks = []
+        received = 0
+        while True:
+            chunk = connection.recv(1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            received += len(chunk)
+            if chunk.endswith(b'\n'):
+                break
+            if received > MAX_MESSAGE_BYTES:
+                raise ValueError('response too large')
+    response = json.loads(b''.join(chunks))
+    if not isinstance(response, dict):
+        raise ValueError('malformed response')
+    return response
+
+
+def parse_args(argv: List[str]) -> Optional[Dict]:
+    """The query the daemon can answer for ``argv``; None if only a direct scan can.
+
+    Client options are collected under 'client'.
+    """
+    query = {'path': '.', 'format': None, 'depth': DEFAULT_DEPTH, 'ignore': True,
+             'config': DEFAULT_CONFIG_FILE, 'client': {}}
+    positional = []
+    args = iter(argv)
+    for arg in args:
+        name, has_value, value = arg.partition('=')
+        if name in ('--socket', '--timeout', '--depth', '--config'):
+            if not has_value:
+                value = next(args, None)
+                if value is None:
+                    return None
+            if name == '--depth':
+                if not value.isdigit():
+                    return None
+                query['depth'] = int(value)
+            elif name == '--config':
+                query['config'] = value
+            else:
+                query['client'][name] = value
+        elif arg == '--json':
+            query['format'] = 'json'  # wins over --scanners-only, as in language-detector.py
+        elif arg == '--scanners-only':
+            query['format'] = query['format'] or 'scanners'
+        elif arg == '--no-ignore':
+            query['ignore'] = False
+        elif arg == '--no-daemon':
+            return None
+        elif arg.startswith('-'):
+            return None
+        else:
+            positional.append(arg)
+    if query['format'] is None or len(positional) > 1:
+        return None
+    if positional:
+        query['path'] = positional[0]
+    return query
+
+
+def detector_args(argv: List[str]) -> List[str]:
+    """``argv`` without the client-only options."""
+    result = []
+    args = iter(argv)
+    for arg in args:
+        name = arg.partition('=')[0]
+        if name in CLIENT_OPTIONS:
+            if CLIENT_OPTIONS[name] and '=' not in arg:
+                next(args, None)
+            continue
+        result.append(arg)
+    return result
+
+
+def ask_daemon(query: Dict) -> Optional[Dict]:
+    """Detection results from the daemon; None if it is not running or serves other settings."""
+    socket_path = query['client'].get('--socket') or socket_path_for(query['path'])
+    try:
+        timeout = float(query['client'].get('--timeout', DEFAULT_TIMEOUT))
+        response = request(socket_path, {
+            'command': 'detect',
+            'root': os.path.realpath(query['path']),
+            'depth': query['depth'],
+            'ignore': query['ignore'],
+            'config': os.path.abspath(query['config']),
+        }, timeout)
+    except (OSError, ValueError):
+        return None
+    if not response.get('ok') or not isinstance(response.get('results'), dict):
+        return None
+    return response['results']
+
+
+def main() -> int:
+    argv = sys.argv[1:]
+    query = parse_args(argv)
+    results = ask_daemon(query) if query is not None else None
+    if results is None:
+        sys.stdout.flush()
+        os.execv(sys.executable, [sys.executable, DETECTOR_SCRIPT] + detector_args(argv))
+    results['scan_path'] = str(PurePath(query['path']))
+    if query['format'] == 'json':
+        print(json.dumps(results, indent=2))
+    else:
+        print(' '.join(results['recommendations']['recommended_scanners']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
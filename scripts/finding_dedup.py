@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Finding Deduplication - Cross-scanner duplicate detection for SAST findings
+
+Purpose: Give every finding a normalized identity (file, line, CWE or rule
+         family, snippet hash) and merge findings that several scanners
+         report for the same weakness on (nearly) the same line, e.g. the
+         CodeQL and Semgrep SQL injection hits in
+         examples/vulnerable-code/sql_injection.py. Runs in one pass over a
+         hash index, so cost grows linearly with the number of findings.
+Usage: from finding_dedup import Deduplicator
+Example: python finding_dedup.py sast-results/*-findings.cols
+"""
+
+import hashlib
+import os
+import posixpath
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from findings_store import COLUMNS_SUFFIX, ColumnarFindings
+
+SEVERITY_RANK = {'critical': 4, 'high': 3, 'medium': 2, 'low': 1}
+
+# Findings of the same family this many lines apart are the same issue
+LINE_TOLERANCE = 2
+_WINDOW = LINE_TOLERANCE + 1
+
+_CWE = re.compile(r'cwe[-_/ ]?0*(\d+)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_path(path: str, source_root: Optional[str] = None) -> str:
+    """Repository-relative, '/'-separated form of a path or file:// URI."""
+    if not path:
+        return ''
+    if path.startswith('file://'):
+        path = path[len('file://'):]
+    path = path.replace('\\', '/')
+    root = (source_root or os.getcwd()).replace('\\', '/').rstrip('/')
+    if path.startswith(root + '/'):
+        path = path[len(root) + 1:]
+    path = posixpath.normpath(path)
+    return '' if path == '.' else path
+
+
+def cwe_family(*candidates) -> Optional[str]:
+    """Return 'CWE-<n>' from the first candidate (string, number, list) that names one."""
+    for candidate in candidates:
+        if candidate is None:
+            continue
+        if isinstance(candidate, int):
+            return f'CWE-{candidate}'
+        if isinstance(candidate, (list, tuple)):
+            family = cwe_family(*candidate)
+            if family:
+                return family
+            continue
+        match = _CWE.search(str(candidate))
+        if match:
+            return f'CWE-{int(match.group(1))}'
+    return None
+
+
+def snippet_hash(snippet: Optional[str]) -> str:
+    """Whitespace-insensitive short hash of a code snippet ('' when unknown)."""
+    if not snippet:
+        return ''
+    normalized = _WHITESPACE.sub(' ', snippet).strip()
+    if not normalized:
+        return ''
+    return hashlib.sha1(normalized.encode('utf-8', 'replace')).hexdigest()[:12]
+
+
+class Deduplicator:
+    """Hash index of canonical findings keyed by (path, family, line window).
+
+    A new finding is a duplicate when an existing finding with the same path
+    and family is on the same line, or lies within LINE_TOLERANCE lines and
+    their snippets do not contradict each other (equal, or at least one
+    unknown). Only the three neighbouring windows are probed, so every add()
+    is O(1) on average.
+    """
+
+    def __init__(self):
+        self._index: Dict[Tuple[str, str, int], List[list]] = {}
+        self._canonical_severity: List[Optional[str]] = []
+        self._raw: Dict[str, int] = {}
+        self._canonical_by_scanner: Dict[str, set] = {}
+        self._scanners_by_canonical: List[set] = []
+
+    def add(self, scanner: str, severity: Optional[str], path: str, line: int,
+            family: str, snippet: str = '') -> int:
+        """Register one finding and return the id of its canonical finding."""
+        self._raw[scanner] = self._raw.get(scanner, 0) + 1
+        window = line // _WINDOW
+        canonical = None
+        for probe in (window, window - 1, window + 1):
+            for entry_line, entry_snippet, entry_id in self._index.get((path, family, probe), ()):
+                if entry_line == line or (
+                        abs(entry_line - line) <= LINE_TOLERANCE
+                        and (not snippet or not entry_snippet or snippet == entry_snippet)):
+                    canonical = entry_id
+                    break
+            if canonical is not None:
+                break
+
+        if canonical is None:
+            canonical = len(self._canonical_severity)
+            self._canonical_severity.append(severity)
+            self._scanners_by_canonical.append(set())
+            self._index.setdefault((path, family, window), []).append([line, snippet, canonical])
+        elif SEVERITY_RANK.get(severity, 0) > SEVERITY_RANK.get(self._canonical_severity[canonical], 0):
+            self._canonical_severity[canonical] = severity
+
+        self._canonical_by_scanner.setdefault(scanner, set()).add(canonical)
+        self._scanners_by_canonical[canonical].add(scanner)
+        return canonical
+
+    def severity_counts(self) -> Dict[str, int]:
+        """Deduplicated findings per severity (highest severity among duplicates)."""
+        counts = dict.fromkeys(SEVERITY_RANK, 0)
+        for severity in self._canonical_severity:
+            if severity in counts:
+                counts[severity] += 1
+        return counts
+
+    @property
+    def total(self) -> int:
+        return len(self._canonical_severity)
+
+    def scanner_stats(self) -> Dict[str, Dict[str, int]]:
+        """Raw, deduplicated and exclusively-found counts per scanner."""
+        stats = {}
+        for scanner, canonical_ids in self._canonical_by_scanner.items():
+            unique = sum(1 for cid in canonical_ids if len(self._scanners_by_canonical[cid]) == 1)
+            stats[scanner] = {
+                'raw': self._raw[scanner],
+                'deduplicated': len(canonical_ids),
+                'unique': unique,
+            }
+        return stats
+
+
+def main() -> int:
+    """Deduplicate one or more <scanner>-findings.cols files and print the counts."""
+    if len(sys.argv) < 2:
+        print("Usage: python finding_dedup.py <scanner>-findings.cols [...]", file=sys.stderr)
+        return 1
+    dedup = Deduplicator()
+    for path in sys.argv[1:]:
+        scanner = os.path.basename(path)[:-len(COLUMNS_SUFFIX)]
+        with ColumnarFindings(path) as findings:
+            for identity in findings.identities():
+                dedup.add(scanner, *identity)
+    for scanner, stats in sorted(dedup.scanner_stats().items()):
+        print(f"{scanner:10} raw={stats['raw']} deduplicated={stats['deduplicated']} unique={stats['unique']}")
+    print(f"{'total':10} {dedup.total} distinct findings")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Findings Cache - Content-addressed per-file scanner results across CI runs
+
+Purpose: A file whose bytes, scanner, ruleset and scanner version are all
+         unchanged produces the same findings, so Semgrep, Bandit and ESLint
+         results are stored per file under the hash of those four inputs.
+         The orchestrator scans only cache misses, then splits the fresh
+         report per file into the cache and merges the cached findings back
+         into the report, in the scanner's own format, so
+         process_results.sh reads it as if every file had been scanned.
+         Entries live in a single SQLite file and the least recently used
+         ones are evicted once the store exceeds its size limit.
+         Remote rule packs (semgrep --config auto, p/...) can change without
+         a version bump; they are part of the ruleset key only by name.
+Usage: used through `scan_orchestrator.py --findings-cache`
+Example: python findings_cache.py .sast-cache/findings.sqlite
+"""
+
+import hashlib
+import importlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from detection_cache import CACHE_DIR_NAME
+from git_index import GitIndexError, iter_tracked_files
+from ignore_rules import IgnoreMatcher
+from json_stream import iter_items
+from sast_config import get_setting
+
+language_detector = importlib.import_module('language-detector')
+
+CACHE_FILE_NAME = 'findings.sqlite'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+HASH_BLOCK_SIZE = 1 << 20
+VERSION_TIMEOUT_SECONDS = 60
+
+# Above this many cache misses a single scan of the whole target is cheaper
+# (and keeps command lines short); its results still refill the cache.
+MAX_MISS_FILES = 1000
+
+# Per scanner: report written by scan_orchestrator.build_jobs, ruleset file,
+# version command and the languages it reads (None: any file)
+CACHEABLE_SCANNERS = {
+    'semgrep': {
+        'report': 'semgrep-results.json',
+        'ruleset': 'configs/semgrep-rules.yaml',
+        'version': ['semgrep', '--version'],
+        'languages': None,
+    },
+    'bandit': {
+        'report': 'bandit-report.json',
+        'ruleset': 'configs/bandit.yaml',
+        'version': ['bandit', '--version'],
+        'languages': ('python',),
+    },
+    'eslint': {
+        'report': 'eslint-report.json',
+        'ruleset': 'configs/.eslintrc.security.json',
+        'version': ['npx', '--no-install', 'eslint', '--version'],
+        'languages': ('javascript', 'typescript'),
+    },
+}
+
+
+def file_digest(path: str) -> Optional[str]:
+    """SHA-256 of a file's bytes, or None if it cannot be read."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as handle:
+            for block in iter(lambda: handle.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def ruleset_hash(scanner: str, scanner_config: Dict, ci_config: Dict) -> str:
+    """Hash of everything besides the file itself that decides a scanner's findings."""
+    digest = hashlib.sha256()
+    try:
+        digest.update(Path(CACHEABLE_SCANNERS[scanner]['ruleset']).read_bytes())
+    except OSError:
+        digest.update(b'\0no-ruleset')
+    options = (scanner_config.get('scanner_config') or {}).get(scanner, {})
+    excludes = get_setting(ci_config, f'sast.{scanner}.exclude_paths', [])
+    digest.update(json.dumps([options, excludes], sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def scanner_version(scanner: str) -> Optional[str]:
+    """Output of the scanner's --version; None if it cannot be determined."""
+    try:
+        completed = subprocess.run(CACHEABLE_SCANNERS[scanner]['version'], capture_output=True,
+                                   timeout=VERSION_TIMEOUT_SECONDS, check=False)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    output = completed.stdout.decode('utf-8', 'replace').strip()
+    return output if completed.returncode == 0 and output else None
+
+
+class ReportFormat:
+    """How one scanner's JSON report stores findings and the file they belong to.
+
+    ESLint reports one object per file, so its unit of caching is the whole
+    file result rather than individual messages.
+    """
+
+    def __init__(self, items_path: str, path_field: str, skeleton, absolute_paths: bool = False):
+        self.items_path = items_path
+        self.path_field = path_field
+        self.skeleton = skeleton
+        self.absolute_paths = absolute_paths
+
+    def iter_findings(self, report: Path) -> Iterator[Dict]:
+        with open(report, 'r', encoding='utf-8') as handle:
+            for _, item in iter_items(handle, (self.items_path,)):
+                yield item
+
+    def merge(self, report: Path, findings: List[Dict], replace: bool = False):
+        """Append ``findings`` to the report, or write a report of only them with ``replace``."""
+        document = None
+        if not replace:
+            try:
+                with open(report, 'r', encoding='utf-8') as handle:
+                    document = json.load(handle)
+            except (OSError, ValueError):
+                pass
+        if document is None:
+            document = json.loads(self.skeleton)
+        items = document if isinstance(document, list) else document.setdefault('results', [])
+        items.extend(findings)
+        temp_path = report.with_name(report.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            json.dump(document, handle)
+        os.replace(temp_path, report)
+
+
+REPORT_FORMATS = {
+    'semgrep': ReportFormat('results.*', 'path', '{"results": [], "errors": []}'),
+    'bandit': ReportFormat('results.*', 'filename', '{"errors": [], "results": []}'),
+    'eslint': ReportFormat('*', 'filePath', '[]', absolute_paths=True),
+}
+
+
+class FindingsCache:
+    """SQLite store of per-file findings with least-recently-used eviction."""
+
+    def __init__(self, db_path: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.db_path))
+        self.db.execute('CREATE TABLE IF NOT EXISTS findings ('
+                        'key TEXT PRIMARY KEY, payload BLOB NOT NULL, '
+                        'size INTEGER NOT NULL, last_used INTEGER NOT NULL)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS findings_last_used ON findings (last_used)')
+        self._now = time.time_ns()
+
+    @classmethod
+    def for_project(cls, project_path: str, cache_dir: Optional[str] = None, **kwargs) -> 'FindingsCache':
+        directory = Path(cache_dir) if cache_dir else Path(project_path) / CACHE_DIR_NAME
+        return cls(directory / CACHE_FILE_NAME, **kwargs)
+
+    @staticmethod
+    def make_key(content_hash: str, scanner: str, rules_hash: str, version: str) -> str:
+        blob = '\0'.join((content_hash, scanner, rules_hash, version)).encode('utf-8')
+        return hashlib.sha256(blob).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[Dict]]:
+        """Return the stored findings for every key present, marking them as used."""
+        found = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self.db.execute(
+                f"SELECT key, payload FROM findings WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+            for key, payload in rows:
+                found[key] = json.loads(zlib.decompress(payload))
+        self.db.executemany('UPDATE findings SET last_used = ? WHERE key = ?',
+                            [(self._now, key) for key in found])
+        return found
+
+    def put_many(self, entries: Dict[str, List[Dict]]):
+        rows = []
+        for key, findings in entries.items():
+            payload = zlib.compress(json.dumps(findings, separators=(',', ':')).encode('utf-8'))
+            rows.append((key, payload, len(payload), self._now))
+        self.db.executemany('INSERT OR REPLACE INTO findings VALUES (?, ?, ?, ?)', rows)
+
+    def close(self):
+        """Evict least recently used entries beyond max_bytes, then commit."""
+        total = 0
+        evict = []
+        for key, size in self.db.execute('SELECT key, size FROM findings ORDER BY last_used DESC'):
+            total += size
+            if total > self.max_bytes:
+                evict.append((key,))
+        self.db.executemany('DELETE FROM findings WHERE key = ?', evict)
+        self.db.commit()
+        self.db.close()
+
+    def stats(self) -> Dict:
+        entries, size = self.db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM findings').fetchone()
+        return {'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes}
+
+
+def list_project_files(project_path: str, ignore_matcher: Optional[IgnoreMatcher] = None) -> List[str]:
+    """Project-relative files to consider: tracked files, else a walk skipping ignored directories.
+
+    With ``ignore_matcher``, its configured excludes are dropped as well, and
+    on a walk also what .gitignore matches (tracked files are kept, as git does).
+    """
+    ignore_dirs = language_detector.LanguageDetector(project_path).ignore_dirs
+    try:
+        files = list(iter_tracked_files(project_path))
+    except GitIndexError:
+        files = []
+        for dir_path, dir_names, file_names in os.walk(project_path):
+            dir_names[:] = [name for name in dir_names if name not in ignore_dirs]
+            rel_dir = os.path.relpath(dir_path, project_path)
+            if rel_dir == '.':
+                rel_dir = ''
+            rel_dir = rel_dir.replace(os.sep, '/')
+            if ignore_matcher is not None:
+                rules = ignore_matcher.directory(rel_dir)
+                dir_names[:] = rules.filter(dir_names, True)
+                file_names = rules.filter(file_names, False)
+            for name in file_names:
+                files.append(f'{rel_dir}/{name}' if rel_dir else name)
+        return files
+    files = [path for path in files if not ignore_dirs.intersection(path.split('/')[:-1])]
+    if ignore_matcher is not None:
+        files = [path for path in files if not ignore_matcher.is_ignored(path, gitignore=False)]
+    return files
+
+
+def files_for_scanner(scanner: str, files: List[str]) -> List[str]:
+    languages = CACHEABLE_SCANNERS[scanner]['languages']
+    if languages is None:
+        return files
+    index = language_detector.EXTENSION_INDEX
+    return [path for path in files
+            if any(lang in languages for lang in index.get(language_detector.file_suffix(path), ()))]
+
+
+class CacheSession:
+    """Cache bookkeeping for one orchestrator run."""
+
+    def __init__(self, cache: FindingsCache, project_path: str, output_dir: Path,
+                 ignore_matcher: Optional[IgnoreMatcher] = None):
+        self.cache = cache
+        self.project_path = project_path
+        self.ignore_matcher = ignore_matcher
+        self.project_root = os.path.abspath(project_path)
+        self.output_dir = output_dir
+        self.pending: Dict[str, Dict] = {}
+
+    def plan(self, scanner_config: Dict, ci_config: Dict,
+             targets: Optional[Dict[str, List[str]]]) -> Dict[str, List[str]]:
+        """Look up every candidate file and return the per-scanner targets to actually scan."""
+        targets = dict(targets or {})
+        all_files = None
+        for scanner in scanner_config.get('scanners', []):
+            if scanner not in CACHEABLE_SCANNERS:
+                continue
+            version = scanner_version(scanner)
+            if version is None:
+                continue
+            if scanner in targets:
+                candidates = targets[scanner]
+            else:
+                if all_files is None:
+                    all_files = list_project_files(self.project_path, self.ignore_matcher)
+                candidates = files_for_scanner(scanner, all_files)
+
+            rules_hash = ruleset_hash(scanner, scanner_config, ci_config)
+            keys = {}
+            for path in candidates:
+                digest = file_digest(os.path.join(self.project_path, path))
+                if digest is not None:
+                    keys[path] = self.cache.make_key(digest, scanner, rules_hash, version)
+            stored = self.cache.get_many(sorted(set(keys.values())))
+            hits = {path: stored[key] for path, key in keys.items() if key in stored}
+            misses = [path for path in candidates if path not in hits]
+
+            full_scan = len(misses) > MAX_MISS_FILES
+            if full_scan:
+                hits = {}
+                misses = candidates
+            else:
+                targets[scanner] = misses
+            self.pending[scanner] = {'keys': keys, 'hits': hits, 'scanned': misses,
+                                     'full_scan': full_scan, 'candidates': len(candidates)}
+        return targets
+
+    def _relative(self, reported_path: str) -> str:
+        return os.path.relpath(os.path.abspath(reported_path), self.project_root).replace(os.sep, '/')
+
+    def _reported(self, fmt: ReportFormat, rel_path: str) -> str:
+        path = os.path.join(self.project_path, rel_path)
+        return os.path.abspath(path) if fmt.absolute_paths else path
+
+    def finish(self, runs: List[Dict]) -> Dict:
+        """Store fresh per-file results, merge cached ones into the reports; returns hit stats."""
+        status = {run['scanner']: run['status'] for run in runs}
+        stats = {}
+        for scanner, pending in self.pending.items():
+            fmt = REPORT_FORMATS[scanner]
+            report = self.output_dir / CACHEABLE_SCANNERS[scanner]['report']
+            ran = scanner in status
+            if ran and status[scanner] != 'completed':
+                continue  # partial or missing report: neither trust nor extend it
+
+            if ran:
+                fresh = {path: [] for path in pending['scanned']}
+                for finding in fmt.iter_findings(report):
+                    path = self._relative(finding.get(fmt.path_field) or '')
+                    if path in fresh:
+                        fresh[path].append(finding)
+                self.cache.put_many({pending['keys'][path]: findings
+                                     for path, findings in fresh.items() if path in pending['keys']})
+
+            cached = []
+            for path, findings in pending['hits'].items():
+                for finding in findings:
+                    cached.append(dict(finding, **{fmt.path_field: self._reported(fmt, path)}))
+            if cached or not ran:  # every file was a hit: the report holds cached findings only
+                fmt.merge(report, cached, replace=not ran)
+
+            hits = len(pending['hits'])
+            stats[scanner] = {
+                'files': pending['candidates'],
+                'hits': hits,
+                'misses': pending['candidates'] - hits,
+                'hit_rate': round(hits / pending['candidates'], 4) if pending['candidates'] else None,
+                'full_scan': pending['full_scan'],
+            }
+        return stats
+
+
+def main() -> int:
+    """Print size and entry count of a findings cache."""
+    db_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(CACHE_DIR_NAME, CACHE_FILE_NAME)
+    if not os.path.isfile(db_path):
+        print(f"❌ No findings cache at {db_path}", file=sys.stderr)
+        return 1
+    cache = FindingsCache(Path(db_path))
+    print(json.dumps(cache.stats(), indent=2))
+    cache.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
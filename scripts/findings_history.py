@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Findings History - Append-only store of scan results with trend rollups
+
+Purpose: Record every run of the results pipeline (overall-summary.json,
+         the per-scanner summaries and scanner-runs.json) in a local SQLite
+         file whose run tables refuse UPDATE and DELETE. Daily and weekly
+         rollups are upserted in the same transaction as each run, so the
+         dashboard exporter reads a fixed number of rows (latest run, two
+         weeks, the trend window) and regenerates docs/data.json in constant
+         time however much history has accumulated.
+Usage: python findings_history.py record|export|rebuild-rollups [options]
+Example: python findings_history.py record --results-dir ./sast-results && python findings_history.py export
+"""
+
+import argparse
+import calendar
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from detection_cache import CACHE_DIR_NAME
+from sast_config import DEFAULT_CONFIG_FILE, get_setting, load_ci_config
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ('critical', 'high', 'medium', 'low')
+DEFAULT_HISTORY_DB = os.path.join(CACHE_DIR_NAME, 'history.sqlite')
+DEFAULT_DATA_FILE = 'docs/data.json'
+DEFAULT_TREND_DAYS = 30
+RECENT_RUNS = 4
+PERIOD_DAY = 'day'
+PERIOD_WEEK = 'week'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    run_key TEXT NOT NULL UNIQUE,
+    timestamp INTEGER NOT NULL,
+    scan_type TEXT, status TEXT, repository TEXT, branch TEXT, commit_sha TEXT,
+    critical INTEGER NOT NULL, high INTEGER NOT NULL, medium INTEGER NOT NULL, low INTEGER NOT NULL,
+    total INTEGER NOT NULL, raw_total INTEGER, wall_seconds REAL
+);
+CREATE INDEX IF NOT EXISTS runs_by_time ON runs (timestamp, id);
+CREATE TABLE IF NOT EXISTS scanner_runs (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    scanner TEXT NOT NULL,
+    status TEXT,
+    critical INTEGER NOT NULL, high INTEGER NOT NULL, medium INTEGER NOT NULL, low INTEGER NOT NULL,
+    total INTEGER NOT NULL, wall_seconds REAL,
+    PRIMARY KEY (run_id, scanner)
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    period TEXT NOT NULL, bucket TEXT NOT NULL,
+    runs INTEGER NOT NULL, failed_runs INTEGER NOT NULL,
+    last_timestamp INTEGER NOT NULL,
+    critical INTEGER NOT NULL, high INTEGER NOT NULL, medium INTEGER NOT NULL, low INTEGER NOT NULL,
+    max_total INTEGER NOT NULL, wall_seconds REAL NOT NULL,
+    PRIMARY KEY (period, bucket)
+);
+CREATE TABLE IF NOT EXISTS scanner_rollups (
+    period TEXT NOT NULL, bucket TEXT NOT NULL, scanner TEXT NOT NULL,
+    runs INTEGER NOT NULL, last_timestamp INTEGER NOT NULL, total INTEGER NOT NULL,
+    wall_seconds REAL NOT NULL, max_wall_seconds REAL NOT NULL,
+    PRIMARY KEY (period, bucket, scanner)
+);
+CREATE TRIGGER IF NOT EXISTS runs_append_only_update BEFORE UPDATE ON runs
+    BEGIN SELECT RAISE(ABORT, 'runs is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS runs_append_only_delete BEFORE DELETE ON runs
+    BEGIN SELECT RAISE(ABORT, 'runs is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS scanner_runs_append_only_update BEFORE UPDATE ON scanner_runs
+    BEGIN SELECT RAISE(ABORT, 'scanner_runs is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS scanner_runs_append_only_delete BEFORE DELETE ON scanner_runs
+    BEGIN SELECT RAISE(ABORT, 'scanner_runs is append-only'); END;
+"""
+
+# Counts are "as of the latest run in the bucket"; runs recorded out of order
+# only replace them when they are newer
+ROLLUP_UPSERT = """
+INSERT INTO rollups VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (period, bucket) DO UPDATE SET
+    runs = runs + 1,
+    failed_runs = failed_runs + excluded.failed_runs,
+    critical = CASE WHEN excluded.last_timestamp >= last_timestamp THEN excluded.critical ELSE critical END,
+    high = CASE WHEN excluded.last_timestamp >= last_timestamp THEN excluded.high ELSE high END,
+    medium = CASE WHEN excluded.last_timestamp >= last_timestamp THEN excluded.medium ELSE medium END,
+    low = CASE WHEN excluded.last_timestamp >= last_timestamp THEN excluded.low ELSE low END,
+    last_timestamp = MAX(last_timestamp, excluded.last_timestamp),
+    max_total = MAX(max_total, excluded.max_total),
+    wall_seconds = wall_seconds + excluded.wall_seconds
+"""
+
+SCANNER_ROLLUP_UPSERT = """
+INSERT INTO scanner_rollups VALUES (?, ?, ?, 1, ?, ?, ?, ?)
+ON CONFLICT (period, bucket, scanner) DO UPDATE SET
+    runs = runs + 1,
+    total = CASE WHEN excluded.last_timestamp >= last_timestamp THEN excluded.total ELSE total END,
+    last_timestamp = MAX(last_timestamp, excluded.last_timestamp),
+    wall_seconds = wall_seconds + excluded.wall_seconds,
+    max_wall_seconds = MAX(max_wall_seconds, excluded.max_wall_seconds)
+"""
+
+
+def day_bucket(timestamp: int) -> str:
+    return time.strftime('%Y-%m-%d', time.gmtime(timestamp))
+
+
+def week_bucket(timestamp: int) -> str:
+    """ISO week, e.g. '2025-W07'; sorts chronologically as text."""
+    return time.strftime('%G-W%V', time.gmtime(timestamp))
+
+
+def parse_timestamp(value: Optional[str]) -> int:
+    try:
+        return calendar.timegm(time.strptime(value, '%Y-%m-%dT%H:%M:%SZ'))
+    except (TypeError, ValueError):
+        return int(time.time())
+
+
+def format_timestamp(timestamp: int) -> str:
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp))
+
+
+def format_runtime(seconds: Optional[float]) -> Optional[str]:
+    """'45s' / '2m 34s', the format docs/data.json uses."""
+    if seconds is None:
+        return None
+    minutes, secs = divmod(int(round(seconds)), 60)
+    return f'{minutes}m {secs}s' if minutes else f'{secs}s'
+
+
+def _read_json(path: Path) -> Optional[Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+class FindingsHistory:
+    """SQLite history of pipeline runs with incrementally maintained rollups."""
+
+    def __init__(self, path: str = DEFAULT_HISTORY_DB):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def record_run(self, run: Dict, scanners: List[Dict]) -> bool:
+        """Append one run (and its scanners) and fold it into the rollups.
+
+        ``run`` has timestamp (epoch seconds), the severity counts and
+        optional metadata; a run whose key was already recorded is ignored.
+        Returns whether the run was new.
+        """
+        run_key = run.get('run_key') or '|'.join(str(run.get(field) or '') for field in
+                                                 ('timestamp', 'repository', 'branch', 'commit_sha'))
+        counts = [int(run.get(severity) or 0) for severity in SEVERITIES]
+        total = sum(counts)
+        with self._conn:
+            cursor = self._conn.execute(
+                'INSERT OR IGNORE INTO runs (run_key, timestamp, scan_type, status, repository, branch, '
+                'commit_sha, critical, high, medium, low, total, raw_total, wall_seconds) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (run_key, run['timestamp'], run.get('scan_type'), run.get('status'), run.get('repository'),
+                 run.get('branch'), run.get('commit_sha'), *counts, total, run.get('raw_total'),
+                 run.get('wall_seconds')))
+            if cursor.rowcount == 0:
+                return False
+            run_id = cursor.lastrowid
+            for scanner in scanners:
+                self._conn.execute(
+                    'INSERT INTO scanner_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (run_id, scanner['scanner'], scanner.get('status'),
+                     *[int(scanner.get(severity) or 0) for severity in SEVERITIES],
+                     int(scanner.get('total') or 0), scanner.get('wall_seconds')))
+            self._apply_rollups(run['timestamp'], run.get('status'), counts, total,
+                                run.get('wall_seconds'), scanners)
+        return True
+
+    def _apply_rollups(self, timestamp: int, status: Optional[str], counts: List[int], total: int,
+                       wall_seconds: Optional[float], scanners: List[Dict]):
+        failed = 0 if status in (None, 'success') else 1
+        for period, bucket in ((PERIOD_DAY, day_bucket(timestamp)), (PERIOD_WEEK, week_bucket(timestamp))):
+            self._conn.execute(ROLLUP_UPSERT, (period, bucket, failed, timestamp, *counts, total,
+                                               float(wall_seconds or 0)))
+            for scanner in scanners:
+                seconds = float(scanner.get('wall_seconds') or 0)
+                self._conn.execute(SCANNER_ROLLUP_UPSERT, (period, bucket, scanner['scanner'], timestamp,
+                                                           int(scanner.get('total') or 0), seconds, seconds))
+
+    def rebuild_rollups(self) -> int:
+        """Recompute every rollup from the run tables (after a schema change); returns runs replayed."""
+        replayed = 0
+        with self._conn:
+            self._conn.execute('DELETE FROM rollups')
+            self._conn.execute('DELETE FROM scanner_rollups')
+            runs = self._conn.execute('SELECT id, timestamp, status, critical, high, medium, low, total, '
+                                      'wall_seconds FROM runs ORDER BY id').fetchall()
+            for run_id, timestamp, status, critical, high, medium, low, total, wall_seconds in runs:
+                scanners = [dict(zip(('scanner', 'total', 'wall_seconds'), row)) for row in self._conn.execute(
+                    'SELECT scanner, total, wall_seconds FROM scanner_runs WHERE run_id = ?', (run_id,))]
+                self._apply_rollups(timestamp, status, [critical, high, medium, low], total, wall_seconds,
+                                    scanners)
+                replayed += 1
+        return replayed
+
+    def latest_run(self) -> Optional[Dict]:
+        row = self._conn.execute('SELECT id, timestamp, status, critical, high, medium, low, total '
+                                 'FROM runs ORDER BY timestamp DESC, id DESC LIMIT 1').fetchone()
+        if row is None:
+            return None
+        return dict(zip(('id', 'timestamp', 'status') + SEVERITIES + ('total',), row))
+
+    def recent_runs(self, limit: int = RECENT_RUNS) -> List[Dict]:
+        rows = self._conn.execute('SELECT timestamp, status, critical, high, total FROM runs '
+                                  'ORDER BY timestamp DESC, id DESC LIMIT ?', (limit,))
+        return [dict(zip(('timestamp', 'status', 'critical', 'high', 'total'), row)) for row in rows]
+
+    def scanner_results(self, run_id: int) -> List[Dict]:
+        rows = self._conn.execute('SELECT scanner, status, total, wall_seconds FROM scanner_runs '
+                                  'WHERE run_id = ? ORDER BY scanner', (run_id,))
+        return [dict(zip(('scanner', 'status', 'total', 'wall_seconds'), row)) for row in rows]
+
+    def rollup(self, period: str, bucket: str) -> Optional[Dict]:
+        row = self._conn.execute('SELECT critical, high, medium, low FROM rollups WHERE period = ? AND bucket = ?',
+                                 (period, bucket)).fetchone()
+        return dict(zip(SEVERITIES, row)) if row else None
+
+    def previous_rollup(self, period: str, before_bucket: str) -> Optional[Dict]:
+        row = self._conn.execute('SELECT critical, high, medium, low FROM rollups WHERE period = ? '
+                                 'AND bucket < ? ORDER BY bucket DESC LIMIT 1', (period, before_bucket)).fetchone()
+        return dict(zip(SEVERITIES, row)) if row else None
+
+    def daily_series(self, first_day: str) -> Dict[str, Dict]:
+        rows = self._conn.execute('SELECT bucket, critical, high, medium, low FROM rollups '
+                                  'WHERE period = ? AND bucket >= ? ORDER BY bucket', (PERIOD_DAY, first_day))
+        return {row[0]: dict(zip(SEVERITIES, row[1:])) for row in rows}
+
+
+def load_run(results_dir: Path) -> Optional[Dict]:
+    """The run and per-scanner rows described by the files in ``results_dir``."""
+    overall = _read_json(results_dir / 'overall-summary.json')
+    if overall is None:
+        return None
+    runs = _read_json(results_dir / 'scanner-runs.json') or {}
+    totals = overall.get('total_vulnerabilities') or {}
+    run = {
+        'timestamp': parse_timestamp(overall.get('timestamp')),
+        'scan_type': overall.get('scan_type'),
+        'status': overall.get('status'),
+        'repository': os.environ.get('GITHUB_REPOSITORY') or os.environ.get('BITBUCKET_REPO_FULL_NAME'),
+        'branch': os.environ.get('GITHUB_REF_NAME') or os.environ.get('BITBUCKET_BRANCH'),
+        'commit_sha': os.environ.get('GITHUB_SHA') or os.environ.get('BITBUCKET_COMMIT'),
+        'raw_total': overall.get('raw_total_findings'),
+        'wall_seconds': runs.get('wall_seconds'),
+    }
+    pipeline_run = os.environ.get('GITHUB_RUN_ID') or os.environ.get('BITBUCKET_BUILD_NUMBER')
+    if pipeline_run:
+        # One row per pipeline run however often its results are recorded
+        run['run_key'] = '|'.join((run['repository'] or '', run['branch'] or '', run['commit_sha'] or '',
+                                   pipeline_run, os.environ.get('GITHUB_RUN_ATTEMPT') or '1'))
+    run.update({severity: int(totals.get(severity) or 0) for severity in SEVERITIES})
+
+    runtimes = {item.get('scanner'): item for item in runs.get('scanners') or ()}
+    scanners = []
+    for name in overall.get('scanners_run') or ():
+        summary = _read_json(results_dir / f'{name}-summary.json') or {}
+        counts = summary.get('vulnerabilities') or {}
+        runtime = runtimes.get(name) or {}
+        scanner = {'scanner': name, 'status': runtime.get('status') or summary.get('status'),
+                   'total': int(summary.get('total_findings') or 0), 'wall_seconds': runtime.get('wall_seconds')}
+        scanner.update({severity: int(counts.get(severity) or 0) for severity in SEVERITIES})
+        scanners.append(scanner)
+    return {'run': run, 'scanners': scanners}
+
+
+def export_dashboard_data(history: FindingsHistory, existing: Optional[Dict] = None,
+                          trend_days: int = DEFAULT_TREND_DAYS, now: Optional[int] = None) -> Optional[Dict]:
+    """Build docs/data.json from the latest run and the rollups.
+
+    Fields the history does not know (compliance, repository, scanner
+    coverage) are carried over from ``existing``.
+    """
+    latest = history.latest_run()
+    if latest is None:
+        return None
+    existing = existing or {}
+    now = now or int(time.time())
+    zero = dict.fromkeys(SEVERITIES, 0)
+
+    this_week_bucket = week_bucket(now)
+    this_week = history.rollup(PERIOD_WEEK, this_week_bucket) or zero
+    last_week = history.previous_rollup(PERIOD_WEEK, this_week_bucket) or zero
+
+    days = [day_bucket(now - offset * 86400) for offset in range(trend_days - 1, -1, -1)]
+    series = history.daily_series(days[0])
+    daily = {'labels': days}
+    for severity in SEVERITIES:
+        daily[severity] = [series[day][severity] if day in series else None for day in days]
+
+    # Scanners that did not take part in the latest run keep their last entry
+    scanners = {name: dict(entry) for name, entry in (existing.get('scanners') or {}).items()}
+    for scanner in history.scanner_results(latest['id']):
+        entry = scanners.setdefault(scanner['scanner'], {})
+        entry.update({
+            'status': 'active' if scanner['status'] in (None, 'completed') else scanner['status'],
+            'issues': scanner['total'],
+            'runtime': format_runtime(scanner['wall_seconds']) or entry.get('runtime'),
+            'lastRun': format_timestamp(latest['timestamp']),
+        })
+
+    activity = []
+    for run in history.recent_runs():
+        succeeded = run['status'] in (None, 'success')
+        activity.append({
+            'type': 'scan_completed' if succeeded else 'scan_failed',
+            'message': (f"SAST scan completed: {run['total']} findings "
+                        f"({run['critical']} critical, {run['high']} high)") if succeeded
+                       else f"SAST scan failed thresholds: {run['critical']} critical, {run['high']} high",
+            'timestamp': format_timestamp(run['timestamp']),
+            'icon': '🔍' if succeeded else '⚠️',
+        })
+
+    data = dict(existing)
+    data.update({
+        'lastUpdated': format_timestamp(latest['timestamp']),
+        'vulnerabilities': dict({severity: latest[severity] for severity in SEVERITIES}, total=latest['total']),
+        'trends': {
+            'thisWeek': this_week,
+            'lastWeek': last_week,
+            'change': {severity: this_week[severity] - last_week[severity] for severity in SEVERITIES},
+            'daily': daily,
+        },
+        'scanners': scanners,
+        'recentActivity': activity,
+    })
+    return data
+
+
+def _write_json_atomically(path: str, data: Dict):
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temporary = target.with_name(target.name + '.tmp')
+    with open(temporary, 'w', encoding='utf-8') as handle:
+        json.dump(data, handle, indent=2, ensure_ascii=False)
+        handle.write('\n')
+    os.replace(temporary, target)
+
+
+def record_results(results_dir: Path, db_path: str = DEFAULT_HISTORY_DB) -> bool:
+    """Append the run in ``results_dir`` to the history; used by process_results.py."""
+    loaded = load_run(results_dir)
+    if loaded is None:
+        logger.warning(f"⚠️  No overall summary in {results_dir}, nothing recorded")
+        return False
+    history = FindingsHistory(db_path)
+    try:
+        added = history.record_run(loaded['run'], loaded['scanners'])
+    finally:
+        history.close()
+    if added:
+        logger.info(f"🗃️  Recorded run of {format_timestamp(loaded['run']['timestamp'])} in {db_path}")
+    else:
+        logger.info(f"🗃️  Run of {format_timestamp(loaded['run']['timestamp'])} already in {db_path}")
+    return added
+
+
+def main() -> int:
+    """Main entry point with proper error handling."""
+    parser = argparse.ArgumentParser(
+        description='🗃️  Record SAST runs and export dashboard trends',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+    python findings_history.py record                         # Append ./sast-results to the history
+    python findings_history.py export --output docs/data.json # Regenerate the dashboard data
+    python findings_history.py rebuild-rollups                # Recompute rollups from all runs
+        """
+    )
+    parser.add_argument('command', choices=('record', 'export', 'rebuild-rollups'))
+    parser.add_argument('--db', help=f'History database (default: reporting.history.database or '
+                                     f'{DEFAULT_HISTORY_DB})')
+    parser.add_argument('--results-dir', default='./sast-results',
+                        help='Results to record (default: ./sast-results)')
+    parser.add_argument('--output', default=DEFAULT_DATA_FILE,
+                        help=f'Dashboard data file to regenerate (default: {DEFAULT_DATA_FILE})')
+    parser.add_argument('--config', default=DEFAULT_CONFIG_FILE,
+                        help=f'Pipeline configuration file (default: {DEFAULT_CONFIG_FILE})')
+    args = parser.parse_args()
+
+    try:
+        config = load_ci_config(args.config)
+        db_path = args.db or get_setting(config, 'reporting.history.database', DEFAULT_HISTORY_DB)
+        if args.command == 'record':
+            record_results(Path(args.results_dir), db_path)
+            return 0
+
+        history = FindingsHistory(db_path)
+        try:
+            if args.command == 'rebuild-rollups':
+                logger.info(f"✅ Rebuilt rollups from {history.rebuild_rollups()} runs")
+                return 0
+            existing = _read_json(Path(args.output))
+            trend_days = int(get_setting(config, 'reporting.dashboard.trend_period_days', DEFAULT_TREND_DAYS))
+            data = export_dashboard_data(history, existing, trend_days)
+        finally:
+            history.close()
+        if data is None:
+            logger.warning(f"⚠️  No runs recorded in {db_path}, {args.output} left unchanged")
+            return 0
+        _write_json_atomically(args.output, data)
+        logger.info(f"✅ Dashboard data written to {args.output}")
+        return 0
+    except KeyboardInterrupt:
+        logger.error("Operation cancelled by user")
+        return 130
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Findings Store - Compact columnar findings shared by the post-scan stages
+
+Purpose: Hold the findings of CodeQL SARIF, Semgrep, Bandit and ESLint
+         reports in one representation that stays small for reports with
+         millions of results: scanner, severity, line, path, rule, family
+         and snippet hash are array-backed columns, and the strings are
+         interned into per-table string tables, so a finding costs 22 bytes
+         instead of a dict tree. process_results.py writes one
+         <scanner>-findings.cols file per scanner; later stages memory-map
+         them and count per severity, file or rule in one pass over a
+         column, or read the finding identities for cross-scanner
+         deduplication (finding_dedup.py), instead of re-parsing the
+         scanner JSON.
+Usage: from findings_store import FindingsTable, open_results
+Example: python findings_store.py sast-results --by rule --top 10
+"""
+
+import argparse
+import json
+import logging
+import mmap
+import struct
+import sys
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+COLUMNS_SUFFIX = '-findings.cols'
+FORMAT_MAGIC = b'SASTCOL1'
+FORMAT_VERSION = 2
+
+# Severity column codes; 0 is a finding the scanner gave no known severity
+SEVERITIES = ('critical', 'high', 'medium', 'low')
+SEVERITY_CODES = {severity: code for code, severity in enumerate(SEVERITIES, 1)}
+
+# Column name -> array typecode; string columns hold indexes into a string table
+COLUMN_TYPES = {
+    'scanner': 'B',
+    'severity': 'B',
+    'line': 'I',
+    'path': 'I',
+    'rule': 'I',
+    'family': 'I',
+    'snippet': 'I',
+}
+STRING_COLUMNS = ('scanner', 'path', 'rule', 'family', 'snippet')
+
+# File layout: header, the columns in COLUMN_TYPES order (little-endian, each
+# 8-byte aligned), then the string tables as JSON
+_HEADER = struct.Struct('<8sIIQQ')  # magic, format version, reserved, rows, string tables offset
+_ALIGNMENT = 8
+_NATIVE_LITTLE = sys.byteorder == 'little'
+_ITEMSIZE = {name: array(typecode).itemsize for name, typecode in COLUMN_TYPES.items()}
+
+
+class Finding:
+    """One finding, materialized from a table row on demand."""
+
+    __slots__ = ('scanner', 'severity', 'path', 'line', 'rule', 'family', 'snippet')
+
+    def __init__(self, scanner: str, severity: Optional[str], path: str, line: int, rule: str, family: str,
+                 snippet: str = ''):
+        self.scanner = scanner
+        self.severity = severity
+        self.path = path
+        self.line = line
+        self.rule = rule
+        self.family = family
+        self.snippet = snippet
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"Finding({self.scanner}, {self.severity}, {self.path}:{self.line}, {self.rule})"
+
+
+class StringTable:
+    """Interned strings addressed by their insertion index."""
+
+    __slots__ = ('values', '_index')
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: List[str] = []
+        self._index: Dict[str, int] = {}
+        for value in values:
+            self.add(value)
+
+    def add(self, value: str) -> int:
+        index = self._index.get(value)
+        if index is None:
+            index = self._index[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        return index
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class _Aggregations:
+    """Counts over the columns of a table; shared by the in-memory and mapped forms.
+
+    Subclasses provide ``_columns`` (name -> array or memoryview) and
+    ``_strings`` (name -> list of strings).
+    """
+
+    _columns: Dict
+    _strings: Dict[str, List[str]]
+
+    def __len__(self) -> int:
+        return len(self._columns['severity'])
+
+    def __getitem__(self, row: int) -> Finding:
+        columns, strings = self._columns, self._strings
+        severity = columns['severity'][row]
+        return Finding(strings['scanner'][columns['scanner'][row]],
+                       SEVERITIES[severity - 1] if severity else None,
+                       strings['path'][columns['path'][row]],
+                       columns['line'][row],
+                       strings['rule'][columns['rule'][row]],
+                       strings['family'][columns['family'][row]],
+                       strings['snippet'][columns['snippet'][row]])
+
+    def __iter__(self) -> Iterator[Finding]:
+        for row in range(len(self)):
+            yield self[row]
+
+    def identities(self) -> Iterator[Tuple[Optional[str], str, int, str, str]]:
+        """(severity, path, line, family, snippet hash) of every row, as Deduplicator.add() takes them."""
+        columns, strings = self._columns, self._strings
+        severities = (None,) + SEVERITIES
+        paths, families, snippets = strings['path'], strings['family'], strings['snippet']
+        for severity, path, line, family, snippet in zip(columns['severity'], columns['path'], columns['line'],
+                                                         columns['family'], columns['snippet']):
+            yield severities[severity], paths[path], line, families[family], snippets[snippet]
+
+    def severity_counts(self) -> Dict[str, int]:
+        """Findings per severity bucket (unknown severities are not counted)."""
+        data = bytes(self._columns['severity'])
+        return {severity: data.count(code.to_bytes(1, 'little')) for severity, code in SEVERITY_CODES.items()}
+
+    def counts_by(self, column: str) -> Dict[str, int]:
+        """Findings per distinct value of a string column, most frequent first."""
+        if column not in STRING_COLUMNS:
+            raise ValueError(f"Cannot group by '{column}' (choose from {', '.join(STRING_COLUMNS)})")
+        values = self._strings[column]
+        return {values[index]: count for index, count in Counter(self._columns[column]).most_common()}
+
+    def severity_counts_by(self, column: str) -> Dict[str, Dict[str, int]]:
+        """Per-severity bucket counts for every distinct value of a string column."""
+        if column not in STRING_COLUMNS:
+            raise ValueError(f"Cannot group by '{column}' (choose from {', '.join(STRING_COLUMNS)})")
+        values = self._strings[column]
+        result: Dict[str, Dict[str, int]] = {}
+        for (index, code), count in Counter(zip(self._columns[column], self._columns['severity'])).items():
+            if code:
+                counts = result.setdefault(values[index], dict.fromkeys(SEVERITIES, 0))
+                counts[SEVERITIES[code - 1]] += count
+        return result
+
+
+class FindingsTable(_Aggregations):
+    """Append-only in-memory findings table."""
+
+    def __init__(self):
+        self._tables = {name: StringTable() for name in STRING_COLUMNS}
+        self._strings = {name: table.values for name, table in self._tables.items()}
+        self._columns = {name: array(typecode) for name, typecode in COLUMN_TYPES.items()}
+        # append() runs once per finding: bind the per-column methods up front
+        self._appenders = tuple(self._columns[name].append for name in COLUMN_TYPES)
+        self._interners = tuple(self._tables[name].add for name in STRING_COLUMNS)
+
+    def append(self, scanner: str, severity: Optional[str], path: str, line: int, rule: Optional[str],
+               family: str, snippet: str = ''):
+        add_scanner, add_severity, add_line, add_path, add_rule, add_family, add_snippet = self._appenders
+        intern_scanner, intern_path, intern_rule, intern_family, intern_snippet = self._interners
+        add_scanner(intern_scanner(scanner))
+        add_severity(SEVERITY_CODES.get(severity, 0))
+        add_line(line if line and line > 0 else 0)
+        add_path(intern_path(path))
+        add_rule(intern_rule(rule or ''))
+        add_family(intern_family(family))
+        add_snippet(intern_snippet(snippet))
+
+    def write(self, path: Path):
+        """Write the table in the mappable layout read by ColumnarFindings."""
+        rows = len(self)
+        offsets = _column_offsets(rows)
+        strings = json.dumps({name: table.values for name, table in self._tables.items()},
+                             separators=(',', ':')).encode('utf-8')
+        temporary = path.with_name(path.name + '.tmp')
+        with open(temporary, 'wb') as handle:
+            handle.write(_HEADER.pack(FORMAT_MAGIC, FORMAT_VERSION, 0, rows, offsets['strings']))
+            for name in COLUMN_TYPES:
+                handle.write(b'\0' * (offsets[name] - handle.tell()))
+                column = self._columns[name]
+                if not _NATIVE_LITTLE and column.itemsize > 1:
+                    column = array(column.typecode, column)
+                    column.byteswap()
+                column.tofile(handle)
+            handle.write(b'\0' * (offsets['strings'] - handle.tell()))
+            handle.write(strings)
+        temporary.replace(path)
+
+
+class ColumnarFindings(_Aggregations):
+    """Read-only view of a <scanner>-findings.cols file through mmap.
+
+    Only the header and string tables are parsed; the columns are read in
+    place, so opening a file with millions of findings costs next to nothing.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) \
+                if self.path.stat().st_size else None
+        try:
+            if self._map is None or len(self._map) < _HEADER.size:
+                raise ValueError(f"{self.path} is not a findings column file")
+            magic, version, _, rows, strings_offset = _HEADER.unpack_from(self._map)
+            if magic != FORMAT_MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"{self.path} is not a version {FORMAT_VERSION} findings column file")
+            offsets = _column_offsets(rows)
+            if strings_offset != offsets['strings'] or strings_offset > len(self._map):
+                raise ValueError(f"{self.path} is truncated")
+            self._strings = json.loads(self._map[strings_offset:])
+            self._view = memoryview(self._map)
+            self._columns = {}
+            for name, typecode in COLUMN_TYPES.items():
+                column = self._view[offsets[name]:offsets[name] + rows * _ITEMSIZE[name]].cast(typecode)
+                if not _NATIVE_LITTLE and _ITEMSIZE[name] > 1:
+                    column = array(typecode, column)
+                    column.byteswap()
+                self._columns[name] = column
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        for column in getattr(self, '_columns', {}).values():
+            if isinstance(column, memoryview):
+                column.release()
+        self._columns = {}
+        if getattr(self, '_view', None) is not None:
+            self._view.release()
+            self._view = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FindingsSet:
+    """Several column files aggregated as one (e.g. every scanner of a run)."""
+
+    def __init__(self, parts: List[_Aggregations]):
+        self.parts = parts
+
+    def __len__(self) -> int:
+        return sum(len(part) for part in self.parts)
+
+    def __iter__(self) -> Iterator[Finding]:
+        for part in self.parts:
+            yield from part
+
+    def severity_counts(self) -> Dict[str, int]:
+        totals = dict.fromkeys(SEVERITIES, 0)
+        for part in self.parts:
+            for severity, count in part.severity_counts().items():
+                totals[severity] += count
+        return totals
+
+    def counts_by(self, column: str) -> Dict[str, int]:
+        totals: Counter = Counter()
+        for part in self.parts:
+            totals.update(part.counts_by(column))
+        return dict(totals.most_common())
+
+    def severity_counts_by(self, column: str) -> Dict[str, Dict[str, int]]:
+        totals: Dict[str, Dict[str, int]] = {}
+        for part in self.parts:
+            for value, counts in part.severity_counts_by(column).items():
+                merged = totals.setdefault(value, dict.fromkeys(SEVERITIES, 0))
+                for severity, count in counts.items():
+                    merged[severity] += count
+        return totals
+
+    def close(self):
+        for part in self.parts:
+            if isinstance(part, ColumnarFindings):
+                part.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def _column_offsets(rows: int) -> Dict[str, int]:
+    """Byte offset of every column, and of the string tables after them."""
+    offsets = {}
+    offset = _aligned(_HEADER.size)
+    for name in COLUMN_TYPES:
+        offsets[name] = offset
+        offset = _aligned(offset + rows * _ITEMSIZE[name])
+    offsets['strings'] = offset
+    return offsets
+
+
+def open_results(results_dir: Path, scanners: Optional[Iterable[str]] = None) -> FindingsSet:
+    """Map every <scanner>-findings.cols file of a results directory."""
+    wanted = set(scanners) if scanners is not None else None
+    parts = []
+    try:
+        for path in sorted(Path(results_dir).glob('*' + COLUMNS_SUFFIX)):
+            if wanted is None or path.name[:-len(COLUMNS_SUFFIX)] in wanted:
+                parts.append(ColumnarFindings(path))
+    except Exception:
+        FindingsSet(parts).close()
+        raise
+    return FindingsSet(parts)
+
+
+def main() -> int:
+    """Main entry point with proper error handling."""
+    parser = argparse.ArgumentParser(
+        description='🗃️ Aggregate the findings column files of a results directory',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+    python findings_store.py sast-results                  # Findings per severity
+    python findings_store.py sast-results --by path        # Per-file severity counts
+    python findings_store.py sast-results --by rule --top 10 --scanner semgrep
+        """
+    )
+    parser.add_argument('results_dir', nargs='?', default='./sast-results',
+                        help='Directory with <scanner>-findings.cols files (default: ./sast-results)')
+    parser.add_argument('--by', choices=STRING_COLUMNS,
+                        help='Group the severity counts by this column')
+    parser.add_argument('--scanner', action='append',
+                        help='Only include this scanner (repeatable)')
+    parser.add_argument('--top', type=int,
+                        help='With --by: only the N values with the most findings')
+    args = parser.parse_args()
+
+    try:
+        with open_results(Path(args.results_dir), args.scanner) as findings:
+            if not findings.parts:
+                logger.warning(f"⚠️  No *{COLUMNS_SUFFIX} files in {args.results_dir}")
+                return 1
+            result = {'total_findings': len(findings), 'vulnerabilities': findings.severity_counts()}
+            if args.by:
+                totals = findings.counts_by(args.by)
+                by_severity = findings.severity_counts_by(args.by)
+                values = list(totals)[:args.top] if args.top else list(totals)
+                result[f'by_{args.by}'] = [
+                    {args.by: value, 'total': totals[value],
+                     'vulnerabilities': by_severity.get(value, dict.fromkeys(SEVERITIES, 0))}
+                    for value in values]
+            print(json.dumps(result, indent=2))
+        return 0
+    except KeyboardInterrupt:
+        logger.error("Operation cancelled by user")
+        return 130
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
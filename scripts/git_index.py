@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Git Index Reader - Tracked file listing straight from .git/index
+
+Purpose: Parse the binary git index (versions 2, 3 and 4) in pure Python so
+         tools can enumerate tracked files without spawning `git` or walking
+         the working tree.
+Usage: python git_index.py [repo_path]
+Example: python git_index.py /path/to/checkout | head
+"""
+
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+INDEX_SIGNATURE = b'DIRC'
+SUPPORTED_VERSIONS = (2, 3, 4)
+
+# File modes as stored in the index
+MODE_TYPE_MASK = 0o170000
+MODE_DIRECTORY = 0o040000   # sparse-index directory entry
+MODE_SYMLINK = 0o120000
+MODE_GITLINK = 0o160000     # submodule commit
+
+# ctime, mtime, dev, ino, mode, uid, gid, size
+_STAT_FIELDS = struct.Struct('>10I')
+_FLAGS = struct.Struct('>H')
+FLAG_EXTENDED = 0x4000
+FLAG_NAME_MASK = 0x0FFF
+
+
+class GitIndexError(ValueError):
+    """Raised when an index file is missing, truncated or in an unknown format."""
+
+
+def find_git_dir(path: str) -> Optional[Tuple[Path, Path]]:
+    """Locate the git directory for ``path``.
+
+    Returns (worktree root, git dir) or None when ``path`` is not inside a
+    git checkout. Worktrees and submodules whose ``.git`` is a file with a
+    ``gitdir:`` pointer are followed.
+    """
+    current = Path(path).resolve()
+    for candidate in (current, *current.parents):
+        dot_git = candidate / '.git'
+        if dot_git.is_dir():
+            return candidate, dot_git
+        if dot_git.is_file():
+            try:
+                content = dot_git.read_text(encoding='utf-8').strip()
+            except OSError:
+                return None
+            if content.startswith('gitdir:'):
+                git_dir = Path(content[len('gitdir:'):].strip())
+                if not git_dir.is_absolute():
+                    git_dir = (candidate / git_dir).resolve()
+                return candidate, git_dir
+            return None
+    return None
+
+
+def object_id_size(git_dir: Path) -> int:
+    """Return the object name length in bytes (20 for SHA-1, 32 for SHA-256)."""
+    try:
+        config = (git_dir / 'config').read_text(encoding='utf-8', errors='replace')
+    except OSError:
+        return 20
+    for line in config.splitlines():
+        key, _, value = line.partition('=')
+        if key.strip().lower() == 'objectformat' and value.strip().lower() == 'sha256':
+            return 32
+    return 20
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Decode git's offset varint (used by index v4 path compression)."""
+    byte = data[pos]
+    pos += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, pos
+
+
+def iter_index_entries(index_path: Path, oid_size: int = 20) -> Iterator[Tuple[str, int]]:
+    """Yield (path, mode) for every entry of a git index file.
+
+    Paths are repository-relative, '/'-separated and in index order (sorted
+    by bytes). Paths with several merge-conflict stages are reported once.
+    """
+    try:
+        with open(index_path, 'rb') as handle:
+            data = handle.read()
+    except OSError as e:
+        raise GitIndexError(f"Cannot read git index {index_path}: {e}") from e
+
+    if len(data) < 12 or data[:4] != INDEX_SIGNATURE:
+        raise GitIndexError(f"Not a git index file: {index_path}")
+    version, count = struct.unpack_from('>II', data, 4)
+    if version not in SUPPORTED_VERSIONS:
+        raise GitIndexError(f"Unsupported git index version {version}")
+
+    pos = 12
+    previous = b''
+    last_path = None
+    try:
+        for _ in range(count):
+            entry_start = pos
+            mode = _STAT_FIELDS.unpack_from(data, pos)[6]
+            pos += _STAT_FIELDS.size + oid_size
+            flags, = _FLAGS.unpack_from(data, pos)
+            pos += _FLAGS.size
+            if version >= 3 and flags & FLAG_EXTENDED:
+                pos += 2
+
+            if version == 4:
+                strip, pos = _read_varint(data, pos)
+                end = data.index(b'\0', pos)
+                name = previous[:len(previous) - strip] + data[pos:end]
+                pos = end + 1
+            else:
+                name_length = flags & FLAG_NAME_MASK
+                if name_length < FLAG_NAME_MASK:
+                    end = pos + name_length
+                else:
+                    end = data.index(b'\0', pos)
+                name = data[pos:end]
+                # Entries are NUL padded to a multiple of eight bytes
+                entry_length = (end - entry_start + 8) & ~7
+                pos = entry_start + entry_length
+            previous = name
+
+            if name == last_path:
+                continue
+            last_path = name
+            yield os.fsdecode(name), mode
+    except (IndexError, ValueError, struct.error) as e:
+        raise GitIndexError(f"Truncated or corrupt git index {index_path}") from e
+
+    if pos > len(data):
+        raise GitIndexError(f"Truncated git index {index_path}")
+
+
+def iter_tracked_files(repo_path: str) -> Iterator[str]:
+    """Yield tracked regular files and symlinks below ``repo_path``.
+
+    Paths are relative to ``repo_path`` itself, which may be a subdirectory
+    of the checkout. Raises GitIndexError if there is no usable index.
+    """
+    located = find_git_dir(repo_path)
+    if located is None:
+        raise GitIndexError(f"Not a git checkout: {repo_path}")
+    worktree, git_dir = located
+    index_path = git_dir / 'index'
+    if not index_path.is_file():
+        raise GitIndexError(f"No git index in {git_dir}")
+
+    prefix = Path(repo_path).resolve().relative_to(worktree).as_posix()
+    prefix = '' if prefix == '.' else prefix + '/'
+    for path, mode in iter_index_entries(index_path, object_id_size(git_dir)):
+        if mode & MODE_TYPE_MASK in (MODE_DIRECTORY, MODE_GITLINK):
+            continue
+        if prefix:
+            if not path.startswith(prefix):
+                continue
+            path = path[len(prefix):]
+        yield path
+
+
+def main() -> int:
+    """List tracked files of a checkout, one per line."""
+    repo_path = sys.argv[1] if len(sys.argv) > 1 else '.'
+    try:
+        for path in iter_tracked_files(repo_path):
+            print(path)
+    except GitIndexError as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
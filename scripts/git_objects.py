@@ -0,0 +1,578 @@
+#!/usr/bin/env python3
+"""
+Git Object Reader - Changed files between two commits from .git/objects
+
+Purpose: Resolve refs, read commits and trees from loose objects and
+         packfiles (including deltas) and diff two trees in pure Python, so
+         an incremental scan can find the files a change touches without
+         spawning `git`. Identical subtrees are skipped by object id, so the
+         cost follows the size of the change rather than of the repository.
+Usage: python git_objects.py <base_ref> [head_ref] [repo_path]
+Example: python git_objects.py origin/main HEAD .
+"""
+
+import heapq
+import mmap
+import os
+import struct
+import sys
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from git_index import MODE_GITLINK, MODE_TYPE_MASK, find_git_dir, object_id_size
+
+MODE_TREE = 0o040000
+
+PACK_INDEX_SIGNATURE = b'\377tOc'
+PACK_SIGNATURE = b'PACK'
+OBJECT_TYPES = {1: 'commit', 2: 'tree', 3: 'blob', 4: 'tag'}
+OFS_DELTA = 6
+REF_DELTA = 7
+
+# Deltified objects are rebuilt from their base; keep recent results around
+DELTA_CACHE_SIZE = 256
+
+_FANOUT = struct.Struct('>256I')
+_UINT32 = struct.Struct('>I')
+_UINT64 = struct.Struct('>Q')
+
+CHANGE_ADDED = 'A'
+CHANGE_MODIFIED = 'M'
+CHANGE_DELETED = 'D'
+
+
+class GitObjectError(ValueError):
+    """Raised when a ref cannot be resolved or an object is missing or corrupt."""
+
+
+class _Pack:
+    """One packfile with its version 2 index, memory-mapped."""
+
+    def __init__(self, index_path: Path, oid_size: int):
+        self.oid_size = oid_size
+        with open(index_path, 'rb') as handle:
+            self.index = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(index_path.with_suffix('.pack'), 'rb') as handle:
+            self.data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.index[:4] != PACK_INDEX_SIGNATURE or _UINT32.unpack_from(self.index, 4)[0] != 2:
+            raise GitObjectError(f"Unsupported pack index {index_path}")
+        if self.data[:4] != PACK_SIGNATURE:
+            raise GitObjectError(f"Not a packfile: {index_path.with_suffix('.pack')}")
+        self.fanout = _FANOUT.unpack_from(self.index, 8)
+        self.count = self.fanout[255]
+        self.names_at = 8 + _FANOUT.size
+        self.offsets_at = self.names_at + self.count * (oid_size + 4)
+        self.large_offsets_at = self.offsets_at + self.count * 4
+
+    def find(self, oid: bytes) -> Optional[int]:
+        """Pack offset of ``oid``, by binary search within its fan-out bucket."""
+        low = self.fanout[oid[0] - 1] if oid[0] else 0
+        high = self.fanout[oid[0]]
+        size = self.oid_size
+        while low < high:
+            middle = (low + high) // 2
+            start = self.names_at + middle * size
+            name = self.index[start:start + size]
+            if name < oid:
+                low = middle + 1
+            elif name > oid:
+                high = middle
+            else:
+                offset = _UINT32.unpack_from(self.index, self.offsets_at + middle * 4)[0]
+                if offset & 0x80000000:
+                    offset = _UINT64.unpack_from(self.index, self.large_offsets_at + (offset & 0x7FFFFFFF) * 8)[0]
+                return offset
+        return None
+
+    def find_prefix(self, prefix: bytes, odd_nibble: Optional[int]) -> List[bytes]:
+        """Object ids in this pack that start with ``prefix`` (plus a high nibble)."""
+        size = self.oid_size
+        low = self.fanout[prefix[0] - 1] if prefix[0] else 0
+        high = self.fanout[prefix[0]]
+        while low < high:  # first name >= prefix
+            middle = (low + high) // 2
+            start = self.names_at + middle * size
+            if self.index[start:start + size] < prefix:
+                low = middle + 1
+            else:
+                high = middle
+        matches = []
+        for position in range(low, self.count):
+            start = self.names_at + position * size
+            name = self.index[start:start + size]
+            if not name.startswith(prefix):
+                break
+            if odd_nibble is None or name[len(prefix)] >> 4 == odd_nibble:
+                matches.append(name)
+        return matches
+
+    def header(self, offset: int) -> Tuple[int, int, int]:
+        """Return (type number, inflated size, offset of the data after the header)."""
+        byte = self.data[offset]
+        offset += 1
+        type_num = (byte >> 4) & 0x7
+        size = byte & 0x0F
+        shift = 4
+        while byte & 0x80:
+            byte = self.data[offset]
+            offset += 1
+            size |= (byte & 0x7F) << shift
+            shift += 7
+        return type_num, size, offset
+
+    def inflate(self, offset: int, size: int) -> bytes:
+        decompressor = zlib.decompressobj()
+        chunks = []
+        produced = 0
+        step = max(4096, size + 64)
+        while not decompressor.eof:
+            chunk = self.data[offset:offset + step]
+            if not chunk:
+                raise GitObjectError("Truncated packfile")
+            offset += len(chunk)
+            data = decompressor.decompress(chunk)
+            produced += len(data)
+            chunks.append(data)
+        result = b''.join(chunks)
+        if produced != size:
+            raise GitObjectError("Corrupt pack entry: size mismatch")
+        return result
+
+
+def _delta_varint(delta: bytes, pos: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = delta[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    """Rebuild an object from its base and a git delta (copy/insert instructions)."""
+    source_size, pos = _delta_varint(delta, 0)
+    target_size, pos = _delta_varint(delta, pos)
+    if source_size != len(base):
+        raise GitObjectError("Delta base size mismatch")
+    out = bytearray()
+    end = len(delta)
+    while pos < end:
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            copy_offset = copy_size = 0
+            for bit in range(4):
+                if op & (1 << bit):
+                    copy_offset |= delta[pos] << (8 * bit)
+                    pos += 1
+            for bit in range(3):
+                if op & (0x10 << bit):
+                    copy_size |= delta[pos] << (8 * bit)
+                    pos += 1
+            out += base[copy_offset:copy_offset + (copy_size or 0x10000)]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise GitObjectError("Invalid delta instruction")
+    if len(out) != target_size:
+        raise GitObjectError("Delta result size mismatch")
+    return bytes(out)
+
+
+class GitObjectStore:
+    """Read-only access to the objects and refs of one repository."""
+
+    def __init__(self, git_dir: Path):
+        self.git_dir = git_dir
+        self.common_dir = self._common_dir(git_dir)
+        self.oid_size = object_id_size(self.common_dir)
+        self.object_dirs = self._object_dirs(self.common_dir / 'objects')
+        self.packs = self._load_packs()
+        self._cache: Dict[Tuple[int, int], Tuple[str, bytes]] = {}
+        self._packed_refs: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def for_path(cls, path: str) -> Tuple['GitObjectStore', Path]:
+        """Open the repository containing ``path``; returns (store, worktree root)."""
+        located = find_git_dir(path)
+        if located is None:
+            raise GitObjectError(f"Not a git checkout: {path}")
+        worktree, git_dir = located
+        return cls(git_dir), worktree
+
+    @staticmethod
+    def _common_dir(git_dir: Path) -> Path:
+        """Linked worktrees keep objects and shared refs in the main git dir."""
+        try:
+            common = (git_dir / 'commondir').read_text(encoding='utf-8').strip()
+        except OSError:
+            return git_dir
+        common_path = Path(common)
+        return common_path if common_path.is_absolute() else (git_dir / common_path).resolve()
+
+    @staticmethod
+    def _object_dirs(primary: Path) -> List[Path]:
+        dirs = [primary]
+        try:
+            alternates = (primary / 'info' / 'alternates').read_text(encoding='utf-8')
+        except OSError:
+            return dirs
+        for line in alternates.splitlines():
+            line = line.strip()
+            if line and not line.startswith('#'):
+                alternate = Path(line)
+                dirs.append(alternate if alternate.is_absolute() else (primary / alternate).resolve())
+        return dirs
+
+    def _load_packs(self) -> List[_Pack]:
+        packs = []
+        for object_dir in self.object_dirs:
+            pack_dir = object_dir / 'pack'
+            if not pack_dir.is_dir():
+                continue
+            for index_path in sorted(pack_dir.glob('*.idx')):
+                if index_path.with_suffix('.pack').is_file():
+                    packs.append(_Pack(index_path, self.oid_size))
+        return packs
+
+    # -- objects -----------------------------------------------------------
+
+    def read(self, hex_oid: str) -> Tuple[str, bytes]:
+        """Return (type, content) of an object. Raises GitObjectError if absent."""
+        for object_dir in self.object_dirs:
+            loose = object_dir / hex_oid[:2] / hex_oid[2:]
+            try:
+                raw = zlib.decompress(loose.read_bytes())
+            except FileNotFoundError:
+                continue
+            except (OSError, zlib.error) as e:
+                raise GitObjectError(f"Corrupt loose object {hex_oid}: {e}") from e
+            header, _, content = raw.partition(b'\0')
+            return header.split(b' ', 1)[0].decode('ascii'), content
+
+        oid = bytes.fromhex(hex_oid)
+        for pack_number, pack in enumerate(self.packs):
+            offset = pack.find(oid)
+            if offset is not None:
+                return self._read_packed(pack_number, offset)
+        raise GitObjectError(f"Object {hex_oid} not found (shallow clone?)")
+
+    def _read_packed(self, pack_number: int, offset: int) -> Tuple[str, bytes]:
+        cached = self._cache.get((pack_number, offset))
+        if cached is not None:
+            return cached
+        pack = self.packs[pack_number]
+        type_num, size, data_offset = pack.header(offset)
+        if type_num in OBJECT_TYPES:
+            result = OBJECT_TYPES[type_num], pack.inflate(data_offset, size)
+            if type_num != 3:  # blobs are never needed twice here
+                self._remember((pack_number, offset), result)
+            return result
+
+        if type_num == OFS_DELTA:
+            byte = pack.data[data_offset]
+            data_offset += 1
+            distance = byte & 0x7F
+            while byte & 0x80:
+                byte = pack.data[data_offset]
+                data_offset += 1
+                distance = ((distance + 1) << 7) | (byte & 0x7F)
+            base_type, base = self._read_packed(pack_number, offset - distance)
+        elif type_num == REF_DELTA:
+            base_oid = pack.data[data_offset:data_offset + self.oid_size]
+            data_offset += self.oid_size
+            base_type, base = self.read(base_oid.hex())
+        else:
+            raise GitObjectError(f"Unknown pack object type {type_num}")
+        result = base_type, apply_delta(base, pack.inflate(data_offset, size))
+        self._remember((pack_number, offset), result)
+        return result
+
+    def _remember(self, key: Tuple[int, int], value: Tuple[str, bytes]):
+        if len(self._cache) >= DELTA_CACHE_SIZE:
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[key] = value
+
+    def _read_typed(self, hex_oid: str, expected: str) -> bytes:
+        object_type, content = self.read(hex_oid)
+        while object_type == 'tag' and expected != 'tag':
+            target = content.split(b'\n', 1)[0]
+            if not target.startswith(b'object '):
+                raise GitObjectError(f"Malformed tag {hex_oid}")
+            hex_oid = target[len(b'object '):].decode('ascii')
+            object_type, content = self.read(hex_oid)
+        if object_type == 'commit' and expected == 'tree':
+            return self._read_typed(self.commit_tree(hex_oid), 'tree')
+        if object_type != expected:
+            raise GitObjectError(f"{hex_oid} is a {object_type}, expected a {expected}")
+        return content
+
+    def _commit_headers(self, hex_oid: str) -> Tuple[str, List[str], int]:
+        """Return (tree, parents, committer timestamp) of a commit."""
+        content = self._read_typed(hex_oid, 'commit')
+        tree = None
+        parents = []
+        timestamp = 0
+        for line in content.split(b'\n'):
+            if not line:
+                break
+            key, _, value = line.partition(b' ')
+            if key == b'tree':
+                tree = value.decode('ascii')
+            elif key == b'parent':
+                parents.append(value.decode('ascii'))
+            elif key == b'committer':
+                try:
+                    timestamp = int(value.rsplit(b' ', 2)[-2])
+                except (IndexError, ValueError):
+                    timestamp = 0
+        if tree is None:
+            raise GitObjectError(f"Commit {hex_oid} has no tree")
+        return tree, parents, timestamp
+
+    def commit_tree(self, hex_oid: str) -> str:
+        return self._commit_headers(hex_oid)[0]
+
+    def commit_parents(self, hex_oid: str) -> List[str]:
+        return self._commit_headers(hex_oid)[1]
+
+    def read_tree(self, hex_oid: str) -> Dict[str, Tuple[int, str]]:
+        """Return {name: (mode, object id)} for one tree object."""
+        content = self._read_typed(hex_oid, 'tree')
+        entries = {}
+        pos = 0
+        size = self.oid_size
+        while pos < len(content):
+            space = content.index(b' ', pos)
+            nul = content.index(b'\0', space)
+            mode = int(content[pos:space], 8)
+            name = content[space + 1:nul].decode('utf-8', 'surrogateescape')
+            entries[name] = (mode, content[nul + 1:nul + 1 + size].hex())
+            pos = nul + 1 + size
+        return entries
+
+    # -- refs --------------------------------------------------------------
+
+    def _read_packed_refs(self) -> Dict[str, str]:
+        if self._packed_refs is None:
+            self._packed_refs = {}
+            try:
+                lines = (self.common_dir / 'packed-refs').read_text(encoding='utf-8').splitlines()
+            except OSError:
+                lines = []
+            for line in lines:
+                if line and line[0] not in '#^':
+                    oid, _, name = line.partition(' ')
+                    self._packed_refs[name.strip()] = oid
+        return self._packed_refs
+
+    def _read_ref(self, name: str, depth: int = 0) -> Optional[str]:
+        if depth > 5:
+            raise GitObjectError(f"Symbolic ref loop at {name}")
+        for base in (self.git_dir, self.common_dir):
+            try:
+                value = (base / name).read_text(encoding='utf-8').strip()
+            except (OSError, UnicodeDecodeError):
+                continue
+            if value.startswith('ref:'):
+                return self._read_ref(value[len('ref:'):].strip(), depth + 1)
+            return value or None
+        return self._read_packed_refs().get(name)
+
+    @staticmethod
+    def _is_hex(name: str) -> bool:
+        return all(c in '0123456789abcdef' for c in name.lower())
+
+    def _expand_abbreviation(self, abbreviation: str) -> Optional[str]:
+        """Full id for an unambiguous abbreviated object id (at least 4 hex digits)."""
+        abbreviation = abbreviation.lower()
+        matches = set()
+        for object_dir in self.object_dirs:
+            fan_dir = object_dir / abbreviation[:2]
+            if fan_dir.is_dir():
+                rest = abbreviation[2:]
+                matches.update(abbreviation[:2] + name for name in os.listdir(fan_dir) if name.startswith(rest))
+        even = abbreviation[:len(abbreviation) // 2 * 2]
+        odd_nibble = int(abbreviation[-1], 16) if len(abbreviation) % 2 else None
+        for pack in self.packs:
+            matches.update(name.hex() for name in pack.find_prefix(bytes.fromhex(even), odd_nibble))
+        if len(matches) > 1:
+            raise GitObjectError(f"Ambiguous object id {abbreviation}")
+        return matches.pop() if matches else None
+
+    def resolve(self, revision: str) -> str:
+        """Resolve a ref name, full object id, or either with ~N / ^ suffixes to a commit id."""
+        suffix_at = min((i for i in (revision.find('~'), revision.find('^')) if i > 0), default=-1)
+        name, suffix = (revision, '') if suffix_at < 0 else (revision[:suffix_at], revision[suffix_at:])
+
+        if len(name) == self.oid_size * 2 and self._is_hex(name):
+            oid = name.lower()
+        else:
+            oid = None
+            for candidate in (name, f'refs/{name}', f'refs/tags/{name}', f'refs/heads/{name}',
+                              f'refs/remotes/{name}', f'refs/remotes/{name}/HEAD'):
+                oid = self._read_ref(candidate)
+                if oid:
+                    break
+            if not oid and len(name) >= 4 and self._is_hex(name):
+                oid = self._expand_abbreviation(name)
+            if not oid:
+                raise GitObjectError(f"Unknown revision: {revision}")
+
+        oid = self._peel_to_commit(oid)
+        pos = 0
+        while pos < len(suffix):
+            op = suffix[pos]
+            pos += 1
+            digits = ''
+            while pos < len(suffix) and suffix[pos].isdigit():
+                digits += suffix[pos]
+                pos += 1
+            count = int(digits) if digits else 1
+            if op == '~':
+                for _ in range(count):
+                    parents = self.commit_parents(oid)
+                    if not parents:
+                        raise GitObjectError(f"Revision {revision} goes past the root commit")
+                    oid = parents[0]
+            elif op == '^':
+                parents = self.commit_parents(oid)
+                if count == 0:
+                    continue
+                if count > len(parents):
+                    raise GitObjectError(f"Commit {oid} has no parent {count}")
+                oid = parents[count - 1]
+            else:
+                raise GitObjectError(f"Unsupported revision syntax: {revision}")
+        return oid
+
+    def _peel_to_commit(self, hex_oid: str) -> str:
+        object_type, content = self.read(hex_oid)
+        while object_type == 'tag':
+            hex_oid = content.split(b'\n', 1)[0][len(b'object '):].decode('ascii')
+            object_type, content = self.read(hex_oid)
+        if object_type != 'commit':
+            raise GitObjectError(f"{hex_oid} is a {object_type}, not a commit")
+        return hex_oid
+
+    # -- history -----------------------------------------------------------
+
+    def merge_base(self, first: str, second: str) -> Optional[str]:
+        """Most recent common ancestor of two commits, newest-first by committer date.
+
+        Commits whose parents are missing (shallow clones) are treated as
+        roots; None means no common ancestor is reachable.
+        """
+        if first == second:
+            return first
+        reached: Dict[str, int] = {first: 1, second: 2}
+        queue = [(-self._commit_headers(oid)[2], oid) for oid in (first, second)]
+        heapq.heapify(queue)
+        while queue:
+            _, oid = heapq.heappop(queue)
+            flags = reached[oid]
+            if flags == 3:
+                return oid
+            try:
+                parents = self.commit_parents(oid)
+            except GitObjectError:
+                continue
+            for parent in parents:
+                known = reached.get(parent, 0)
+                if known | flags == known:
+                    continue
+                try:
+                    timestamp = self._commit_headers(parent)[2]
+                except GitObjectError:
+                    continue
+                reached[parent] = known | flags
+                heapq.heappush(queue, (-timestamp, parent))
+        return None
+
+    def diff_trees(self, old_tree: Optional[str], new_tree: Optional[str],
+                   prefix: str = '') -> Iterator[Tuple[str, str]]:
+        """Yield (change, path) for files that differ between two trees.
+
+        Subtrees with equal ids are skipped without being read. A path that
+        changes between file and directory is reported as a delete plus adds;
+        submodule entries are ignored.
+        """
+        old = self.read_tree(old_tree) if old_tree else {}
+        new = self.read_tree(new_tree) if new_tree else {}
+        for name in sorted(old.keys() | new.keys()):
+            old_mode, old_oid = old.get(name, (0, None))
+            new_mode, new_oid = new.get(name, (0, None))
+            if old_oid == new_oid and old_mode == new_mode:
+                continue
+            path = prefix + name
+            old_is_tree = old_mode & MODE_TYPE_MASK == MODE_TREE
+            new_is_tree = new_mode & MODE_TYPE_MASK == MODE_TREE
+            if old_is_tree or new_is_tree:
+                yield from self.diff_trees(old_oid if old_is_tree else None,
+                                           new_oid if new_is_tree else None, path + '/')
+            old_is_file = old_oid is not None and not old_is_tree and old_mode & MODE_TYPE_MASK != MODE_GITLINK
+            new_is_file = new_oid is not None and not new_is_tree and new_mode & MODE_TYPE_MASK != MODE_GITLINK
+            if old_is_file and new_is_file:
+                yield CHANGE_MODIFIED, path
+            elif new_is_file:
+                yield CHANGE_ADDED, path
+            elif old_is_file:
+                yield CHANGE_DELETED, path
+
+
+def changed_files(repo_path: str, base_ref: str, head_ref: str = 'HEAD',
+                  merge_base: bool = True) -> List[Tuple[str, str]]:
+    """List (change, path) between ``base_ref`` and ``head_ref`` for files below ``repo_path``.
+
+    With ``merge_base`` (the default) the diff starts at the common
+    ancestor, like `git diff base...head`, so commits that landed on the
+    base branch after the fork are not counted. Paths are relative to
+    ``repo_path``. Raises GitObjectError when refs or objects are missing.
+    """
+    store, worktree = GitObjectStore.for_path(repo_path)
+    head = store.resolve(head_ref)
+    base = store.resolve(base_ref)
+    if merge_base:
+        common = store.merge_base(base, head)
+        if common is None:
+            raise GitObjectError(f"No common ancestor of {base_ref} and {head_ref} (shallow clone?)")
+        base = common
+
+    prefix = Path(repo_path).resolve().relative_to(worktree).as_posix()
+    prefix = '' if prefix == '.' else prefix + '/'
+    changes = []
+    for change, path in store.diff_trees(store.commit_tree(base), store.commit_tree(head)):
+        if prefix:
+            if not path.startswith(prefix):
+                continue
+            path = path[len(prefix):]
+        changes.append((change, path))
+    return changes
+
+
+def main() -> int:
+    """Print the files changed between two revisions, one per line with a status letter."""
+    if len(sys.argv) < 2:
+        print("Usage: python git_objects.py <base_ref> [head_ref] [repo_path]", file=sys.stderr)
+        return 1
+    base_ref = sys.argv[1]
+    head_ref = sys.argv[2] if len(sys.argv) > 2 else 'HEAD'
+    repo_path = sys.argv[3] if len(sys.argv) > 3 else '.'
+    try:
+        for change, path in changed_files(repo_path, base_ref, head_ref):
+            print(f"{change}\t{path}")
+    except GitObjectError as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
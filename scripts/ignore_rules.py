@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Ignore Rules - Compiled .gitignore and exclude_paths matching
+
+Purpose: Compile .gitignore files (nested, plus .git/info/exclude) and the
+         exclude_paths configured for the scanners in ci-config.yaml into
+         matchers, built once per directory and shared by its children, so
+         the language detector can prune excluded subtrees before descending
+         and skip excluded files when planning scanner file lists. Rule sets
+         without negations are folded into one regex / literal-name lookup.
+Usage: python ignore_rules.py <root> <relative paths...>
+Example: python ignore_rules.py . node_modules/x.js tests/test_api.py src/app.py
+"""
+
+import hashlib
+import os
+import re
+import sys
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sast_config import load_ci_config
+
+GITIGNORE = '.gitignore'
+INFO_EXCLUDE = os.path.join('.git', 'info', 'exclude')
+
+_GLOB_CHARS = frozenset('*?[\\')
+_UNKNOWN = object()
+
+
+class IgnoreRule(NamedTuple):
+    regex: re.Pattern
+    negated: bool
+    dir_only: bool
+    anchored: bool            # matched against the path relative to the rule file, not the name
+    literal: Optional[str]    # plain name without glob characters
+
+
+def _translate_bracket(pattern: str, start: int) -> Tuple[Optional[str], int]:
+    """Regex for the bracket expression at ``pattern[start]`` and the index of its ']'.
+
+    As in git: a ']' right after '[' or '[!' is a member, '\\' escapes the
+    next character, a reversed range only matches its first character and
+    no bracket matches '/'. Returns (None, start) if the bracket is not closed.
+    """
+    i, n = start + 1, len(pattern)
+    negated = i < n and pattern[i] in '!^'
+    if negated:
+        i += 1
+    members = []
+    slash = False
+    first = True
+    while i < n and (first or pattern[i] != ']'):
+        first = False
+        low = pattern[i]
+        if low == '\\' and i + 1 < n:
+            i += 1
+            low = pattern[i]
+        i += 1
+        if i + 1 < n and pattern[i] == '-' and pattern[i + 1] != ']':
+            high = pattern[i + 1]
+            i += 2
+            if high == '\\' and i < n:
+                high = pattern[i]
+                i += 1
+            if low <= high:
+                members.append(f'{re.escape(low)}-{re.escape(high)}')
+                slash = slash or low <= '/' <= high
+                continue
+            # git still matches the first character of a reversed range
+        members.append(re.escape(low))
+        slash = slash or low == '/'
+    if i >= n:
+        return None, start
+    if negated:
+        return '[^/' + ''.join(members) + ']', i
+    if not members:
+        return '(?!)', i
+    return ('(?!/)' if slash else '') + '[' + ''.join(members) + ']', i
+
+
+def _translate(pattern: str) -> str:
+    """Regex source for one gitignore glob ('*' and '?' stop at '/', '**' crosses directories)."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i) and (i == 0 or pattern[i - 1] == '/') \
+                    and (i + 2 == n or pattern[i + 2] == '/'):
+                if i + 2 == n:
+                    out.append('.*')
+                    i += 2
+                else:
+                    out.append('(?:.*/)?')
+                    i += 3
+                continue
+            while i + 1 < n and pattern[i + 1] == '*':
+                i += 1
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            bracket, end = _translate_bracket(pattern, i)
+            if bracket is None:
+                out.append(re.escape(c))
+            else:
+                out.append(bracket)
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+def parse_rule(line: str) -> Optional[IgnoreRule]:
+    """Compile one .gitignore line; None for blanks and comments."""
+    line = line.rstrip('\r\n')
+    stripped = line.rstrip(' ')
+    if stripped.endswith('\\') and len(stripped) < len(line):
+        stripped += ' '  # "foo\ " keeps its escaped trailing space
+    line = stripped
+    if not line or line.startswith('#'):
+        return None
+    negated = line.startswith('!')
+    if negated:
+        line = line[1:]
+    elif line.startswith(('\\!', '\\#')):
+        line = line[1:]
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+    anchored = '/' in line
+    line = line.lstrip('/')
+    literal = None if anchored or _GLOB_CHARS.intersection(line) else line
+    try:
+        regex = re.compile(_translate(line))
+    except re.error:
+        return None  # a pattern git cannot use either matches nothing
+    return IgnoreRule(regex, negated, dir_only, anchored, literal)
+
+
+def _combine(sources: List[str]) -> Optional[re.Pattern]:
+    if not sources:
+        return None
+    return re.compile('|'.join(f'(?:{source})' for source in sources))
+
+
+class IgnoreRules:
+    """The rules of one .gitignore (or exclude list), matched relative to its directory."""
+
+    def __init__(self, lines: Iterable[str]):
+        self.rules = [rule for rule in map(parse_rule, lines) if rule is not None]
+        self.has_negation = any(rule.negated for rule in self.rules)
+        if self.has_negation:
+            return  # order matters: evaluated rule by rule, last match wins
+        plain = [rule for rule in self.rules if not rule.dir_only]
+        dirs = [rule for rule in self.rules if rule.dir_only]
+        self._names = frozenset(rule.literal for rule in plain if rule.literal)
+        self._dir_names = frozenset(rule.literal for rule in dirs if rule.literal)
+        self._name_sources = [rule.regex.pattern for rule in plain if not rule.literal and not rule.anchored]
+        self._dir_name_sources = [rule.regex.pattern for rule in dirs if not rule.literal and not rule.anchored]
+        self._name_re = _combine(self._name_sources)
+        self._dir_name_re = _combine(self._dir_name_sources)
+        self._path_re = _combine([rule.regex.pattern for rule in plain if rule.anchored])
+        self._dir_path_re = _combine([rule.regex.pattern for rule in dirs if rule.anchored])
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def match(self, rel_path: str, name: str, is_dir: bool) -> Optional[bool]:
+        """True if ignored, False if re-included by a negation, None if no rule applies."""
+        if not self.has_negation:
+            if name in self._names or (self._name_re is not None and self._name_re.fullmatch(name)) \
+                    or (self._path_re is not None and self._path_re.fullmatch(rel_path)):
+                return True
+            if is_dir and (name in self._dir_names
+                           or (self._dir_name_re is not None and self._dir_name_re.fullmatch(name))
+                           or (self._dir_path_re is not None and self._dir_path_re.fullmatch(rel_path))):
+                return True
+            return None
+        for rule in reversed(self.rules):
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.regex.fullmatch(rel_path if rule.anchored else name):
+                return not rule.negated
+        return None
+
+
+def _merge(rule_sets: List[Tuple[int, IgnoreRules]]) -> Optional[Tuple]:
+    """Fold negation-free rule sets into (literal names, name regex, path checks) for files and for dirs."""
+    if any(rules.has_negation for _, rules in rule_sets):
+        return None
+    merged = []
+    for is_dir in (False, True):
+        names = set()
+        sources = []
+        path_checks = []
+        for offset, rules in rule_sets:
+            names |= rules._names
+            sources += rules._name_sources
+            path_res = (rules._path_re, rules._dir_path_re) if is_dir else (rules._path_re,)
+            if is_dir:
+                names |= rules._dir_names
+                sources += rules._dir_name_sources
+            path_checks += [(offset, path_re.fullmatch) for path_re in path_res if path_re is not None]
+        name_re = _combine(sources)
+        merged.append((frozenset(names), name_re.fullmatch if name_re is not None else None, tuple(path_checks)))
+    return tuple(merged)
+
+
+class DirectoryRules:
+    """Everything that decides which entries of one directory are ignored.
+
+    ``chain`` holds (offset of the rule file's directory in a root-relative
+    path, rules), deepest .gitignore first; ``signature`` changes whenever
+    any .gitignore on the way from the root does, so cached per-directory
+    results can be checked against it.
+    """
+
+    __slots__ = ('rel_dir', 'chain', 'signature', 'gitignore_stat', 'excludes', 'merged')
+
+    def __init__(self, rel_dir: str, chain: Tuple, signature: str, gitignore_stat: Optional[List[int]],
+                 excludes: Optional[IgnoreRules], merged: Optional[Tuple] = None):
+        self.rel_dir = rel_dir
+        self.chain = chain
+        self.signature = signature
+        self.gitignore_stat = gitignore_stat
+        self.excludes = excludes
+        self.merged = merged  # _merge() of excludes + chain, when no rule negates
+
+    def ignores(self, name: str, is_dir: bool) -> bool:
+        rel_path = f'{self.rel_dir}/{name}' if self.rel_dir else name
+        # Configured excludes cannot be re-included by a .gitignore negation
+        if self.excludes is not None and self.excludes.match(rel_path, name, is_dir):
+            return True
+        for offset, rules in self.chain:
+            verdict = rules.match(rel_path[offset:], name, is_dir)
+            if verdict is not None:
+                return verdict
+        return False
+
+    def filter(self, names: List[str], is_dir: bool) -> List[str]:
+        """The entries of ``names`` that are not ignored (one directory's files or subdirectories)."""
+        if self.merged is None:
+            return [name for name in names if not self.ignores(name, is_dir)]
+        literals, name_match, path_checks = self.merged[is_dir]
+        kept = [name for name in names if name not in literals] if literals else list(names)
+        if name_match is not None:
+            kept = [name for name in kept if not name_match(name)]
+        if path_checks and kept:
+            prefix = f'{self.rel_dir}/' if self.rel_dir else ''
+            kept = [name for name in kept
+                    if not any(path_match((prefix + name)[offset:]) for offset, path_match in path_checks)]
+        return kept
+
+
+class IgnoreMatcher:
+    """Per-directory ignore rules for one project root, built lazily and cached.
+
+    Directories must be resolved parent first (as a walk does); anything
+    else is resolved through its ancestors on demand.
+    """
+
+    def __init__(self, root: str, exclude_patterns: Iterable[str] = (), use_gitignore: bool = True):
+        self.root = os.fspath(root)
+        self.exclude_patterns = list(exclude_patterns)
+        self.excludes = IgnoreRules(self.exclude_patterns) or None
+        self.use_gitignore = use_gitignore
+        self._directories: Dict[str, DirectoryRules] = {}
+        self._excludes_only: Dict[str, DirectoryRules] = {}
+        self._ignored_dirs: Dict[Tuple[str, bool], bool] = {}
+        self._merged: Dict[Tuple, Tuple] = {}
+
+    @property
+    def fingerprint(self) -> Dict:
+        """Settings to fold into the detection cache fingerprint."""
+        return {'exclude_paths': self.exclude_patterns, 'gitignore': self.use_gitignore}
+
+    def _stat(self, rel_path: str) -> Optional[List[int]]:
+        try:
+            stat = os.stat(os.path.join(self.root, rel_path))
+        except OSError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def gitignore_stat(self, rel_dir: str) -> Optional[List[int]]:
+        """(mtime_ns, size) of the directory's .gitignore; None if absent or not used."""
+        if not self.use_gitignore:
+            return None
+        return self._stat(f'{rel_dir}/{GITIGNORE}' if rel_dir else GITIGNORE)
+
+    def _load(self, rel_path: str) -> Optional[IgnoreRules]:
+        try:
+            with open(os.path.join(self.root, rel_path), 'r', encoding='utf-8', errors='replace') as handle:
+                rules = IgnoreRules(handle.read().splitlines())
+        except OSError:
+            return None
+        return rules or None
+
+    def _new_rules(self, rel_dir: str, chain: Tuple, signature: str, gitignore_stat) -> DirectoryRules:
+        # Most directories share their parent's chain, so merged matchers are cached per chain
+        key = tuple(id(rules) for _, rules in chain)
+        cached = self._merged.get(key)
+        if cached is None:
+            rule_sets = [(0, self.excludes)] if self.excludes is not None else []
+            cached = self._merged[key] = (chain, _merge(rule_sets + list(chain)))  # chain keeps the ids alive
+        merged = cached[1]
+        return DirectoryRules(rel_dir, chain, signature, gitignore_stat, self.excludes, merged)
+
+    def _root_rules(self, gitignore_stat) -> DirectoryRules:
+        chain = ()
+        signature = ''
+        if self.use_gitignore:
+            info_stat = self._stat(INFO_EXCLUDE)
+            info = self._load(INFO_EXCLUDE) if info_stat else None
+            if info is not None:
+                chain = ((0, info),)
+            signature = hashlib.sha1(repr((info_stat, gitignore_stat)).encode()).hexdigest()[:16]
+        own = self._load(GITIGNORE) if gitignore_stat else None
+        if own is not None:
+            chain = ((0, own),) + chain
+        return self._new_rules('', chain, signature, gitignore_stat)
+
+    def directory(self, rel_dir: str, gitignore_stat=_UNKNOWN) -> DirectoryRules:
+        """Rules for the entries of ``rel_dir`` ('' for the root, '/'-separated).
+
+        Pass ``gitignore_stat`` when the caller already knows whether the
+        directory holds a .gitignore (e.g. from its listing) to save a stat.
+        """
+        rules = self._directories.get(rel_dir)
+        if rules is not None and (gitignore_stat is _UNKNOWN or rules.gitignore_stat == gitignore_stat):
+            return rules
+        if gitignore_stat is _UNKNOWN:
+            gitignore_stat = self.gitignore_stat(rel_dir)
+        if not rel_dir:
+            rules = self._root_rules(gitignore_stat)
+        else:
+            parent = self.directory(rel_dir.rpartition('/')[0])
+            chain, signature = parent.chain, parent.signature
+            if gitignore_stat is not None:
+                own = self._load(f'{rel_dir}/{GITIGNORE}')
+                if own is not None:
+                    chain = ((len(rel_dir) + 1, own),) + chain
+                signature = hashlib.sha1(f'{signature}|{rel_dir}|{gitignore_stat}'.encode()).hexdigest()[:16]
+            rules = self._new_rules(rel_dir, chain, signature, gitignore_stat)
+        self._directories[rel_dir] = rules
+        return rules
+
+    def _rules(self, rel_dir: str, gitignore: bool) -> DirectoryRules:
+        if gitignore:
+            return self.directory(rel_dir)
+        rules = self._excludes_only.get(rel_dir)
+        if rules is None:
+            rules = self._excludes_only[rel_dir] = self._new_rules(rel_dir, (), '', None)
+        return rules
+
+    def is_ignored(self, rel_path: str, is_dir: bool = False, gitignore: bool = True) -> bool:
+        """Whether ``rel_path`` or any directory above it is excluded.
+
+        With ``gitignore=False`` only the configured excludes apply (used for
+        files tracked in the git index, which .gitignore does not affect).
+        """
+        parent, _, name = rel_path.rpartition('/')
+        if parent:
+            key = (parent, gitignore)
+            ignored = self._ignored_dirs.get(key)
+            if ignored is None:
+                ignored = self._ignored_dirs[key] = self.is_ignored(parent, True, gitignore)
+            if ignored:
+                return True
+        return self._rules(parent, gitignore).ignores(name, is_dir)
+
+
+def excludes_from_config(config: Dict) -> List[str]:
+    """exclude_paths of every scanner under ``sast`` in ci-config.yaml, in order, without duplicates."""
+    patterns = []
+    sast = config.get('sast') if isinstance(config, dict) else None
+    for settings in (sast or {}).values():
+        if isinstance(settings, dict):
+            for pattern in settings.get('exclude_paths') or ():
+                if isinstance(pattern, str) and pattern not in patterns:
+                    patterns.append(pattern)
+    return patterns
+
+
+def main() -> int:
+    """Print which of the given paths are ignored, like `git check-ignore`."""
+    if len(sys.argv) < 3:
+        print("Usage: python ignore_rules.py <root> <relative paths...>", file=sys.stderr)
+        return 1
+    matcher = IgnoreMatcher(sys.argv[1], excludes_from_config(load_ci_config()))
+    ignored = [path for path in sys.argv[2:]
+               if matcher.is_ignored(path.rstrip('/'), os.path.isdir(os.path.join(sys.argv[1], path)))]
+    for path in ignored:
+        print(path)
+    return 0 if ignored else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Incremental Scan Planner - Restrict a pull request scan to the changed files
+
+Purpose: Compute the files changed since a base ref from the local git
+         objects, classify them with LanguageDetector and decide which
+         scanners need to start and on which files. Changes to dependency
+         manifests or scanner configuration can alter findings anywhere, so
+         they (and very large changes) fall back to a full scan.
+Usage: python incremental_scan.py <base_ref> [options]
+Example: python incremental_scan.py origin/main --head-ref HEAD --path .
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import sys
+from typing import Dict, List, Optional
+
+from git_objects import CHANGE_DELETED, GitObjectError, changed_files
+from ignore_rules import IgnoreMatcher, excludes_from_config
+from sast_config import DEFAULT_CONFIG_FILE, load_ci_config
+from scan_profile import ScanProfile
+
+language_detector = importlib.import_module('language-detector')
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+MODE_INCREMENTAL = 'incremental'
+MODE_FULL = 'full'
+
+# Changing any of these can change findings in files the diff does not touch
+FULL_SCAN_TRIGGERS = (
+    'ci-config.yaml',
+    'configs/semgrep-rules.yaml',
+    'configs/bandit.yaml',
+    'configs/.eslintrc.security.json',
+)
+
+# Beyond this many files the command lines get long and the saving is small
+MAX_INCREMENTAL_FILES = 1000
+
+# Scanners that accept explicit file targets, with the languages they read;
+# None means every classified file. Scanners not listed scan the whole project.
+TARGETED_SCANNERS = {
+    'semgrep': None,
+    'bandit': ('python',),
+    'eslint': ('javascript', 'typescript'),
+}
+
+
+def full_scan_reason(changes: List[tuple]) -> Optional[str]:
+    """Why the change set requires a full scan, or None if an incremental one is enough."""
+    for _, path in changes:
+        if path in FULL_SCAN_TRIGGERS:
+            return f"scanner configuration changed: {path}"
+        if language_detector.MANIFEST_MATCHER.match(path.rpartition('/')[2]):  # patterns are case-sensitive
+            return f"dependency manifest changed: {path}"
+    if len(changes) > MAX_INCREMENTAL_FILES:
+        return f"{len(changes)} files changed (limit {MAX_INCREMENTAL_FILES})"
+    return None
+
+
+def scanner_targets(scanner_config: Dict, files_by_language: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Sorted files each targeted scanner should receive (a file may have several languages)."""
+    targets = {}
+    for scanner in scanner_config.get('scanners', []):
+        if scanner not in TARGETED_SCANNERS:
+            continue
+        languages = TARGETED_SCANNERS[scanner]
+        files = set()
+        for lang, paths in files_by_language.items():
+            if languages is None or lang in languages:
+                files.update(paths)
+        targets[scanner] = sorted(files)
+    return targets
+
+
+def plan_incremental_scan(project_path: str, base_ref: str, head_ref: str = 'HEAD',
+                          sniff_content: bool = False, ignore_matcher: Optional[IgnoreMatcher] = None,
+                          profile: Optional[ScanProfile] = None) -> Dict:
+    """Build the scan plan for the changes between ``base_ref`` and ``head_ref``.
+
+    The plan's ``mode`` is 'incremental' (with ``scanner_config`` and
+    per-scanner ``targets``) or 'full' (with the ``reason``); unresolvable
+    refs, e.g. in a shallow clone, also give a full scan. Changed files
+    matched by ``ignore_matcher`` are left out of the targets. With a
+    ``profile``, the incremental plan carries the detection's profile block.
+    """
+    plan = {'base_ref': base_ref, 'head_ref': head_ref}
+    try:
+        changes = changed_files(project_path, base_ref, head_ref)
+    except GitObjectError as e:
+        return dict(plan, mode=MODE_FULL, reason=f"cannot diff against {base_ref}: {e}")
+
+    reason = full_scan_reason(changes)
+    if reason:
+        return dict(plan, mode=MODE_FULL, reason=reason, changed_files=len(changes))
+
+    present = [path for change, path in changes if change != CHANGE_DELETED]
+    sniffer = language_detector.ContentSniffer() if sniff_content else None
+    detector = language_detector.LanguageDetector(project_path, sniffer=sniffer, ignore_matcher=ignore_matcher,
+                                                  profile=profile)
+    detection = detector.scan_files(present)
+    scanner_config = language_detector.generate_scanner_config(detection['recommendations'],
+                                                               detection['detected_languages'])
+    if 'profile' in detection:
+        plan['profile'] = detection['profile']
+    return dict(
+        plan,
+        mode=MODE_INCREMENTAL,
+        reason=f"{len(present)} changed files to scan, {len(changes) - len(present)} deleted",
+        changed_files=len(changes),
+        detected_languages=[lang['language'] for lang in detection['detected_languages']],
+        scanner_config=scanner_config,
+        targets=scanner_targets(scanner_config, detection['files_by_language']),
+    )
+
+
+def main() -> int:
+    """Main entry point with proper error handling."""
+    parser = argparse.ArgumentParser(
+        description='🎯 Plan an incremental SAST scan from the changes since a base ref',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+    python incremental_scan.py origin/main               # Changes on this branch since it forked
+    python incremental_scan.py $BASE_SHA --head-ref $SHA # Explicit commits, e.g. from a PR event
+        """
+    )
+    parser.add_argument('base_ref', help='Base branch, tag or commit of the change')
+    parser.add_argument('--head-ref', default='HEAD', help='Revision being scanned (default: HEAD)')
+    parser.add_argument('--path', default='.', help='Project path (default: current directory)')
+    parser.add_argument('--sniff-content', action='store_true',
+                        help='Identify extensionless changed files from their first bytes')
+    parser.add_argument('--config', default=DEFAULT_CONFIG_FILE,
+                        help=f'Pipeline configuration whose sast.*.exclude_paths are skipped '
+                             f'(default: {DEFAULT_CONFIG_FILE})')
+    parser.add_argument('--no-ignore', action='store_true',
+                        help='Keep changed files matched by .gitignore or the configured exclude_paths')
+    args = parser.parse_args()
+
+    try:
+        ignore_matcher = None
+        if not args.no_ignore:
+            ignore_matcher = IgnoreMatcher(args.path, excludes_from_config(load_ci_config(args.config)))
+        plan = plan_incremental_scan(args.path, args.base_ref, args.head_ref, args.sniff_content,
+                                     ignore_matcher)
+        icon = '🎯' if plan['mode'] == MODE_INCREMENTAL else '🔁'
+        logger.info(f"{icon} {plan['mode']} scan: {plan['reason']}")
+        print(json.dumps(plan, indent=2))
+        return 0
+    except KeyboardInterrupt:
+        logger.error("Operation cancelled by user")
+        return 130
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
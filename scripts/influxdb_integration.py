@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+InfluxDB Integration - Reliable line-protocol writer for SAST metrics
+
+Purpose: Build the SAST metric points (the eight series written by
+         influxdb_integration.sh plus optional per-scanner and per-finding
+         points), escape them per the line protocol, and write them in
+         gzip-compressed batches over one keep-alive connection. Failed
+         writes are retried with exponential backoff; if the server stays
+         unavailable the batch is spooled to disk and sent first on the
+         next run, so a CI outage no longer loses metrics.
+Usage: python influxdb_integration.py [--status success] [options]
+Example: INFLUXDB_TOKEN=... python influxdb_integration.py --status success --per-scanner
+"""
+
+import argparse
+import gzip
+import http.client
+import json
+import logging
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+from urllib.parse import urlencode, urlsplit
+
+from detection_cache import CACHE_DIR_NAME
+from findings_store import COLUMNS_SUFFIX, open_results
+from sast_config import DEFAULT_CONFIG_FILE, get_setting, load_ci_config
+from scan_profile import PROFILE_FILE
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_URL = 'http://localhost:8086'
+DEFAULT_ORG = 'sast-org'
+DEFAULT_BUCKET = 'sast-metrics'
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_TIMEOUT_SECONDS = 10
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30
+DEFAULT_SPOOL_DIR = os.path.join(CACHE_DIR_NAME, 'influx-spool')
+MAX_SPOOL_BYTES = 64 * 1024 * 1024
+SPOOL_SUFFIX = '.lp.gz'
+
+# 5xx and throttling are worth retrying; other 4xx will fail the same way again
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Rejected content: spooling would only replay the error
+DROP_STATUS = {400, 422}
+
+SEVERITIES = ('critical', 'high', 'medium', 'low')
+
+FieldValue = Union[int, float, bool, str]
+
+
+def _escape(value: str, special: str) -> str:
+    value = value.replace('\\', '\\\\')
+    for char in special:
+        value = value.replace(char, '\\' + char)
+    return value.replace('\n', '\\n')
+
+
+def escape_measurement(name: str) -> str:
+    return _escape(name, ', ')
+
+
+def escape_key(key: str) -> str:
+    """Escape a tag key, tag value or field key."""
+    return _escape(key, ',= ')
+
+
+def format_field(value: FieldValue) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return f'{value}i'
+    if isinstance(value, float):
+        return repr(value)
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+class Point:
+    """One line-protocol point; tags with empty values are omitted."""
+
+    __slots__ = ('measurement', 'tags', 'fields', 'timestamp_ns')
+
+    def __init__(self, measurement: str, tags: Dict[str, str], fields: Dict[str, FieldValue],
+                 timestamp_ns: int):
+        self.measurement = measurement
+        self.tags = tags
+        self.fields = fields
+        self.timestamp_ns = timestamp_ns
+
+    def to_line(self) -> str:
+        tags = ''.join(f',{escape_key(k)}={escape_key(str(v))}'
+                       for k, v in sorted(self.tags.items()) if v not in (None, ''))
+        fields = ','.join(f'{escape_key(k)}={format_field(v)}' for k, v in self.fields.items())
+        return f'{escape_measurement(self.measurement)}{tags} {fields} {self.timestamp_ns}'
+
+
+class InfluxWriteError(RuntimeError):
+    """Raised when a batch could not be delivered (after retries)."""
+
+    def __init__(self, message: str, retryable: bool):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class InfluxWriter:
+    """Buffering /api/v2/write client with retry, gzip batches and a disk spool."""
+
+    def __init__(self, url: str, token: str, org: str, bucket: str,
+                 batch_size: int = DEFAULT_BATCH_SIZE, max_retries: int = DEFAULT_MAX_RETRIES,
+                 timeout: float = DEFAULT_TIMEOUT_SECONDS, spool_dir: Optional[str] = DEFAULT_SPOOL_DIR,
+                 sleep=time.sleep):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"Unsupported InfluxDB URL: {url}")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip('/')
+        self.org = org
+        self.bucket = bucket
+        self.path = (self.base_path + '/api/v2/write?'
+                     + urlencode({'org': org, 'bucket': bucket, 'precision': 'ns'}))
+        self.headers = {
+            'Authorization': f'Token {token}',
+            'Content-Type': 'text/plain; charset=utf-8',
+            'Content-Encoding': 'gzip',
+            'Connection': 'keep-alive',
+        }
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.spool_dir = Path(spool_dir) if spool_dir else None
+        self.sleep = sleep
+        self._buffer: List[str] = []
+        self._connection: Optional[http.client.HTTPConnection] = None
+        self.stats = {'points_written': 0, 'batches_sent': 0, 'retries': 0,
+                      'batches_spooled': 0, 'spool_flushed': 0, 'points_dropped': 0}
+
+    # -- buffering ---------------------------------------------------------
+
+    def write(self, points: Iterable[Point]):
+        """Buffer points, sending a batch whenever batch_size lines are pending."""
+        for point in points:
+            self._buffer.append(point.to_line())
+            if len(self._buffer) >= self.batch_size:
+                self._send_buffer()
+
+    def flush(self):
+        if self._buffer:
+            self._send_buffer()
+
+    def close(self):
+        self.flush()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _send_buffer(self):
+        lines, self._buffer = self._buffer, []
+        body = gzip.compress(('\n'.join(lines) + '\n').encode('utf-8'))
+        try:
+            self._post_with_retry(body)
+            self.stats['points_written'] += len(lines)
+        except InfluxWriteError as e:
+            if e.retryable and self._spool(body):
+                logger.warning(f"⚠️  InfluxDB unavailable ({e}); spooled {len(lines)} points")
+            else:
+                self.stats['points_dropped'] += len(lines)
+                logger.error(f"❌ Dropped {len(lines)} points: {e}")
+
+    # -- HTTP --------------------------------------------------------------
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._connection is None:
+            cls = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+            self._connection = cls(self.host, self.port, timeout=self.timeout)
+        return self._connection
+
+    def check_connection(self) -> bool:
+        """True if the token can see the configured bucket in the configured org."""
+        path = self.base_path + '/api/v2/buckets?' + urlencode({'org': self.org, 'name': self.bucket})
+        status, _, payload = self._request('GET', path, None, {'Authorization': self.headers['Authorization']})
+        if status != 200:
+            logger.error(f"❌ InfluxDB answered HTTP {status}: {payload[:200].decode('utf-8', 'replace')}")
+            return False
+        try:
+            return bool(json.loads(payload).get('buckets'))
+        except ValueError:
+            return False
+
+    def _post(self, body: bytes):
+        return self._request('POST', self.path, body, self.headers)
+
+    def _request(self, method: str, path: str, body: Optional[bytes], headers: Dict[str, str]):
+        """One request on the kept-alive connection; reconnects once if the server closed it."""
+        for attempt in (0, 1):
+            connection = self._connect()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                payload = response.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                connection.close()
+                self._connection = None
+                if attempt:
+                    raise
+                continue
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                self._connection = None
+                raise
+            if response.will_close:
+                connection.close()
+                self._connection = None
+            return response.status, response.getheader('Retry-After'), payload
+
+    def _post_with_retry(self, body: bytes):
+        delay = BACKOFF_BASE_SECONDS
+        for attempt in range(self.max_retries + 1):
+            try:
+                status, retry_after, payload = self._post(body)
+            except (OSError, http.client.HTTPException) as e:
+                status, retry_after, payload = None, None, str(e).encode()
+            if status is not None and 200 <= status < 300:
+                self.stats['batches_sent'] += 1
+                return
+            message = (f"HTTP {status}: {payload[:200].decode('utf-8', 'replace')}"
+                       if status is not None else payload.decode('utf-8', 'replace'))
+            if status is not None and status not in RETRYABLE_STATUS:
+                raise InfluxWriteError(message, retryable=status not in DROP_STATUS)
+            if attempt == self.max_retries:
+                raise InfluxWriteError(message, retryable=True)
+            wait = delay
+            if retry_after and retry_after.isdigit():
+                wait = max(wait, float(retry_after))
+            self.stats['retries'] += 1
+            logger.info(f"🔁 InfluxDB write failed ({message}), retrying in {wait:.1f}s")
+            self.sleep(min(wait, BACKOFF_MAX_SECONDS) * random.uniform(0.8, 1.2))
+            delay = min(delay * 2, BACKOFF_MAX_SECONDS)
+
+    # -- spool -------------------------------------------------------------
+
+    def _spool(self, body: bytes) -> bool:
+        if self.spool_dir is None:
+            return False
+        try:
+            self.spool_dir.mkdir(parents=True, exist_ok=True)
+            name = f'{time.time_ns():020d}-{os.getpid()}{SPOOL_SUFFIX}'
+            temp_path = self.spool_dir / (name + '.tmp')
+            temp_path.write_bytes(body)
+            os.replace(temp_path, self.spool_dir / name)
+        except OSError as e:
+            logger.error(f"❌ Cannot spool metrics to {self.spool_dir}: {e}")
+            return False
+        self.stats['batches_spooled'] += 1
+        self._trim_spool()
+        return True
+
+    def _spooled_files(self) -> List[Path]:
+        if self.spool_dir is None or not self.spool_dir.is_dir():
+            return []
+        return sorted(self.spool_dir.glob('*' + SPOOL_SUFFIX))
+
+    def _trim_spool(self):
+        """Keep the spool under MAX_SPOOL_BYTES by dropping the oldest batches."""
+        files = self._spooled_files()
+        total = sum(path.stat().st_size for path in files)
+        for path in files:
+            if total <= MAX_SPOOL_BYTES:
+                break
+            total -= path.stat().st_size
+            path.unlink()
+            logger.warning(f"⚠️  Spool over {MAX_SPOOL_BYTES} bytes, dropped {path.name}")
+
+    def flush_spool(self) -> int:
+        """Send spooled batches oldest first; stops at the first one that still fails."""
+        sent = 0
+        for path in self._spooled_files():
+            try:
+                self._post_with_retry(path.read_bytes())
+            except InfluxWriteError as e:
+                if e.retryable:
+                    logger.warning(f"⚠️  Spool not flushed, InfluxDB still unavailable: {e}")
+                    break
+                logger.error(f"❌ Dropping rejected spooled batch {path.name}: {e}")
+            path.unlink()
+            sent += 1
+        self.stats['spool_flushed'] += sent
+        return sent
+
+
+def _read_json(path: Path) -> Optional[Union[Dict, List]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def build_points(results_dir: Path, scan_status: str, tags: Dict[str, str], timestamp_ns: int,
+                 per_scanner: bool = False, per_finding: bool = False) -> List[Point]:
+    """Points for one pipeline run, from the files in sast-results.
+
+    Scan duration is the scanner runs (scanner-runs.json, else the
+    summary's scan_duration) plus language detection (detection-profile.json,
+    written by scan_orchestrator.py or ``language-detector.py --profile-file``);
+    detection time alone is never reported as a scan duration. Files scanned
+    comes from the detection profile unless the summary has it.
+    """
+    overall = _read_json(results_dir / 'overall-summary.json') or {}
+    runs = _read_json(results_dir / 'scanner-runs.json') or {}
+    profile = _read_json(results_dir / PROFILE_FILE) or {}
+    totals = overall.get('total_vulnerabilities') or {}
+    duration = float(runs.get('wall_seconds') or overall.get('scan_duration') or 0)
+    if duration:
+        duration += float(profile.get('total_seconds') or 0)
+    files_scanned = int(overall.get('files_scanned') or profile.get('files_scanned') or 0)
+
+    points = [Point('sast_vulnerabilities', dict(tags, severity=severity),
+                    {'value': int(totals.get(severity) or 0)}, timestamp_ns) for severity in SEVERITIES]
+    points += [
+        Point('sast_scan_status', tags, {'value': 1 if scan_status == 'success' else 0}, timestamp_ns),
+        Point('sast_scan_duration', tags, {'value': duration}, timestamp_ns),
+        Point('sast_files_scanned', tags, {'value': files_scanned}, timestamp_ns),
+        Point('sast_total_findings', tags, {'value': int(overall.get('total_findings') or 0)}, timestamp_ns),
+    ]
+
+    if per_scanner:
+        for path in sorted(results_dir.glob('*-summary.json')):
+            summary = _read_json(path)
+            if path.name == 'overall-summary.json' or not isinstance(summary, dict) or 'scanner' not in summary:
+                continue
+            counts = summary.get('vulnerabilities') or {}
+            fields = {severity: int(counts.get(severity) or 0) for severity in SEVERITIES}
+            fields['total'] = int(summary.get('total_findings') or 0)
+            points.append(Point('sast_scanner_findings', dict(tags, scanner=summary['scanner']),
+                                fields, timestamp_ns))
+        # Per-rule counts straight from the mapped findings columns (findings_store.py)
+        with open_results(results_dir) as findings:
+            for part in findings.parts:
+                scanner = part.path.name[:-len(COLUMNS_SUFFIX)]
+                for rule, counts in sorted(part.severity_counts_by('rule').items()):
+                    fields = dict(counts, total=sum(counts.values()))
+                    points.append(Point('sast_rule_findings', dict(tags, scanner=scanner, rule=rule or '-'),
+                                        fields, timestamp_ns))
+        for run in runs.get('scanners') or ():
+            fields = {'wall_seconds': float(run.get('wall_seconds') or 0),
+                      'success': run.get('status') == 'completed'}
+            if run.get('cpu_seconds') is not None:
+                fields['cpu_seconds'] = float(run['cpu_seconds'])
+                fields['peak_rss_kb'] = int(run.get('peak_rss_kb') or 0)
+            points.append(Point('sast_scanner_runtime',
+                                dict(tags, scanner=run.get('scanner'), status=run.get('status')),
+                                fields, timestamp_ns))
+        for phase, timing in (profile.get('phases') or {}).items():
+            points.append(Point('sast_detection_phase', dict(tags, phase=phase),
+                                {'seconds': float(timing.get('seconds') or 0),
+                                 'calls': int(timing.get('calls') or 0)}, timestamp_ns))
+        if profile.get('counters'):
+            points.append(Point('sast_detection_counters', tags,
+                                {name: int(value) for name, value in profile['counters'].items()},
+                                timestamp_ns))
+
+    if per_finding:
+        # Points sharing series and timestamp overwrite each other: offset each by 1ns
+        offset = 0
+        with open_results(results_dir) as findings:
+            for part in findings.parts:
+                scanner = part.path.name[:-len(COLUMNS_SUFFIX)]
+                for severity, file_path, line, family, _ in part.identities():
+                    points.append(Point('sast_finding',
+                                        dict(tags, scanner=scanner, severity=severity, family=family),
+                                        {'path': file_path, 'line': line}, timestamp_ns + offset))
+                    offset += 1
+    return points
+
+
+def main() -> int:
+    """Main entry point with proper error handling."""
+    parser = argparse.ArgumentParser(
+        description='📈 Send SAST metrics to InfluxDB',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Environment:
+    INFLUXDB_URL, INFLUXDB_TOKEN, INFLUXDB_ORG, INFLUXDB_BUCKET (as for influxdb_integration.sh)
+
+Examples:
+    python influxdb_integration.py --status success                # Run summary points
+    python influxdb_integration.py --status failure --per-finding  # Plus one point per finding
+    python influxdb_integration.py --flush-spool                   # Only resend spooled batches
+    python influxdb_integration.py --test-connection               # Check URL and token
+        """
+    )
+    parser.add_argument('--status', default='unknown', help='Pipeline scan status (success counts as 1)')
+    parser.add_argument('--config', default=DEFAULT_CONFIG_FILE,
+                        help=f'Pipeline configuration file (default: {DEFAULT_CONFIG_FILE})')
+    parser.add_argument('--results-dir', default='./sast-results',
+                        help='Directory with the summary files (default: ./sast-results)')
+    parser.add_argument('--per-scanner', action='store_true',
+                        help='Also write per-scanner and per-rule finding counts and runtimes')
+    parser.add_argument('--per-finding', action='store_true',
+                        help='Also write one point per finding (from <scanner>-findings.cols)')
+    parser.add_argument('--spool-dir', default=DEFAULT_SPOOL_DIR,
+                        help=f'Where undeliverable batches wait for the next run (default: {DEFAULT_SPOOL_DIR})')
+    parser.add_argument('--flush-spool', action='store_true',
+                        help='Only send previously spooled batches')
+    parser.add_argument('--test-connection', action='store_true',
+                        help='Write nothing; check that the server accepts the token')
+    args = parser.parse_args()
+
+    try:
+        settings = get_setting(load_ci_config(args.config), 'integrations.influxdb', {}) or {}
+        token = os.environ.get('INFLUXDB_TOKEN') or settings.get('token')
+        if not token:
+            logger.error("❌ INFLUXDB_TOKEN is not set")
+            return 1
+        writer = InfluxWriter(
+            os.environ.get('INFLUXDB_URL') or settings.get('url') or DEFAULT_URL,
+            token,
+            os.environ.get('INFLUXDB_ORG') or settings.get('org') or DEFAULT_ORG,
+            os.environ.get('INFLUXDB_BUCKET') or settings.get('bucket') or DEFAULT_BUCKET,
+            batch_size=int(settings.get('batch_size') or DEFAULT_BATCH_SIZE),
+            max_retries=int(settings.get('max_retries', DEFAULT_MAX_RETRIES)),
+            spool_dir=args.spool_dir,
+        )
+
+        if args.test_connection:
+            if not writer.check_connection():
+                logger.error(f"❌ Bucket {writer.bucket} not accessible in org {writer.org}")
+                return 1
+            logger.info("✅ InfluxDB connection and bucket OK")
+            return 0
+
+        flushed = writer.flush_spool()
+        if flushed:
+            logger.info(f"📤 Sent {flushed} spooled batches from earlier runs")
+        if not args.flush_spool:
+            tags = {
+                'repository': os.environ.get('GITHUB_REPOSITORY', 'unknown'),
+                'branch': os.environ.get('GITHUB_REF_NAME', 'unknown'),
+            }
+            points = build_points(Path(args.results_dir), args.status, tags, time.time_ns(),
+                                  args.per_scanner, args.per_finding)
+            writer.write(points)
+        writer.close()
+
+        stats = writer.stats
+        logger.info(f"📈 {stats['points_written']} points written in {stats['batches_sent']} batches "
+                    f"({stats['retries']} retries, {stats['batches_spooled']} batches spooled)")
+        return 0 if not stats['points_dropped'] else 1
+    except KeyboardInterrupt:
+        logger.error("Operation cancelled by user")
+        return 130
+    except InfluxWriteError as e:
+        logger.error(f"❌ InfluxDB write failed: {e}")
+        return 1
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
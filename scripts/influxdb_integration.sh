@@ -50,8 +50,26 @@ load_scan_metrics() {
         total_low=$(jq '.total_vulnerabilities.low // 0' "$RESULTS_DIR/overall-summary.json")
         total_findings=$(jq '.total_findings // 0' "$RESULTS_DIR/overall-summary.json")
         files_scanned=$(jq '.files_scanned // 0' "$RESULTS_DIR/overall-summary.json")
+        scan_duration=$(jq '.scan_duration // 0' "$RESULTS_DIR/overall-summary.json")
     fi
-    
+
+    # Длительность запуска сканеров (scan_orchestrator.py)
+    if [ -f "$RESULTS_DIR/scanner-runs.json" ] && command -v jq >/dev/null 2>&1; then
+        scan_duration=$(jq --argjson summary "$scan_duration" '.wall_seconds // $summary' \
+            "$RESULTS_DIR/scanner-runs.json")
+    fi
+
+    # Время и число файлов детектора (detection-profile.json): время только
+    # добавляется к реальной длительности сканирования, но не заменяет её
+    if [ -f "$RESULTS_DIR/detection-profile.json" ] && command -v jq >/dev/null 2>&1; then
+        scan_duration=$(jq --argjson scan "$scan_duration" \
+            'if $scan > 0 then $scan + (.total_seconds // 0) else $scan end' \
+            "$RESULTS_DIR/detection-profile.json")
+        if [ "$files_scanned" = "0" ]; then
+            files_scanned=$(jq '.files_scanned // 0' "$RESULTS_DIR/detection-profile.json")
+        fi
+    fi
+
     # Экспорт метрик для использования в других функциях
     export TOTAL_CRITICAL=$total_critical
     export TOTAL_HIGH=$total_high
@@ -65,7 +83,21 @@ load_scan_metrics() {
 # Отправка метрик в InfluxDB
 send_metrics_to_influxdb() {
     echo -e "${BLUE}📈 Отправка метрик в InfluxDB...${NC}"
-    
+
+    # Python-писатель: экранирование, gzip-пакеты, повторы с backoff и
+    # буферизация на диск, если InfluxDB недоступна (отправка при следующем запуске)
+    local script_dir
+    script_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+    if command -v python3 >/dev/null 2>&1 && [ -f "$script_dir/influxdb_integration.py" ]; then
+        if python3 "$script_dir/influxdb_integration.py" --status "$SCAN_STATUS" \
+            --results-dir "$RESULTS_DIR" --per-scanner; then
+            echo -e "${GREEN}✅ Метрики успешно отправлены в InfluxDB${NC}"
+        else
+            echo -e "${RED}❌ Ошибка отправки метрик в InfluxDB${NC}"
+        fi
+        return
+    fi
+
     local repository="${GITHUB_REPOSITORY:-unknown}"
     local branch="${GITHUB_REF_NAME:-unknown}"
     local commit="${GITHUB_SHA:-unknown}"
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+JSON Stream - Incremental extraction of array items from large JSON files
+
+Purpose: Read scanner reports (SARIF, Semgrep, Bandit, ESLint JSON) in fixed
+         size chunks and yield only the items found at the requested paths,
+         so a report of hundreds of MB is processed in bounded memory.
+         Everything outside the requested paths is tokenized and skipped
+         without being materialized.
+Usage: from json_stream import iter_items
+Example: python json_stream.py codeql-results.sarif runs.*.results.*
+"""
+
+import json
+import re
+import sys
+from typing import Any, Iterator, Sequence, TextIO, Tuple
+
+WILDCARD = '*'
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRING_TAIL = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+_LITERAL = re.compile(r'[^ \t\n\r{}\[\],:"]+')
+_DECODER = json.JSONDecoder()
+
+
+class _ChunkReader:
+    """Sliding text buffer over a file handle."""
+
+    def __init__(self, handle: TextIO, chunk_size: int):
+        self.handle = handle
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Append the next chunk, dropping consumed text. False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.handle.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        self.buf += chunk
+        return True
+
+    def skip_whitespace(self) -> str:
+        """Advance past whitespace and return the next character ('' at EOF)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        char = self.skip_whitespace()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} at offset {self.pos}, got {char!r}")
+        self.pos += 1
+        return char
+
+    def read_string(self) -> str:
+        """Consume a JSON string (opening quote at pos) and return it decoded."""
+        start = self.pos
+        while True:
+            match = _STRING_TAIL.match(self.buf, start + 1)
+            if match:
+                self.pos = match.end()
+                return json.loads(self.buf[start:self.pos])
+            if not self.fill():
+                raise ValueError("Unterminated string")
+            start = self.pos  # fill() may have shifted the buffer
+
+    def skip_string(self):
+        """Consume a JSON string without decoding it."""
+        while True:
+            match = _STRING_TAIL.match(self.buf, self.pos + 1)
+            if match:
+                self.pos = match.end()
+                return
+            # Keep only the opening quote plus a dangling escape character
+            backslashes = len(self.buf) - len(self.buf.rstrip('\\'))
+            self.buf = '"\\' if backslashes % 2 else '"'
+            self.pos = 0
+            if not self.fill():
+                raise ValueError("Unterminated string")
+
+    def skip_literal(self):
+        while True:
+            match = _LITERAL.match(self.buf, self.pos)
+            end = match.end() if match else self.pos
+            if end < len(self.buf) or not self.fill():
+                self.pos = end
+                return
+
+    def skip_value(self):
+        """Consume one complete value of any size without building it."""
+        depth = 0
+        while True:
+            char = self.skip_whitespace()
+            if not char:
+                raise ValueError("Unexpected end of JSON")
+            if char == '"':
+                self.skip_string()
+            elif char in '{[':
+                depth += 1
+                self.pos += 1
+            elif char in '}]':
+                depth -= 1
+                self.pos += 1
+            elif char in ',:':
+                self.pos += 1
+                continue
+            else:
+                self.skip_literal()
+            if depth == 0:
+                return
+
+    def decode_value(self) -> Any:
+        """Decode one complete value starting at the current position."""
+        if self.skip_whitespace() not in '{["':
+            # Numbers and literals have no terminator: make sure all of it is buffered
+            while _LITERAL.match(self.buf, self.pos).end() == len(self.buf) and self.fill():
+                pass
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            self.pos = end
+            return value
+
+
+def _parse_path(path: str) -> Tuple[str, ...]:
+    return tuple(part for part in path.split('.') if part)
+
+
+def iter_items(handle: TextIO, paths: Sequence[str],
+               chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[int, Any]]:
+    """Yield (path index, value) for every value located at one of ``paths``.
+
+    Paths are dotted object keys with ``*`` standing for every element of an
+    array, e.g. ``runs.*.results.*`` or ``*.messages.*``. Values are yielded
+    in document order; only one value is held in memory at a time.
+    """
+    targets = [_parse_path(path) for path in paths]
+    reader = _ChunkReader(handle, chunk_size)
+    if not reader.skip_whitespace():
+        return
+    yield from _walk(reader, (), targets)
+
+
+def _walk(reader: _ChunkReader, current: Tuple[str, ...], targets) -> Iterator[Tuple[int, Any]]:
+    for index, target in enumerate(targets):
+        if current == target:
+            yield index, reader.decode_value()
+            return
+    depth = len(current)
+    if not any(len(target) > depth and target[:depth] == current for target in targets):
+        reader.skip_value()
+        return
+
+    char = reader.skip_whitespace()
+    if char == '{':
+        reader.pos += 1
+        if reader.skip_whitespace() == '}':
+            reader.pos += 1
+            return
+        while True:
+            if reader.skip_whitespace() != '"':
+                raise ValueError(f"Expected object key at offset {reader.pos}")
+            key = reader.read_string()
+            reader.expect(':')
+            yield from _walk(reader, current + (key,), targets)
+            if reader.expect(',}') == '}':
+                return
+    elif char == '[':
+        reader.pos += 1
+        if reader.skip_whitespace() == ']':
+            reader.pos += 1
+            return
+        while True:
+            yield from _walk(reader, current + (WILDCARD,), targets)
+            if reader.expect(',]') == ']':
+                return
+    else:
+        reader.skip_value()
+
+
+def main() -> int:
+    """Count the items at one or more paths of a JSON file."""
+    if len(sys.argv) < 3:
+        print("Usage: python json_stream.py <file.json> <path> [path ...]", file=sys.stderr)
+        return 1
+    counts = [0] * (len(sys.argv) - 2)
+    with open(sys.argv[1], 'r', encoding='utf-8') as handle:
+        for index, _ in iter_items(handle, sys.argv[2:]):
+            counts[index] += 1
+    for path, count in zip(sys.argv[2:], counts):
+        print(f"{path}: {count}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,12 +5,23 @@ Automatically detects project languages and recommends optimal SAST scanners.
 """
 
 import os
+import re
 import sys
 import json
+import fnmatch
 import argparse
+import threading
+import time
 from pathlib import Path
-from typing import Dict, List, Set
-from collections import defaultdict
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+from collections import defaultdict, deque
+
+from content_sniffer import DEFAULT_BYTE_BUDGET, DEFAULT_BYTES_PER_FILE, NON_SOURCE_SUFFIXES, ContentSniffer
+from detection_cache import CACHE_DIR_NAME, DetectionCache, config_fingerprint
+from git_index import GitIndexError, iter_tracked_files
+from ignore_rules import GITIGNORE, IgnoreMatcher, excludes_from_config
+from sast_config import DEFAULT_CONFIG_FILE, load_ci_config
+from scan_profile import PROFILE_FILE, ScanProfile, write_profile
 
 # Language detection patterns
 LANGUAGE_PATTERNS = {
@@ -124,46 +135,469 @@ SCANNER_INFO = {
     }
 }
 
+# Prioritize scanners based on coverage
+SCANNER_PRIORITY = {
+    'codeql': 1,    # Highest priority for supported languages
+    'semgrep': 2,   # Good general coverage
+    'bandit': 3,    # Python-specific
+    'eslint': 3     # JS/TS-specific
+}
+
+# Relative cost of running a scanner over one file, by SCANNER_INFO 'performance'
+SCANNER_COST = {'high': 1.0, 'medium': 3.0, 'low': 6.0}
+
+# Manifest files are only considered this many levels below the project root
+MANIFEST_SCAN_DEPTH = 2
+
+# Languages at or below this share of the top score get no scanners of their
+# own in whole-project detection
+RECOMMENDATION_CONFIDENCE = 0.3
+
+# Where the detector gets its file list from
+SOURCE_FILESYSTEM = 'filesystem'
+SOURCE_GIT_INDEX = 'git-index'
+FILE_SOURCES = (SOURCE_FILESYSTEM, SOURCE_GIT_INDEX)
+
+
+def build_extension_index(language_patterns: Dict = LANGUAGE_PATTERNS) -> Dict[str, Tuple[str, ...]]:
+    """Map every known file extension to the languages that claim it."""
+    index = defaultdict(list)
+    for lang, patterns in language_patterns.items():
+        for ext in patterns['extensions']:
+            if lang not in index[ext]:
+                index[ext].append(lang)
+    return {ext: tuple(langs) for ext, langs in index.items()}
+
+
+def file_suffix(file_name: str) -> str:
+    """Return the lower-cased extension of a file name, mirroring Path.suffix."""
+    i = file_name.rfind('.')
+    if 0 < i < len(file_name) - 1:
+        return file_name[i:].lower()
+    return ''
+
+
+class ManifestMatcher:
+    """Compiled matcher for the manifest file names listed in LANGUAGE_PATTERNS.
+
+    Literal names are resolved with a dict lookup; all wildcard patterns are
+    folded into a single regular expression so the common no-match case costs
+    one regex call per file. With a profile, calls are timed as the
+    'manifest_matching' phase and per-pattern re-checks are counted.
+    """
+
+    def __init__(self, language_patterns: Dict = LANGUAGE_PATTERNS, profile: Optional[ScanProfile] = None):
+        self._order = list(language_patterns)
+        exact = defaultdict(list)
+        self._wildcards = []
+        for lang, patterns in language_patterns.items():
+            for pattern in patterns['files']:
+                if '*' in pattern:
+                    self._wildcards.append((lang, re.compile(fnmatch.translate(pattern))))
+                elif lang not in exact[pattern]:
+                    exact[pattern].append(lang)
+        self._exact = {name: tuple(langs) for name, langs in exact.items()}
+        self._any_wildcard = None
+        if self._wildcards:
+            self._any_wildcard = re.compile('|'.join(f'(?:{rx.pattern})' for _, rx in self._wildcards))
+        self._profile = profile
+        if profile is not None:
+            self.match = profile.timed('manifest_matching', self.match)
+
+    @property
+    def lookups_per_name(self) -> int:
+        """Pattern-match attempts every name costs: the dict lookup plus the combined wildcard."""
+        return 1 if self._any_wildcard is None else 2
+
+    def match(self, file_name: str) -> Tuple[str, ...]:
+        """Return the languages whose manifest patterns match ``file_name``."""
+        langs = self._exact.get(file_name, ())
+        if self._any_wildcard is not None and self._any_wildcard.match(file_name):
+            if self._profile is not None:
+                self._profile.count('pattern_match_attempts', len(self._wildcards))
+            hits = set(langs)
+            hits.update(lang for lang, rx in self._wildcards if rx.match(file_name))
+            langs = tuple(lang for lang in self._order if lang in hits)
+        return langs
+
+
+class DirectoryCounts(NamedTuple):
+    """Classification result for the files directly inside one directory."""
+    total_files: int
+    file_hits: Dict[str, int]       # source files per language (by extension or content)
+    manifest_hits: Dict[str, int]   # manifest files per language (names lower-cased first)
+    exact_manifest_hits: Dict[str, int]  # manifest files per language, names matched as they are
+
+
+class ParallelDirectoryWalker:
+    """Work-stealing thread pool that lists and classifies directory subtrees.
+
+    Each worker owns a deque of pending directories: it pops its own newest
+    work (depth-first, cache friendly) and steals the oldest work of other
+    workers when it runs dry. Every directory carries an order key (the path
+    of child indices from the root) so the results can be put back into
+    os.walk pre-order after the walk, keeping the output identical to a
+    serial scan.
+    """
+
+    def __init__(self, scan_one: Callable[[str], Tuple[DirectoryCounts, List[str]]], workers: int,
+                 profile: Optional[ScanProfile] = None):
+        self.scan_one = scan_one
+        self.workers = max(1, workers)
+        self.profile = profile
+
+    def walk(self, root: str, max_depth: int) -> List[Tuple[int, str, DirectoryCounts]]:
+        """Walk ``root`` down to ``max_depth`` and return (depth, path, counts) in pre-order."""
+        if max_depth <= 0:
+            return []
+        
+        queues = [deque() for _ in range(self.workers)]
+        available = threading.Semaphore(0)
+        lock = threading.Lock()
+        state = {'pending': 1, 'error': None}
+        results = [[] for _ in range(self.workers)]
+        
+        queues[0].append(((), root, 0))
+        available.release()
+        
+        def take(worker_id):
+            own = queues[worker_id]
+            while True:
+                try:
+                    return own.pop()
+                except IndexError:
+                    pass
+                for offset in range(1, self.workers):
+                    try:
+                        return queues[(worker_id + offset) % self.workers].popleft()
+                    except IndexError:
+                        continue
+        
+        def run(worker_id):
+            own = queues[worker_id]
+            while True:
+                available.acquire()
+                task = take(worker_id)
+                if task is None:
+                    return
+                key, dir_path, depth = task
+                new_tasks = 0
+                try:
+                    counts, subdirs = self.scan_one(dir_path)
+                    results[worker_id].append((key, depth, dir_path, counts))
+                    if depth + 1 < max_depth:
+                        for index, subdir in enumerate(subdirs):
+                            own.append((key + (index,), subdir, depth + 1))
+                            new_tasks += 1
+                    elif self.profile is not None and subdirs:
+                        self.profile.count('directories_pruned_depth', len(subdirs))
+                except BaseException as exc:  # surfaced to the caller after the walk
+                    with lock:
+                        state['error'] = state['error'] or exc
+                for _ in range(new_tasks):
+                    available.release()
+                with lock:
+                    state['pending'] += new_tasks - 1
+                    finished = state['pending'] == 0
+                if finished:
+                    for queue in queues:
+                        queue.append(None)
+                    for _ in range(self.workers):
+                        available.release()
+        
+        threads = [threading.Thread(target=run, args=(i,), daemon=True) for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if state['error'] is not None:
+            raise state['error']
+        
+        merged = [item for worker_results in results for item in worker_results]
+        merged.sort(key=lambda item: item[0])
+        return [(depth, dir_path, counts) for _, depth, dir_path, counts in merged]
+
+
+class ShardPlanner:
+    """Splits a scan into subproject shards rooted at directories holding manifests.
+
+    Directories must be added in pre-order. Each directory's files belong to
+    the nearest enclosing shard root; the project root is always a shard and
+    collects everything outside a subproject. Every shard lists its nested
+    shard roots under ``exclude`` so fanned-out jobs do not overlap.
+    """
+
+    def __init__(self, max_depth: int):
+        self.max_depth = max_depth
+        self._shards = {}
+        self._stack = []
+        self._open_shard('')
+
+    def _open_shard(self, root: str):
+        if self._stack:
+            self._shards[self._stack[-1]]['exclude'].append(root)
+        self._shards[root] = {'file_hits': {}, 'manifest_hits': {}, 'exclude': []}
+        self._stack.append(root)
+
+    @staticmethod
+    def _is_within(path: str, root: str) -> bool:
+        return not root or path == root or path.startswith(root + '/')
+
+    def add(self, rel_dir: str, depth: int, counts: DirectoryCounts):
+        """Account one directory's counts to its shard."""
+        rel_dir = rel_dir.replace(os.sep, '/')
+        while len(self._stack) > 1 and not self._is_within(rel_dir, self._stack[-1]):
+            self._stack.pop()
+        if counts.exact_manifest_hits and rel_dir:
+            self._open_shard(rel_dir)
+        shard = self._shards[self._stack[-1]]
+        for lang, count in counts.exact_manifest_hits.items():
+            shard['manifest_hits'][lang] = shard['manifest_hits'].get(lang, 0) + count
+        if depth < self.max_depth:
+            for lang, count in counts.file_hits.items():
+                shard['file_hits'][lang] = shard['file_hits'].get(lang, 0) + count
+
+    def plan(self) -> List[Dict]:
+        """Return shards with source files, heaviest first."""
+        plan = []
+        for root, shard in self._shards.items():
+            file_hits = shard['file_hits']
+            if not file_hits:
+                continue
+            languages = sorted(file_hits, key=lambda lang: file_hits[lang], reverse=True)
+            scanners = set()
+            weight = 0.0
+            for lang in languages:
+                lang_scanners = LANGUAGE_PATTERNS[lang]['scanners']
+                scanners.update(lang_scanners)
+                weight += file_hits[lang] * sum(
+                    SCANNER_COST.get(SCANNER_INFO.get(scanner, {}).get('performance'), 1.0)
+                    for scanner in lang_scanners)
+            plan.append({
+                'root': root or '.',
+                'languages': languages,
+                'file_counts': {lang: file_hits[lang] for lang in languages},
+                'manifest_languages': list(shard['manifest_hits']),
+                'scanners': sorted(scanners, key=lambda x: SCANNER_PRIORITY.get(x, 99)),
+                'exclude': shard['exclude'],
+                'weight': round(weight, 1),
+            })
+        
+        total_weight = sum(shard['weight'] for shard in plan) or 1.0
+        for shard in plan:
+            shard['weight_share'] = round(shard['weight'] / total_weight, 4)
+        plan.sort(key=lambda shard: shard['weight'], reverse=True)
+        return plan
+
+
+EXTENSION_INDEX = build_extension_index()
+MANIFEST_MATCHER = ManifestMatcher()
+
+
 class LanguageDetector:
     """Detects programming languages in a project directory."""
     
-    def __init__(self, project_path: str, max_depth: int = 3):
+    def __init__(self, project_path: str, max_depth: int = 3, workers: int = 1,
+                 source: str = SOURCE_FILESYSTEM, use_cache: bool = False,
+                 rebuild_cache: bool = False, cache_dir: Optional[str] = None,
+                 sniffer: Optional[ContentSniffer] = None, plan_shards: bool = False,
+                 profile: Optional[ScanProfile] = None, ignore_matcher: Optional[IgnoreMatcher] = None):
+        if source not in FILE_SOURCES:
+            raise ValueError(f"Unknown file source: {source}")
         self.project_path = Path(project_path)
         self.max_depth = max_depth
+        self.workers = workers
+        self.source = source
+        self.active_source = None  # Source actually used by the last scan
+        self.use_cache = use_cache or rebuild_cache
+        self.rebuild_cache = rebuild_cache
+        self.cache_dir = cache_dir
+        self.cache = None
+        self.sniffer = sniffer
+        self.plan_shards = plan_shards
         self.ignore_dirs = {
             '.git', '.svn', '.hg', '__pycache__', 'node_modules', 
             'venv', 'env', '.env', 'vendor', 'target', 'build',
             'dist', '.next', '.nuxt', 'coverage', '.coverage',
-            'bin', 'obj', 'out'
+            'bin', 'obj', 'out', CACHE_DIR_NAME
         }
+        self.ignore_matcher = ignore_matcher  # .gitignore files and configured exclude_paths
+        self.extension_index = EXTENSION_INDEX
+        self.manifest_matcher = MANIFEST_MATCHER
+        self._sniff = sniffer.sniff if sniffer is not None else None
+        self._root = os.fspath(self.project_path)
+        self.profile = profile
+        if profile is not None:
+            # Instrument by wrapping bound methods, so unprofiled scans pay nothing
+            self.manifest_matcher = ManifestMatcher(profile=profile)
+            self._list_directory = profile.timed('walk', self._list_directory)
+            self._group_tracked_files = profile.timed('walk', self._group_tracked_files)
+            self._classify_files = profile.timed('classify', self._classify_files)
+            self._apply_ignores = profile.timed('ignore_matching', self._apply_ignores)
+            self._merge_counts = profile.timed('merge', self._merge_counts)
+            self._generate_recommendations = profile.timed('recommendations', self._generate_recommendations)
+            if self._sniff is not None:
+                self._sniff = profile.timed('content_sniffing', self._sniff)
         
     def scan_directory(self) -> Dict[str, any]:
         """Scan directory and detect languages."""
         if not self.project_path.exists():
             raise FileNotFoundError(f"Project path does not exist: {self.project_path}")
         
-        language_scores = defaultdict(int)
-        file_counts = defaultdict(int)
-        total_files = 0
+        started = time.perf_counter()
+        self._root = os.fspath(self.project_path)
+        if self.use_cache:
+            fingerprint = config_fingerprint(LANGUAGE_PATTERNS, self.ignore_dirs,
+                                             self.sniffer.bytes_per_file if self.sniffer else None,
+                                             self.ignore_matcher.fingerprint if self.ignore_matcher else None)
+            self.cache = DetectionCache.for_project(self.project_path, fingerprint,
+                                                    cache_dir=self.cache_dir, rebuild=self.rebuild_cache)
         
-        # Scan files
-        for file_path in self._walk_files():
-            total_files += 1
-            file_ext = file_path.suffix.lower()
-            
-            # Check against language patterns
-            for lang, patterns in LANGUAGE_PATTERNS.items():
-                if file_ext in patterns['extensions']:
-                    language_scores[lang] += patterns['priority']
-                    file_counts[lang] += 1
+        totals = self._new_totals()
+        planner = ShardPlanner(self.max_depth) if self.plan_shards else None
+        for depth, rel_dir, counts in self._iter_counts(max(self.max_depth, MANIFEST_SCAN_DEPTH)):
+            self._merge_counts(totals, depth, counts)
+            if planner is not None:
+                planner.add(rel_dir, depth, counts)
         
-        # Scan for special files
-        for file_path in self._walk_files(depth=2):  # Shallow scan for config files
-            file_name = file_path.name.lower()
-            
-            for lang, patterns in LANGUAGE_PATTERNS.items():
-                if any(self._matches_pattern(file_name, pattern) for pattern in patterns['files']):
-                    language_scores[lang] += patterns['priority'] * 2  # Config files get extra weight
+        if self.cache is not None and self.active_source == SOURCE_FILESYSTEM:
+            self.cache.save(self.project_path)
+        
+        results = self._build_results(totals)
+        if self.sniffer is not None:
+            results['content_sniffing'] = self.sniffer.stats
+        if planner is not None:
+            results['shard_plan'] = planner.plan()
+        if self.profile is not None:
+            results['profile'] = self._profile_block(started, totals['total_files'])
+        return results
+    
+    def scan_files(self, rel_paths: List[str]) -> Dict[str, any]:
+        """Detect languages for an explicit list of project-relative files.
+
+        Used by incremental scans: no directory walk and no depth limit, the
+        same classification as scan_directory() (including content sniffing
+        and ignore rules). The result additionally maps each language to its
+        files. Every detected language gets its scanners recommended, however
+        few of the listed files it has.
+        """
+        started = time.perf_counter()
+        self._root = os.fspath(self.project_path)
+        if self.ignore_matcher is not None:
+            kept = [rel_path for rel_path in rel_paths if not self.ignore_matcher.is_ignored(rel_path)]
+            if self.profile is not None:
+                self.profile.count('files_pruned_ignore', len(rel_paths) - len(kept))
+            rel_paths = kept
+        totals = self._new_totals()
+        files_by_language = {}
+        for rel_path in rel_paths:
+            dir_path, _, file_name = rel_path.rpartition('/')
+            counts = self._classify_files([file_name], os.path.join(self._root, dir_path))
+            self._merge_counts(totals, 0, counts)
+            for lang in counts.file_hits:
+                files_by_language.setdefault(lang, []).append(rel_path)
+
+        results = self._build_results(totals, min_confidence=0.0)
+        results['files_by_language'] = files_by_language
+        if self.sniffer is not None:
+            results['content_sniffing'] = self.sniffer.stats
+        if self.profile is not None:
+            results['profile'] = self._profile_block(started, totals['total_files'])
+        return results
+
+    @property
+    def walk_depth(self) -> int:
+        """Number of directory levels scan_directory() lists (manifests are looked for deeper)."""
+        return max(self.max_depth, MANIFEST_SCAN_DEPTH)
+
+    def scan_one_directory(self, rel_dir: str) -> Tuple[DirectoryCounts, List[str]]:
+        """List and classify one directory as scan_directory() would, without the cache.
+
+        Returns its counts and the names of the subdirectories the walk
+        descends into. Used by detection_daemon.py to refresh the directories
+        a file-system event touched.
+        """
+        self._root = os.fspath(self.project_path)
+        dir_path = os.path.join(self._root, rel_dir) if rel_dir else self._root
+        file_names, subdirs = self._list_directory(dir_path)
+        if self.ignore_matcher is not None:
+            file_names, subdirs, _ = self._apply_ignores(dir_path, file_names, subdirs)
+        return self._classify_files(file_names, dir_path), [os.path.basename(subdir) for subdir in subdirs]
+
+    def collect_results(self, directories: Iterable[Tuple[int, DirectoryCounts]]) -> Dict[str, any]:
+        """Build the scan_directory() result from (depth, counts) per directory in os.walk order."""
+        totals = self._new_totals()
+        for depth, counts in directories:
+            self._merge_counts(totals, depth, counts)
+        results = self._build_results(totals)
+        if self.sniffer is not None:
+            results['content_sniffing'] = self.sniffer.stats
+        return results
+
+    def _profile_block(self, started: float, files_scanned: int) -> Dict:
+        """The 'profile' entry of the results: phases, counters and run context."""
+        block = self.profile.to_dict(time.perf_counter() - started, files_scanned)
+        block['source'] = self.active_source or SOURCE_FILESYSTEM
+        block['workers'] = self.workers  # phase times are summed over worker threads
+        if self.cache is not None:
+            block['cache'] = self.cache.stats
+        return block
+
+    def _iter_counts(self, max_depth: int) -> Iterator[Tuple[int, str, DirectoryCounts]]:
+        """Yield (depth, relative dir, counts) per directory in os.walk order."""
+        if self.source == SOURCE_GIT_INDEX:
+            try:
+                directories = self._group_tracked_files(max_depth)
+            except GitIndexError:
+                pass  # No usable index - fall back to walking the filesystem
+            else:
+                self.active_source = SOURCE_GIT_INDEX
+                for depth, dir_path, file_names in directories:
+                    yield depth, dir_path, self._classify_files(file_names, os.path.join(self._root, dir_path))
+                return
+        
+        self.active_source = SOURCE_FILESYSTEM
+        if self.workers > 1:
+            walker = ParallelDirectoryWalker(self._scan_one, self.workers, self.profile)
+            for depth, dir_path, counts in walker.walk(self._root, max_depth):
+                yield depth, self._relative(dir_path), counts
+            return
+        for depth, dir_path, counts in self._iter_directories(max_depth):
+            yield depth, self._relative(dir_path), counts
+    
+    def _relative(self, dir_path: str) -> str:
+        """Path of a walked directory relative to the project root ('' for the root)."""
+        return dir_path[len(self._root):].lstrip(os.sep)
+    
+    def _new_totals(self) -> Dict:
+        """Create an empty accumulator for _merge_counts."""
+        return {'total_files': 0, 'file_hits': {}, 'manifest_hits': {}}
+    
+    def _merge_counts(self, totals: Dict, depth: int, counts: DirectoryCounts):
+        """Fold one directory's counts into ``totals``, honouring depth limits.
+
+        Directories must be merged in os.walk (pre-)order so that languages
+        with equal scores keep a stable order in the output.
+        """
+        if depth < self.max_depth:
+            totals['total_files'] += counts.total_files
+            hits = totals['file_hits']
+            for lang, count in counts.file_hits.items():
+                hits[lang] = hits.get(lang, 0) + count
+        if depth < MANIFEST_SCAN_DEPTH:
+            hits = totals['manifest_hits']
+            for lang, count in counts.manifest_hits.items():
+                hits[lang] = hits.get(lang, 0) + count
+    
+    def _build_results(self, totals: Dict, min_confidence: float = RECOMMENDATION_CONFIDENCE) -> Dict:
+        """Turn merged counts into the scan_directory() result document."""
+        language_scores = defaultdict(int)
+        file_counts = defaultdict(int)
+        for lang, count in totals['file_hits'].items():
+            language_scores[lang] += LANGUAGE_PATTERNS[lang]['priority'] * count
+            file_counts[lang] += count
+        for lang, count in totals['manifest_hits'].items():
+            language_scores[lang] += LANGUAGE_PATTERNS[lang]['priority'] * 2 * count  # Config files get extra weight
         
         # Convert to results
         detected_languages = []
@@ -178,38 +612,204 @@ class LanguageDetector:
         
         return {
             'detected_languages': detected_languages,
-            'total_files_scanned': total_files,
+            'total_files_scanned': totals['total_files'],
             'scan_path': str(self.project_path),
-            'recommendations': self._generate_recommendations(detected_languages)
+            'recommendations': self._generate_recommendations(detected_languages, min_confidence)
         }
     
-    def _walk_files(self, depth: int = None):
-        """Walk through project files, respecting ignore patterns."""
-        max_depth = depth or self.max_depth
+    def _classify_files(self, file_names: List[str], dir_path: Optional[str] = None) -> DirectoryCounts:
+        """Classify the files of one directory by extension and manifest name.
+
+        With a content sniffer, files that neither the extension index nor
+        the manifest matcher resolved are identified from their first bytes.
+        """
+        extension_index = self.extension_index
+        match_manifest = self.manifest_matcher.match
+        file_hits = {}
+        manifest_hits = {}
+        exact_manifest_hits = {}
+        exact_lookups = 0
+        unresolved = []
+        if self.profile is not None:
+            self.profile.count('files_classified', len(file_names))
+            self.profile.count('pattern_match_attempts',
+                               len(file_names) * (1 + self.manifest_matcher.lookups_per_name))
+        for file_name in file_names:
+            suffix = file_suffix(file_name)
+            langs = extension_index.get(suffix, ())
+            for lang in langs:
+                file_hits[lang] = file_hits.get(lang, 0) + 1
+            lowered = file_name.lower()
+            manifest_langs = match_manifest(lowered)
+            for lang in manifest_langs:
+                manifest_hits[lang] = manifest_hits.get(lang, 0) + 1
+            # The detector's scores keep matching lower-cased names; shard roots
+            # need the case-correct match so Gemfile, Makefile, ... count
+            exact_langs = manifest_langs
+            if lowered != file_name:
+                exact_langs = match_manifest(file_name)
+                exact_lookups += 1
+            for lang in exact_langs:
+                exact_manifest_hits[lang] = exact_manifest_hits.get(lang, 0) + 1
+            if not langs and not manifest_langs and suffix not in NON_SOURCE_SUFFIXES:
+                unresolved.append(file_name)
         
-        for root, dirs, files in os.walk(self.project_path):
-            # Calculate current depth
-            current_depth = len(Path(root).relative_to(self.project_path).parts)
-            if current_depth >= max_depth:
-                dirs.clear()  # Don't recurse deeper
-                continue
-            
-            # Remove ignored directories
-            dirs[:] = [d for d in dirs if d not in self.ignore_dirs]
-            
-            # Yield files
-            for file_name in files:
-                yield Path(root) / file_name
+        if self._sniff is not None and dir_path is not None:
+            for file_name in unresolved:
+                lang = self._sniff(os.path.join(dir_path, file_name))
+                if lang:
+                    file_hits[lang] = file_hits.get(lang, 0) + 1
+        if self.profile is not None and exact_lookups:
+            self.profile.count('pattern_match_attempts', exact_lookups * self.manifest_matcher.lookups_per_name)
+        return DirectoryCounts(len(file_names), file_hits, manifest_hits, exact_manifest_hits)
+    
+    def _scan_one(self, dir_path: str) -> Tuple[DirectoryCounts, List[str]]:
+        """List and classify one directory, reusing cached counts when its mtime is unchanged."""
+        if self.profile is not None:
+            self.profile.count('directories_visited')
+        if self.cache is None:
+            file_names, subdirs = self._list_directory(dir_path)
+            if self.ignore_matcher is not None:
+                file_names, subdirs, _ = self._apply_ignores(dir_path, file_names, subdirs)
+            return self._classify_files(file_names, dir_path), subdirs
+        
+        try:
+            stat = os.stat(dir_path)
+        except OSError:
+            return DirectoryCounts(0, {}, {}, {}), []
+        key = self._relative(dir_path)
+        is_valid = None
+        if self.ignore_matcher is not None:
+            is_valid = lambda stored: self._ignore_state_current(key, stored[2])
+        payload = self.cache.lookup(key, stat, is_valid)
+        if payload is not None:
+            counts, subdir_names = payload[:2]
+            return DirectoryCounts(*counts), [os.path.join(dir_path, name) for name in subdir_names]
+        
+        file_names, subdirs = self._list_directory(dir_path)
+        ignore_state = None
+        if self.ignore_matcher is not None:
+            file_names, subdirs, ignore_state = self._apply_ignores(dir_path, file_names, subdirs)
+        counts = self._classify_files(file_names, dir_path)
+        payload = [list(counts), [os.path.basename(subdir) for subdir in subdirs]]
+        if ignore_state is not None:
+            payload.append(ignore_state)
+        self.cache.store(key, stat, payload)
+        return counts, subdirs
+    
+    def _apply_ignores(self, dir_path: str, file_names: List[str],
+                       subdirs: List[str]) -> Tuple[List[str], List[str], List]:
+        """Drop the entries excluded by .gitignore rules and exclude_paths, before descending.
+
+        Also returns the state a cached listing is validated against: the
+        directory's own .gitignore stat and the signature of every
+        .gitignore above it.
+        """
+        rel_dir = self._relative(dir_path)
+        gitignore_stat = self.ignore_matcher.gitignore_stat(rel_dir) if GITIGNORE in file_names else None
+        rules = self.ignore_matcher.directory(rel_dir, gitignore_stat)
+        kept_files = rules.filter(file_names, False)
+        kept_subdirs = subdirs
+        if subdirs:
+            kept_names = set(rules.filter([os.path.basename(subdir) for subdir in subdirs], True))
+            kept_subdirs = [subdir for subdir in subdirs if os.path.basename(subdir) in kept_names]
+        if self.profile is not None:
+            self.profile.count('files_pruned_ignore', len(file_names) - len(kept_files))
+            self.profile.count('directories_pruned_ignore', len(subdirs) - len(kept_subdirs))
+        return kept_files, kept_subdirs, [gitignore_stat, rules.signature]
+    
+    def _ignore_state_current(self, rel_dir: str, ignore_state: List) -> bool:
+        """Whether a cached listing was filtered with the .gitignore rules in force now."""
+        gitignore_stat, signature = ignore_state
+        if gitignore_stat is not None:  # edited in place without touching the directory mtime?
+            gitignore_stat = self.ignore_matcher.gitignore_stat(rel_dir)
+        return self.ignore_matcher.directory(rel_dir, gitignore_stat).signature == signature
     
-    def _matches_pattern(self, file_name: str, pattern: str) -> bool:
-        """Check if file name matches pattern (supports simple wildcards)."""
-        if '*' in pattern:
-            import fnmatch
-            return fnmatch.fnmatch(file_name, pattern)
-        return file_name == pattern
+    def _list_directory(self, dir_path: str) -> Tuple[List[str], List[str]]:
+        """List one directory, returning (file names, subdirectories to descend into).
+
+        Mirrors os.walk: anything that is not a directory counts as a file,
+        ignored and symlinked directories are not descended into.
+        """
+        file_names = []
+        subdirs = []
+        ignored = 0
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if not is_dir:
+                        file_names.append(entry.name)
+                    elif entry.name in self.ignore_dirs:
+                        ignored += 1
+                    elif not self._is_symlink(entry):
+                        subdirs.append(entry.path)
+        except OSError:
+            return [], []
+        if ignored and self.profile is not None:
+            self.profile.count('directories_pruned_ignore', ignored)
+        return file_names, subdirs
     
-    def _generate_recommendations(self, detected_languages: List[Dict]) -> Dict:
-        """Generate scanner recommendations based on detected languages."""
+    def _group_tracked_files(self, max_depth: int) -> List[Tuple[int, str, List[str]]]:
+        """Group the files tracked in .git/index as (depth, relative dir, names), in pre-order.
+
+        Applies the same ignore_dirs pruning and depth limit as the
+        filesystem walk, without touching the working tree. Of the ignore
+        rules only the configured exclude_paths apply: tracked files are
+        not subject to .gitignore.
+        """
+        files_by_dir = {}
+        allowed_dirs = {'': True}
+        for rel_path in iter_tracked_files(os.fspath(self.project_path)):
+            dir_path, _, file_name = rel_path.rpartition('/')
+            allowed = allowed_dirs.get(dir_path)
+            if allowed is None:
+                parts = dir_path.split('/')
+                ignored = any(part in self.ignore_dirs for part in parts) or (
+                    self.ignore_matcher is not None and self.ignore_matcher.is_ignored(dir_path, True, gitignore=False))
+                allowed = len(parts) < max_depth and not ignored
+                allowed_dirs[dir_path] = allowed
+                if not allowed and self.profile is not None:  # counts directories holding tracked files
+                    self.profile.count('directories_pruned_ignore' if ignored else 'directories_pruned_depth')
+            if allowed and self.ignore_matcher is not None and \
+                    self.ignore_matcher.is_ignored(rel_path, gitignore=False):
+                if self.profile is not None:
+                    self.profile.count('files_pruned_ignore')
+            elif allowed:
+                files_by_dir.setdefault(dir_path, []).append(file_name)
+        
+        ordered = sorted(files_by_dir, key=lambda d: tuple(d.split('/')) if d else ())
+        if self.profile is not None:
+            self.profile.count('directories_visited', len(ordered))
+        return [(d.count('/') + 1 if d else 0, d, files_by_dir[d]) for d in ordered]
+    
+    @staticmethod
+    def _is_symlink(entry: os.DirEntry) -> bool:
+        try:
+            return entry.is_symlink()
+        except OSError:
+            return False
+    
+    def _iter_directories(self, max_depth: int) -> Iterator[Tuple[int, str, DirectoryCounts]]:
+        """Yield (depth, path, counts) for every directory above ``max_depth``, in os.walk order."""
+        if max_depth <= 0:
+            return
+        stack = [(self._root, 0)]
+        while stack:
+            dir_path, depth = stack.pop()
+            counts, subdirs = self._scan_one(dir_path)
+            yield depth, dir_path, counts
+            if depth + 1 < max_depth:
+                stack.extend((subdir, depth + 1) for subdir in reversed(subdirs))
+            elif self.profile is not None and subdirs:
+                self.profile.count('directories_pruned_depth', len(subdirs))
+    
+    def _generate_recommendations(self, detected_languages: List[Dict],
+                                  min_confidence: float = RECOMMENDATION_CONFIDENCE) -> Dict:
+        """Generate scanner recommendations for languages above ``min_confidence``."""
         if not detected_languages:
             return {
                 'recommended_scanners': ['semgrep'],
@@ -222,19 +822,11 @@ class LanguageDetector:
         high_confidence_languages = []
         
         for lang_info in detected_languages:
-            if lang_info['confidence'] > 0.3:  # High confidence threshold
+            if lang_info['confidence'] > min_confidence:
                 high_confidence_languages.append(lang_info['language'])
                 all_scanners.update(lang_info['scanners'])
         
-        # Prioritize scanners based on coverage
-        scanner_priority = {
-            'codeql': 1,    # Highest priority for supported languages
-            'semgrep': 2,   # Good general coverage
-            'bandit': 3,    # Python-specific
-            'eslint': 3     # JS/TS-specific
-        }
-        
-        recommended = sorted(all_scanners, key=lambda x: scanner_priority.get(x, 99))
+        recommended = sorted(all_scanners, key=lambda x: SCANNER_PRIORITY.get(x, 99))
         
         # Generate reasoning
         reasoning_parts = []
@@ -258,8 +850,12 @@ class LanguageDetector:
             'scanner_details': {scanner: SCANNER_INFO[scanner] for scanner in recommended if scanner in SCANNER_INFO}
         }
 
-def generate_scanner_config(recommendations: Dict) -> Dict:
-    """Generate scanner-specific configuration."""
+def generate_scanner_config(recommendations: Dict, detected_languages: Optional[List[Dict]] = None) -> Dict:
+    """Generate scanner-specific configuration.
+
+    With the scan's ``detected_languages``, Semgrep's configuration lists
+    every detected language.
+    """
     config = {
         'scanners': recommendations['recommended_scanners'],
         'scanner_config': {}
@@ -278,6 +874,11 @@ def generate_scanner_config(recommendations: Dict) -> Dict:
                 'rules': 'p/security-audit',
                 'severity': 'ERROR'
             }
+            # Lets scan_orchestrator prune configs/semgrep-rules.yaml (semgrep_rule_pack.py);
+            # low-confidence languages still have files Semgrep will scan
+            if detected_languages:
+                config['scanner_config']['semgrep']['languages'] = [
+                    lang_info['language'] for lang_info in detected_languages]
         elif scanner == 'bandit':
             config['scanner_config']['bandit'] = {
                 'confidence': 'medium',
@@ -303,6 +904,14 @@ Examples:
     python language-detector.py /path/to/project   # Detect in specific directory
     python language-detector.py --json             # Output as JSON
     python language-detector.py --scanners-only    # Show only scanner recommendations
+    python language-detector.py --workers 8        # Parallel walk for large monorepos
+    python language-detector.py --source git-index # Only count files tracked in .git/index
+    python language-detector.py --cache            # Reuse results for unchanged directories
+    python language-detector.py --sniff-content    # Detect extensionless scripts by shebang/modeline
+    python language-detector.py --shards --json    # Per-subproject scanner plan for CI fan-out
+    python language-detector.py --json --profile   # Phase timings and walk counters in the JSON
+    python language-detector.py --profile --profile-dump detect.prof  # cProfile stats for snakeviz/pstats
+    python language-detector.py --no-ignore        # Also count .gitignore'd and exclude_paths content
         """
     )
     
@@ -314,14 +923,76 @@ Examples:
                        help='Show only scanner recommendations')
     parser.add_argument('--depth', type=int, default=3,
                        help='Maximum directory depth to scan (default: 3)')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Number of threads used to walk the directory tree (default: 1)')
+    parser.add_argument('--source', choices=FILE_SOURCES, default=SOURCE_FILESYSTEM,
+                       help='Where to read the file list from (default: filesystem; '
+                            'git-index falls back to filesystem when there is no index)')
+    parser.add_argument('--cache', action='store_true',
+                       help=f'Cache per-directory results in {CACHE_DIR_NAME}/ and only rescan '
+                            'directories whose mtime changed (filesystem source only)')
+    parser.add_argument('--rebuild-cache', action='store_true',
+                       help='Ignore any existing cache and write a fresh one')
+    parser.add_argument('--cache-dir',
+                       help=f'Directory holding the cache (default: <path>/{CACHE_DIR_NAME})')
+    parser.add_argument('--sniff-content', action='store_true',
+                       help='Identify files with unknown extensions from their first bytes '
+                            '(shebangs, Emacs/Vim modelines)')
+    parser.add_argument('--sniff-bytes', type=int, default=DEFAULT_BYTES_PER_FILE,
+                       help=f'Bytes read per file when sniffing (default: {DEFAULT_BYTES_PER_FILE})')
+    parser.add_argument('--sniff-budget', type=int, default=DEFAULT_BYTE_BUDGET,
+                       help=f'Total bytes read when sniffing (default: {DEFAULT_BYTE_BUDGET})')
+    parser.add_argument('--shards', action='store_true',
+                       help='Add a per-subproject shard plan (roots with manifests, their '
+                            'languages, scanners and cost weight)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Time each detection phase and count directories visited/pruned, '
+                            'files classified and pattern-match attempts')
+    parser.add_argument('--profile-file',
+                       help=f'Also write the profile block to this file (e.g. sast-results/{PROFILE_FILE}), '
+                            'where influxdb_integration picks up scan duration and files scanned')
+    parser.add_argument('--profile-dump',
+                       help='Run the scan under cProfile and save the stats here (main thread only)')
+    parser.add_argument('--config', default=DEFAULT_CONFIG_FILE,
+                       help=f'Pipeline configuration whose sast.*.exclude_paths are skipped '
+                            f'(default: {DEFAULT_CONFIG_FILE})')
+    parser.add_argument('--no-ignore', action='store_true',
+                       help='Do not skip paths matched by .gitignore files or the configured exclude_paths')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Enable verbose output')
     
     args = parser.parse_args()
     
     try:
-        detector = LanguageDetector(args.path, max_depth=args.depth)
-        results = detector.scan_directory()
+        sniffer = None
+        if args.sniff_content:
+            sniffer = ContentSniffer(bytes_per_file=args.sniff_bytes, byte_budget=args.sniff_budget)
+        profile = ScanProfile() if args.profile or args.profile_file else None
+        ignore_matcher = None
+        if not args.no_ignore:
+            ignore_matcher = IgnoreMatcher(args.path, excludes_from_config(load_ci_config(args.config)))
+        detector = LanguageDetector(args.path, max_depth=args.depth, workers=args.workers,
+                                    source=args.source, use_cache=args.cache,
+                                    rebuild_cache=args.rebuild_cache, cache_dir=args.cache_dir,
+                                    sniffer=sniffer, plan_shards=args.shards, profile=profile,
+                                    ignore_matcher=ignore_matcher)
+        if args.profile_dump:
+            import cProfile
+            profiler = cProfile.Profile()
+            results = profiler.runcall(detector.scan_directory)
+            profiler.dump_stats(args.profile_dump)
+        else:
+            results = detector.scan_directory()
+        if args.profile_file:
+            write_profile(args.profile_file, results['profile'])
+            if not args.profile:
+                del results['profile']
+        if args.verbose and detector.cache is not None:
+            stats = detector.cache.stats
+            print(f"🗄️  Cache: {stats['hits']} hits, {stats['misses']} misses, "
+                  f"{stats['entries']} directories stored", file=sys.stderr)
+        if args.verbose and detector.active_source != args.source:
+            print(f"⚠️  No usable git index, scanned the {detector.active_source} instead", file=sys.stderr)
         
         if args.json:
             print(json.dumps(results, indent=2))
@@ -331,6 +1002,10 @@ Examples:
             # Human-readable output
             print(f"🔍 Language Detection Results for: {results['scan_path']}")
             print(f"📁 Total files scanned: {results['total_files_scanned']}")
+            if 'content_sniffing' in results:
+                sniffing = results['content_sniffing']
+                print(f"🔬 Content sniffing: {sniffing['files_detected']}/{sniffing['files_sniffed']} files "
+                      f"identified, {sniffing['bytes_read']} bytes read")
             print()
             
             if results['detected_languages']:
@@ -350,6 +1025,20 @@ Examples:
                     info = SCANNER_INFO[scanner]
                     print(f"  • {info['name']:15} - {info['description']}")
             
+            if 'profile' in results:
+                profile_block = results['profile']
+                print(f"\n⏱️  Profile ({profile_block['total_seconds'] * 1000:.1f} ms total):")
+                for phase, timing in profile_block['phases'].items():
+                    print(f"  • {phase:18} {timing['seconds'] * 1000:9.1f} ms  ({timing['calls']} calls)")
+                for counter, value in profile_block['counters'].items():
+                    print(f"  • {counter:30} {value}")
+            
+            if 'shard_plan' in results:
+                print("\n🧩 Shard Plan:")
+                for shard in results['shard_plan']:
+                    print(f"  • {shard['root']:30} {shard['weight_share']:6.1%}  "
+                          f"{', '.join(shard['languages'])} -> {', '.join(shard['scanners'])}")
+            
             print(f"\n📊 Coverage Level: {recommendations['coverage'].title()}")
             print(f"💡 Reasoning: {recommendations['reasoning']}")
             
@@ -0,0 +1,775 @@
+#!/usr/bin/env python3
+"""
+Notify Dispatcher - Concurrent Slack/email/Teams/webhook/Jira notifications
+
+Purpose: Send the pipeline notifications of send_notifications.sh to every
+         enabled channel at once from one asyncio loop. HTTP channels share
+         keep-alive connections per host (through HTTPS_PROXY/HTTP_PROXY
+         unless NO_PROXY matches, as curl does), email goes out in one SMTP
+         session for all recipients. Each channel has its own deadline inside a
+         global one, and transient failures (network errors, 429, 5xx) are
+         retried with full-jitter backoff. Several events (e.g. an org-wide
+         run where many repositories fail at once) are coalesced into one
+         digest per channel and a single Jira ticket. Repositories that got
+         a ticket recently are not ticketed again.
+Usage: python notify_dispatcher.py <status> [pipeline_type] [custom_message] [options]
+Example: python notify_dispatcher.py failure "SAST Scan" --deadline 30
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import random
+import smtplib
+import socket
+import ssl
+import sys
+import threading
+import time
+import urllib.request
+from email.message import EmailMessage
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from detection_cache import CACHE_DIR_NAME
+from sast_config import DEFAULT_CONFIG_FILE, get_setting, load_ci_config
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ('critical', 'high', 'medium', 'low')
+STATUS_EMOJI = {'success': '✅', 'failure': '❌', 'warning': '⚠️'}
+
+DEFAULT_DEADLINE_SECONDS = 30
+DEFAULT_CHANNEL_TIMEOUT_SECONDS = 15
+DEFAULT_RETRIES = 3
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8
+DEFAULT_JIRA_DEDUP_HOURS = 24
+DEFAULT_STATE_FILE = os.path.join(CACHE_DIR_NAME, 'notify-state.json')
+DIGEST_MAX_LINES = 20
+MAX_RESPONSE_BYTES = 1024 * 1024
+MAX_PROXY_HEADER_BYTES = 64 * 1024
+USER_AGENT = 'sast-notify-dispatcher/1.0'
+
+# Worth another attempt; any other non-2xx will fail the same way again
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class NotificationError(RuntimeError):
+    """A channel failed; ``retryable`` says whether trying again may help."""
+
+    def __init__(self, message: str, retryable: bool = False, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class Channel(NamedTuple):
+    name: str
+    kind: str                   # 'http' or 'smtp'
+    target: str                 # URL, or host:port for SMTP
+    payload: Any                # JSON document, or EmailMessage
+    options: Dict               # headers (http) / SMTP settings
+    on_success: Optional[Callable[[], None]] = None
+
+
+class Proxy(NamedTuple):
+    host: str
+    port: int
+    authorization: Optional[str]  # Proxy-Authorization header value, from the proxy URL's user info
+
+
+class HTTPPool:
+    """Minimal asyncio HTTP/1.1 client keeping connections alive per origin.
+
+    Proxies come from the environment (``proxies`` defaults to
+    urllib.request.getproxies(), so HTTPS_PROXY, HTTP_PROXY and NO_PROXY
+    apply). https:// requests are tunnelled with CONNECT, http:// requests
+    are sent to the proxy in absolute form.
+    """
+
+    def __init__(self, proxies: Optional[Dict[str, str]] = None, ssl_context: Optional[ssl.SSLContext] = None):
+        self._idle: Dict[Tuple[str, str, int], List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+        self._ssl = ssl_context or ssl.create_default_context()
+        self._proxies = urllib.request.getproxies() if proxies is None else proxies
+
+    def proxy_for(self, scheme: str, host: str) -> Optional[Proxy]:
+        """The proxy requests to ``scheme``://``host`` go through; None to connect directly."""
+        url = self._proxies.get(scheme)
+        if not url or urllib.request.proxy_bypass_environment(host, self._proxies):
+            return None
+        parts = urlsplit(url if '://' in url else f'http://{url}')
+        if parts.scheme != 'http' or not parts.hostname:
+            raise NotificationError(f"unsupported {scheme} proxy {url!r} (only http:// proxies)")
+        authorization = None
+        if parts.username is not None:
+            credentials = f'{unquote(parts.username)}:{unquote(parts.password or "")}'
+            authorization = 'Basic ' + base64.b64encode(credentials.encode('utf-8')).decode('ascii')
+        return Proxy(parts.hostname, parts.port or 80, authorization)
+
+    async def post_json(self, url: str, document: Any, headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict, bytes]:
+        body = json.dumps(document).encode('utf-8')
+        return await self.request('POST', url, body, dict({'Content-Type': 'application/json'}, **(headers or {})))
+
+    async def request(self, method: str, url: str, body: bytes, headers: Dict[str, str]) -> Tuple[int, Dict, bytes]:
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise NotificationError(f"unsupported URL {url!r}")
+        origin = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        host = parts.netloc.rpartition('@')[2]
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        proxy = self.proxy_for(parts.scheme, parts.hostname)
+        forwarded = proxy is not None and parts.scheme == 'http'
+        if forwarded:
+            path = f'http://{host}{path}'  # absolute form: the proxy forwards it
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {host}',
+                 f'Content-Length: {len(body)}', f'User-Agent: {USER_AGENT}', 'Connection: keep-alive']
+        if forwarded and proxy.authorization:
+            lines.append(f'Proxy-Authorization: {proxy.authorization}')
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        request = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+        idle = self._idle.setdefault(origin, [])
+        while True:
+            reused = bool(idle)
+            reader, writer = idle.pop() if reused else await self._open(origin, proxy)
+            try:
+                writer.write(request)
+                await writer.drain()
+                status, response_headers, response = await self._read_response(reader)
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                writer.close()
+                if reused:
+                    continue  # the server dropped an idle keep-alive connection; use a fresh one
+                raise NotificationError(f"connection to {origin[1]} lost: {e}", retryable=True)
+            except BaseException:
+                writer.close()  # cancelled mid-response: the connection cannot be reused
+                raise
+            if response_headers.get('connection', '').lower() == 'close':
+                writer.close()
+            else:
+                idle.append((reader, writer))
+            return status, response_headers, response
+
+    async def _open(self, origin: Tuple[str, str, int], proxy: Optional[Proxy]):
+        scheme, host, port = origin
+        try:
+            if proxy is None:
+                return await asyncio.open_connection(host, port, ssl=self._ssl if scheme == 'https' else None)
+            if scheme == 'http':
+                return await asyncio.open_connection(proxy.host, proxy.port)
+            sock = await self._tunnel(proxy, host, port)
+            try:
+                return await asyncio.open_connection(sock=sock, ssl=self._ssl, server_hostname=host)
+            except BaseException:
+                sock.close()
+                raise
+        except OSError as e:
+            via = f" via proxy {proxy.host}:{proxy.port}" if proxy is not None else ''
+            raise NotificationError(f"cannot connect to {host}:{port}{via}: {e}", retryable=True)
+
+    @staticmethod
+    async def _tunnel(proxy: Proxy, host: str, port: int) -> socket.socket:
+        """A socket connected to ``host``:``port`` through an HTTP CONNECT tunnel.
+
+        TLS is started on it afterwards, so this works the same on every
+        Python version with asyncio.open_connection(sock=...).
+        """
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(proxy.host, proxy.port, type=socket.SOCK_STREAM)
+        sock = None
+        error: OSError = OSError(f"no address for {proxy.host}")
+        for family, type_, proto, _, address in infos:
+            sock = socket.socket(family, type_, proto)
+            sock.setblocking(False)
+            try:
+                await loop.sock_connect(sock, address)
+                break
+            except OSError as e:
+                sock.close()
+                sock, error = None, e
+            except BaseException:
+                sock.close()
+                raise
+        if sock is None:
+            raise error
+
+        try:
+            lines = [f'CONNECT {host}:{port} HTTP/1.1', f'Host: {host}:{port}', f'User-Agent: {USER_AGENT}']
+            if proxy.authorization:
+                lines.append(f'Proxy-Authorization: {proxy.authorization}')
+            await loop.sock_sendall(sock, ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+            # Nothing follows the proxy's answer until the TLS handshake starts, so reading
+            # up to the blank line cannot swallow bytes of the tunnelled connection
+            response = b''
+            while b'\r\n\r\n' not in response:
+                data = await loop.sock_recv(sock, 4096)
+                if not data:
+                    raise ConnectionResetError('proxy closed the connection')
+                response += data
+                if len(response) > MAX_PROXY_HEADER_BYTES:
+                    raise NotificationError(f"proxy {proxy.host} sent an oversized response")
+            status_line = response.split(b'\r\n', 1)[0].decode('latin-1')
+            try:
+                status = int(status_line.split(None, 2)[1])
+            except (IndexError, ValueError):
+                raise NotificationError(f"malformed proxy status line {status_line[:80]!r}")
+            if status != 200:
+                raise NotificationError(f"proxy {proxy.host}:{proxy.port} refused CONNECT to {host}: {status_line}",
+                                        retryable=status in RETRYABLE_STATUS)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str], bytes]:
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError('connection closed by peer')
+        try:
+            status = int(status_line.split(None, 2)[1])
+        except (IndexError, ValueError):
+            raise NotificationError(f"malformed status line {status_line[:80]!r}")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            received = 0
+            while True:
+                size_line = await reader.readline()
+                try:
+                    size = int(size_line.split(b';')[0], 16)
+                    if size < 0:
+                        raise ValueError(size)
+                except ValueError:
+                    raise NotificationError(f"malformed chunk size {size_line[:80]!r}")
+                if size == 0:
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass  # trailers
+                    break
+                chunk = await reader.readexactly(size)
+                await reader.readexactly(2)
+                received += size
+                if received <= MAX_RESPONSE_BYTES:
+                    chunks.append(chunk)
+            return status, headers, b''.join(chunks)
+        if 'content-length' in headers:
+            try:
+                length = int(headers['content-length'])
+                if length < 0:
+                    raise ValueError(length)
+            except ValueError:
+                raise NotificationError(f"malformed Content-Length {headers['content-length'][:80]!r}")
+            return status, headers, await reader.readexactly(length)
+        if status in (204, 304) or 100 <= status < 200:
+            return status, headers, b''
+        headers['connection'] = 'close'  # body delimited by EOF
+        return status, headers, await reader.read(MAX_RESPONSE_BYTES)
+
+    async def close(self):
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+
+def _retry_after(headers: Dict[str, str]) -> Optional[float]:
+    try:
+        return float(headers['retry-after'])
+    except (KeyError, ValueError):
+        return None
+
+
+def _run_in_daemon_thread(func: Callable, *args) -> asyncio.Future:
+    """Run blocking ``func`` without letting it delay interpreter exit past the deadline."""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def settle(result, error):
+        if not future.done():
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def run():
+        try:
+            result, error = func(*args), None
+        except BaseException as e:
+            result, error = None, e
+        try:
+            loop.call_soon_threadsafe(settle, result, error)
+        except RuntimeError:
+            pass  # loop already closed after the deadline
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def _send_mail(target: str, message: EmailMessage, options: Dict, timeout: float):
+    host, _, port = target.rpartition(':')
+    port = int(port)
+    smtp_class = smtplib.SMTP_SSL if port == 465 else smtplib.SMTP
+    try:
+        with smtp_class(host, port, timeout=timeout) as smtp:
+            smtp.ehlo()
+            if smtp_class is smtplib.SMTP:
+                if smtp.has_extn('starttls'):
+                    smtp.starttls(context=ssl.create_default_context())
+                    smtp.ehlo()
+                elif options.get('require_tls', True):
+                    raise NotificationError(f"{host} does not offer STARTTLS")
+            if options.get('password'):
+                smtp.login(options['user'], options['password'])
+            refused = smtp.send_message(message)  # one session for every recipient
+    except smtplib.SMTPResponseException as e:
+        raise NotificationError(f"SMTP {e.smtp_code}: {e.smtp_error!r}", retryable=400 <= e.smtp_code < 500)
+    except (OSError, smtplib.SMTPException) as e:
+        raise NotificationError(f"SMTP {host}:{port}: {e}", retryable=True)
+    if refused:
+        logger.warning(f"⚠️  Recipients refused: {', '.join(refused)}")
+
+
+async def _send_once(channel: Channel, pool: HTTPPool, deadline: float):
+    loop = asyncio.get_running_loop()
+    if channel.kind == 'smtp':
+        await _run_in_daemon_thread(_send_mail, channel.target, channel.payload, channel.options,
+                                    max(0.1, deadline - loop.time()))
+        return
+    status, headers, body = await pool.post_json(channel.target, channel.payload, channel.options)
+    if 200 <= status < 300:
+        return
+    detail = body[:200].decode('utf-8', 'replace').strip()
+    raise NotificationError(f"HTTP {status}{': ' + detail if detail else ''}",
+                            retryable=status in RETRYABLE_STATUS, retry_after=_retry_after(headers))
+
+
+async def _send_with_retry(channel: Channel, pool: HTTPPool, deadline: float, retries: int) -> int:
+    """Deliver ``channel``, returning the number of attempts it took."""
+    loop = asyncio.get_running_loop()
+    for attempt in range(retries + 1):
+        try:
+            await _send_once(channel, pool, deadline)
+            return attempt + 1
+        except NotificationError as e:
+            if not e.retryable or attempt == retries:
+                raise
+            # Full jitter: concurrent pipelines hitting the same outage do not retry in lockstep
+            delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+            if e.retry_after is not None:
+                delay = max(delay, e.retry_after)
+            if loop.time() + delay >= deadline:
+                raise
+            logger.warning(f"🔁 {channel.name}: {e}; retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+async def dispatch(channels: List[Channel], deadline_seconds: float = DEFAULT_DEADLINE_SECONDS,
+                   channel_timeout: float = DEFAULT_CHANNEL_TIMEOUT_SECONDS,
+                   retries: int = DEFAULT_RETRIES) -> Dict[str, Dict]:
+    """Send every channel concurrently; returns {channel: {status, seconds, attempts|error}}."""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + deadline_seconds
+    pool = HTTPPool()
+
+    async def run(channel: Channel) -> Dict:
+        channel_deadline = min(deadline, loop.time() + channel_timeout)
+        try:
+            attempts = await asyncio.wait_for(_send_with_retry(channel, pool, channel_deadline, retries),
+                                              max(0.0, channel_deadline - loop.time()))
+        except asyncio.TimeoutError:
+            result = {'status': 'timeout'}
+        except NotificationError as e:
+            result = {'status': 'failed', 'error': str(e)}
+        except Exception as e:  # one broken channel must not cancel the others
+            result = {'status': 'failed', 'error': f'{type(e).__name__}: {e}'}
+        else:
+            result = {'status': 'sent', 'attempts': attempts}
+            if channel.on_success is not None:
+                try:
+                    channel.on_success()
+                except Exception as e:
+                    logger.warning(f"⚠️  {channel.name} was sent but its follow-up failed: {e}")
+        result['seconds'] = round(loop.time() - started, 3)
+        return result
+
+    try:
+        results = await asyncio.gather(*(run(channel) for channel in channels))
+    finally:
+        await pool.close()
+    return {channel.name: result for channel, result in zip(channels, results)}
+
+
+# --- events and messages ---------------------------------------------------
+
+def _read_json(path: Path) -> Optional[Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def event_from_results(status: str, results_dir: Path) -> Dict:
+    """The notification event for this pipeline run (overall-summary.json + GitHub environment)."""
+    overall = _read_json(results_dir / 'overall-summary.json') or {}
+    totals = overall.get('total_vulnerabilities') or {}
+    repository = os.environ.get('GITHUB_REPOSITORY', 'Unknown')
+    event = {
+        'repository': repository,
+        'branch': os.environ.get('GITHUB_REF_NAME', 'Unknown'),
+        'commit': os.environ.get('GITHUB_SHA', 'Unknown'),
+        'status': status,
+        'total': int(overall.get('total_findings') or 0),
+    }
+    event.update({severity: int(totals.get(severity) or 0) for severity in SEVERITIES})
+    if os.environ.get('GITHUB_RUN_ID'):
+        event['run_url'] = (f"{os.environ.get('GITHUB_SERVER_URL', 'https://github.com')}/{repository}"
+                            f"/actions/runs/{os.environ['GITHUB_RUN_ID']}")
+    return event
+
+
+def load_events(path: str) -> List[Dict]:
+    """Events from an NDJSON file ('-' for stdin), one per repository run; later lines win."""
+    handle = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    events = {}
+    try:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            event = json.loads(line)
+            event.setdefault('repository', 'Unknown')
+            event.setdefault('branch', 'Unknown')
+            event.setdefault('status', 'unknown')
+            for severity in SEVERITIES:
+                event[severity] = int(event.get(severity) or 0)
+            event['total'] = int(event.get('total') or sum(event[severity] for severity in SEVERITIES))
+            events[(event['repository'], event['branch'])] = event
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+    return list(events.values())
+
+
+def should_notify(trigger: str, status: str) -> bool:
+    """Same rules as should_send_notification() in send_notifications.sh."""
+    if trigger == 'on_failure':
+        return status == 'failure'
+    if trigger == 'on_success':
+        return status == 'success'
+    return trigger != 'never'
+
+
+def _overall_status(events: List[Dict]) -> str:
+    statuses = {event['status'] for event in events}
+    for status in ('failure', 'warning', 'success'):
+        if status in statuses:
+            return status
+    return events[0]['status']
+
+
+def _title(events: List[Dict], context: Dict) -> str:
+    status = _overall_status(events)
+    emoji = STATUS_EMOJI.get(status, '🔍')
+    if len(events) == 1:
+        return f"{emoji} {context['pipeline_type']} Status: {status.upper()}"
+    failed = sum(1 for event in events if event['status'] == 'failure')
+    return f"{emoji} {context['pipeline_type']}: {failed} of {len(events)} repositories failed"
+
+
+def _event_line(event: Dict) -> str:
+    return (f"{event['repository']}@{event['branch']}: {event['status'].upper()} - "
+            f"{event['critical']} critical, {event['high']} high, {event['total']} total")
+
+
+def _digest_lines(events: List[Dict]) -> List[str]:
+    ordered = sorted(events, key=lambda event: (event['status'] != 'failure', -event['critical'],
+                                                -event['high'], event['repository']))
+    lines = [_event_line(event) for event in ordered[:DIGEST_MAX_LINES]]
+    if len(ordered) > DIGEST_MAX_LINES:
+        lines.append(f"... and {len(ordered) - DIGEST_MAX_LINES} more")
+    return lines
+
+
+def _summary_text(event: Dict) -> str:
+    return (f"🔴 Critical: {event['critical']}\n🟠 High: {event['high']}\n"
+            f"🟡 Medium: {event['medium']}\n🔵 Low: {event['low']}\n\nTotal Findings: {event['total']}")
+
+
+def text_body(events: List[Dict], context: Dict) -> str:
+    """Plain-text message used for email and Jira descriptions."""
+    lines = [_title(events, context), '']
+    if len(events) == 1:
+        event = events[0]
+        lines += [f"Repository: {event['repository']}", f"Branch: {event['branch']}",
+                  f"Commit: {event.get('commit', 'Unknown')}", f"Timestamp: {context['timestamp']}", '',
+                  'Vulnerability Summary:', _summary_text(event), '']
+    else:
+        lines += [f"Timestamp: {context['timestamp']}", ''] + _digest_lines(events) + ['']
+    if context.get('custom_message'):
+        lines += ['Additional Information:', context['custom_message'], '']
+    run_urls = [event['run_url'] for event in events if event.get('run_url')]
+    if len(run_urls) == 1:
+        lines.append(f"View full results: {run_urls[0]}")
+    return '\n'.join(lines)
+
+
+def slack_payload(events: List[Dict], context: Dict) -> Dict:
+    title = _title(events, context)
+    blocks = [{'type': 'header', 'text': {'type': 'plain_text', 'text': title}}]
+    if len(events) == 1:
+        event = events[0]
+        blocks.append({'type': 'section', 'fields': [
+            {'type': 'mrkdwn', 'text': f"*Repository:*\n{event['repository']}"},
+            {'type': 'mrkdwn', 'text': f"*Branch:*\n{event['branch']}"},
+            {'type': 'mrkdwn', 'text': f"*Commit:*\n{event.get('commit', 'Unknown')}"},
+            {'type': 'mrkdwn', 'text': f"*Timestamp:*\n{context['timestamp']}"},
+        ]})
+        blocks.append({'type': 'section', 'text': {
+            'type': 'mrkdwn', 'text': '*Vulnerability Summary:*\n' + _summary_text(event).replace(
+                'Total Findings:', '*Total Findings:*')}})
+    else:
+        blocks.append({'type': 'section', 'text': {
+            'type': 'mrkdwn', 'text': '\n'.join(f'• {line}' for line in _digest_lines(events))}})
+    if context.get('custom_message'):
+        blocks.append({'type': 'section', 'text': {
+            'type': 'mrkdwn', 'text': f"*Additional Information:*\n{context['custom_message']}"}})
+    return {'text': title, 'blocks': blocks}
+
+
+def teams_payload(events: List[Dict], context: Dict) -> Dict:
+    title = _title(events, context)
+    if len(events) == 1:
+        event = events[0]
+        section = {'activityTitle': title, 'activitySubtitle': f"Repository: {event['repository']}",
+                   'facts': [{'name': 'Branch', 'value': event['branch']},
+                             {'name': 'Commit', 'value': event.get('commit', 'Unknown')},
+                             {'name': 'Total Findings', 'value': str(event['total'])},
+                             {'name': 'Critical', 'value': str(event['critical'])},
+                             {'name': 'High', 'value': str(event['high'])}]}
+    else:
+        section = {'activityTitle': title, 'text': '<br>'.join(_digest_lines(events))}
+    return {'@type': 'MessageCard', '@context': 'http://schema.org/extensions',
+            'themeColor': '00FF00' if _overall_status(events) == 'success' else 'FF0000',
+            'summary': title, 'sections': [section]}
+
+
+def email_message(events: List[Dict], context: Dict, sender: str, sender_name: str,
+                  recipients: List[str], subject_prefix: str) -> EmailMessage:
+    message = EmailMessage()
+    status = _overall_status(events).upper()
+    subject = (f"{events[0]['repository']}" if len(events) == 1
+               else f"{len(events)} repositories")
+    message['Subject'] = f"{subject_prefix} [{context['pipeline_type']}] {status} - {subject}".strip()
+    message['From'] = f'{sender_name} <{sender}>' if sender_name else sender
+    message['To'] = ', '.join(recipients)
+    message.set_content(text_body(events, context))
+    return message
+
+
+def jira_payload(events: List[Dict], context: Dict, jira: Dict) -> Dict:
+    status = _overall_status(events).upper()
+    summary = (f"{context['pipeline_type']} {status} - {events[0]['repository']}" if len(events) == 1
+               else f"{context['pipeline_type']} {status} - {len(events)} repositories")
+    fields = {
+        'project': {'key': jira['project_key']},
+        'summary': summary,
+        'description': text_body(events, context),
+        'issuetype': {'name': jira.get('issue_type') or 'Bug'},
+        'priority': {'name': jira.get('priority') or 'High'},
+        'labels': jira.get('labels') or ['security-vulnerability', 'sast-scan', 'auto-created'],
+    }
+    if jira.get('components'):
+        fields['components'] = [{'name': name} for name in jira['components']]
+    return {'fields': fields}
+
+
+class JiraDedupState:
+    """Remembers which repositories got a ticket recently, so repeated failures are not re-ticketed."""
+
+    def __init__(self, path: str, window_seconds: float):
+        self.path = path
+        self.window_seconds = window_seconds
+        self.now = time.time()
+        data = _read_json(Path(path)) or {}
+        self.ticketed = {key: stamp for key, stamp in (data.get('ticketed') or {}).items()
+                         if self.now - stamp < window_seconds}
+
+    @staticmethod
+    def key(event: Dict) -> str:
+        return f"{event['repository']}|{event['branch']}|{event['status']}"
+
+    def is_recent(self, event: Dict) -> bool:
+        return self.key(event) in self.ticketed
+
+    def record(self, events: List[Dict]):
+        self.ticketed.update({self.key(event): self.now for event in events})
+        target = Path(self.path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temporary = target.with_name(target.name + '.tmp')
+        temporary.write_text(json.dumps({'ticketed': self.ticketed}, indent=2) + '\n')
+        os.replace(temporary, target)
+
+
+def _ticket_worthy(event: Dict, severities: List[str]) -> bool:
+    return event['status'] == 'failure' or any(event.get(severity, 0) > 0 for severity in severities)
+
+
+def build_channels(config: Dict, events: List[Dict], context: Dict, state_file: str = DEFAULT_STATE_FILE,
+                   only: Optional[List[str]] = None) -> List[Channel]:
+    """The channels enabled in ``config`` with their payloads for ``events``."""
+    channels = []
+
+    def enabled(name: str, integration_key: str) -> bool:
+        if only is not None and name not in only:
+            return False
+        if get_setting(config, f'notifications.channels.{name}', True) is False:
+            return False
+        return get_setting(config, f'{integration_key}.enabled', False) is True
+
+    slack_url = os.environ.get('SLACK_WEBHOOK') or get_setting(config, 'integrations.slack.webhook_url', '')
+    if enabled('slack', 'integrations.slack') and slack_url:
+        channels.append(Channel('slack', 'http', slack_url, slack_payload(events, context), {}))
+    else:
+        logger.info("⚠️  Slack notifications disabled or webhook not configured")
+
+    teams_url = os.environ.get('TEAMS_WEBHOOK') or get_setting(config, 'integrations.teams.webhook_url', '')
+    if enabled('teams', 'integrations.teams') and teams_url:
+        channels.append(Channel('teams', 'http', teams_url, teams_payload(events, context), {}))
+
+    webhook_url = os.environ.get('NOTIFY_WEBHOOK_URL') or get_setting(config, 'integrations.webhook.url', '')
+    if (only is None or 'webhook' in only) and webhook_url and \
+            (os.environ.get('NOTIFY_WEBHOOK_URL') or get_setting(config, 'integrations.webhook.enabled', False)):
+        channels.append(Channel('webhook', 'http', webhook_url, {
+            'title': _title(events, context), 'pipeline': context['pipeline_type'],
+            'status': _overall_status(events), 'timestamp': context['timestamp'],
+            'message': context.get('custom_message') or None, 'events': events}, {}))
+
+    email = get_setting(config, 'notifications.email', {})
+    recipients = [recipient for recipient in email.get('recipients') or () if recipient]
+    if enabled('email', 'notifications.email') and email.get('smtp_server') and email.get('sender_email') \
+            and recipients:
+        message = email_message(events, context, email['sender_email'], email.get('sender_name', ''),
+                                recipients, email.get('subject_prefix', ''))
+        channels.append(Channel('email', 'smtp', f"{email['smtp_server']}:{email.get('smtp_port', 587)}", message, {
+            'user': email['sender_email'], 'password': os.environ.get('EMAIL_SMTP_PASSWORD'),
+            'require_tls': email.get('require_tls', True)}))
+    else:
+        logger.info("⚠️  Email notifications disabled or not configured")
+
+    jira = get_setting(config, 'integrations.jira', {})
+    token = os.environ.get('JIRA_API_TOKEN')
+    if enabled('jira', 'integrations.jira') and jira.get('server_url') and jira.get('project_key') and token:
+        severities = jira.get('create_on_severity') or ['critical', 'high']
+        dedup = JiraDedupState(state_file, float(jira.get('dedup_hours', DEFAULT_JIRA_DEDUP_HOURS)) * 3600)
+        worthy = [event for event in events if _ticket_worthy(event, severities)]
+        fresh = [event for event in worthy if not dedup.is_recent(event)]
+        if len(fresh) < len(worthy):
+            logger.info(f"🎫 {len(worthy) - len(fresh)} repositories already ticketed recently, not ticketed again")
+        if fresh:
+            user = os.environ.get('JIRA_USER') or jira.get('assignee') or 'admin'
+            auth = base64.b64encode(f'{user}:{token}'.encode('utf-8')).decode('ascii')
+            channels.append(Channel('jira', 'http', jira['server_url'].rstrip('/') + '/rest/api/2/issue',
+                                    jira_payload(fresh, context, jira), {'Authorization': f'Basic {auth}'},
+                                    on_success=lambda: dedup.record(fresh)))
+    else:
+        logger.info("⚠️  Jira integration disabled or not configured")
+    return channels
+
+
+def main() -> int:
+    """Main entry point with proper error handling."""
+    parser = argparse.ArgumentParser(
+        description='📨 Send SAST notifications to every channel concurrently',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+    python notify_dispatcher.py failure "SAST Scan"               # This run, all enabled channels
+    python notify_dispatcher.py --events failures.ndjson          # One digest for many repositories
+    python notify_dispatcher.py failure --channels slack --dry-run # Show the Slack payload only
+        """
+    )
+    parser.add_argument('status', nargs='?', default='unknown', help='Pipeline status (success, failure, ...)')
+    parser.add_argument('pipeline_type', nargs='?', default='SAST Scan', help='Pipeline name (default: SAST Scan)')
+    parser.add_argument('custom_message', nargs='?', default='', help='Extra text added to every message')
+    parser.add_argument('--events', help="NDJSON events, one per repository run ('-' for stdin), "
+                                         "coalesced into one notification per channel")
+    parser.add_argument('--results-dir', default='./sast-results',
+                        help='Results of this run when --events is not given (default: ./sast-results)')
+    parser.add_argument('--config', default=DEFAULT_CONFIG_FILE,
+                        help=f'Pipeline configuration file (default: {DEFAULT_CONFIG_FILE})')
+    parser.add_argument('--channels', help='Comma-separated subset: slack,teams,webhook,email,jira')
+    parser.add_argument('--deadline', type=float, default=DEFAULT_DEADLINE_SECONDS,
+                        help=f'Seconds until every channel must be done (default: {DEFAULT_DEADLINE_SECONDS})')
+    parser.add_argument('--channel-timeout', type=float, default=DEFAULT_CHANNEL_TIMEOUT_SECONDS,
+                        help=f'Seconds per channel, retries included (default: {DEFAULT_CHANNEL_TIMEOUT_SECONDS})')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help=f'Retries after a transient failure (default: {DEFAULT_RETRIES})')
+    parser.add_argument('--state-file', default=DEFAULT_STATE_FILE,
+                        help=f'Where recently ticketed repositories are remembered (default: {DEFAULT_STATE_FILE})')
+    parser.add_argument('--dry-run', action='store_true', help='Print the payloads instead of sending them')
+    args = parser.parse_args()
+
+    try:
+        config = load_ci_config(args.config)
+        if not get_setting(config, 'notifications.enabled', True):
+            logger.info("⚠️  Notifications are disabled")
+            return 0
+        trigger = get_setting(config, 'notifications.trigger', 'on_failure')
+        events = load_events(args.events) if args.events else [event_from_results(args.status, Path(args.results_dir))]
+        events = [event for event in events if should_notify(trigger, event['status'])]
+        if not events:
+            logger.info(f"⚠️  Notification not triggered based on current settings (trigger: {trigger})")
+            return 0
+
+        context = {'pipeline_type': args.pipeline_type, 'custom_message': args.custom_message,
+                   'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())}
+        only = [name.strip() for name in args.channels.split(',')] if args.channels else None
+        channels = build_channels(config, events, context, args.state_file, only)
+        if args.dry_run:
+            for channel in channels:
+                payload = channel.payload.as_string() if channel.kind == 'smtp' else json.dumps(
+                    channel.payload, indent=2, ensure_ascii=False)
+                print(f"--- {channel.name} -> {channel.target}\n{payload}")
+            return 0
+        if not channels:
+            logger.info("⚠️  No notification channel configured")
+            return 0
+
+        logger.info(f"📨 Notifying {len(events)} event(s) via {', '.join(channel.name for channel in channels)}...")
+        results = asyncio.run(dispatch(channels, args.deadline, args.channel_timeout, max(0, args.retries)))
+        for name, result in results.items():
+            if result['status'] == 'sent':
+                logger.info(f"✅ {name} sent in {result['seconds']:.2f}s ({result['attempts']} attempt(s))")
+            elif result['status'] == 'timeout':
+                logger.error(f"⏱️  {name} timed out after {result['seconds']:.2f}s")
+            else:
+                logger.error(f"❌ {name} failed: {result['error']}")
+        return 0 if all(result['status'] == 'sent' for result in results.values()) else 1
+    except KeyboardInterrupt:
+        logger.error("Operation cancelled by user")
+        return 130
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
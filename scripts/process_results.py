@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+SAST Results Processor - Streaming replacement for the jq fan-out
+
+Purpose: Read each scanner report exactly once with an incremental JSON
+         parser (bounded memory, even for SARIF files of hundreds of MB),
+         bucket findings by severity and write the same <scanner>-summary.json
+         and overall-summary.json files as process_results.sh. CodeQL SARIF
+         results are bucketed by rule security-severity, falling back to the
+         result/rule level. The findings are kept as memory-mappable columns
+         in <scanner>-findings.cols (see findings_store.py), which give the
+         per-file and per-rule counts and each finding's identity, so the
+         overall summary can merge findings reported by more than one
+         scanner (see finding_dedup.py).
+Usage: python process_results.py [scanner|all] [scan_type] [options]
+Example: python process_results.py all full --config ci-config.yaml
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from finding_dedup import Deduplicator, cwe_family, normalize_path, snippet_hash
+from findings_history import DEFAULT_HISTORY_DB, record_results
+from findings_store import COLUMNS_SUFFIX, ColumnarFindings, FindingsTable
+from json_stream import iter_items
+from sast_config import DEFAULT_CONFIG_FILE, get_setting, load_ci_config
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ('critical', 'high', 'medium', 'low')
+OVERALL_SUMMARY = 'overall-summary.json'
+
+# Report file (glob) each scanner writes, relative to the reports directory
+REPORT_FILES = {
+    'codeql': 'codeql-results*.sarif',
+    'semgrep': 'semgrep-results.json',
+    'bandit': 'bandit-report.json',
+    'eslint': 'eslint-report.json',
+}
+
+SEMGREP_SEVERITY = {'ERROR': 'critical', 'WARNING': 'high', 'INFO': 'medium'}
+BANDIT_SEVERITY = {'HIGH': 'high', 'MEDIUM': 'medium', 'LOW': 'low'}
+ESLINT_SEVERITY = {2: 'high', 1: 'medium'}
+SARIF_LEVEL_SEVERITY = {'error': 'high', 'warning': 'medium', 'note': 'low', 'none': 'low'}
+
+SARIF_RESULTS = 'runs.*.results.*'
+SARIF_RULES = ('runs.*.tool.driver.rules.*', 'runs.*.tool.extensions.*.rules.*')
+
+
+def security_severity_bucket(score: float) -> str:
+    """Map a CVSS-style security-severity score to a bucket (GitHub code scanning ranges)."""
+    if score >= 9.0:
+        return 'critical'
+    if score >= 7.0:
+        return 'high'
+    if score >= 4.0:
+        return 'medium'
+    return 'low'
+
+
+class SarifRules:
+    """Severity hints from the rules of the SARIF run currently being read."""
+
+    def __init__(self):
+        self.by_id = {}
+        self.by_index = []
+
+    def add(self, rule: Dict):
+        properties = rule.get('properties') or {}
+        score = properties.get('security-severity')
+        try:
+            score = float(score) if score is not None else None
+        except (TypeError, ValueError):
+            score = None
+        level = (rule.get('defaultConfiguration') or {}).get('level')
+        hint = (score, level, properties.get('tags'))
+        self.by_index.append(hint)
+        if rule.get('id'):
+            self.by_id[rule['id']] = hint
+
+    def lookup(self, result: Dict) -> Tuple[Optional[float], Optional[str], Optional[List[str]]]:
+        rule_ref = result.get('rule') or {}
+        rule_id = result.get('ruleId') or rule_ref.get('id')
+        if rule_id in self.by_id:
+            return self.by_id[rule_id]
+        index = result.get('ruleIndex', rule_ref.get('index'))
+        if isinstance(index, int) and 0 <= index < len(self.by_index):
+            return self.by_index[index]
+        return None, None, None
+
+
+def iter_sarif(path: str) -> Iterator[Tuple[Optional[str], Dict]]:
+    """Yield (severity bucket, result) for every result of a SARIF file."""
+    rules = SarifRules()
+    in_results = False
+    with open(path, 'r', encoding='utf-8') as handle:
+        for index, item in iter_items(handle, (SARIF_RESULTS,) + SARIF_RULES):
+            if index:
+                if in_results:  # rules after results belong to the next run
+                    rules, in_results = SarifRules(), False
+                rules.add(item)
+                continue
+            in_results = True
+            score, default_level, rule_tags = rules.lookup(item)
+            properties = item.get('properties') or {}
+            if rule_tags and not properties.get('tags'):
+                item['properties'] = dict(properties, tags=rule_tags)  # CWE tags live on the rule
+            if score is not None:
+                yield security_severity_bucket(score), item
+            else:
+                level = item.get('level') or default_level or 'warning'
+                yield SARIF_LEVEL_SEVERITY.get(level, 'low'), item
+
+
+def iter_semgrep(path: str) -> Iterator[Tuple[Optional[str], Dict]]:
+    with open(path, 'r', encoding='utf-8') as handle:
+        for _, item in iter_items(handle, ('results.*',)):
+            yield SEMGREP_SEVERITY.get((item.get('extra') or {}).get('severity')), item
+
+
+def iter_bandit(path: str) -> Iterator[Tuple[Optional[str], Dict]]:
+    with open(path, 'r', encoding='utf-8') as handle:
+        for _, item in iter_items(handle, ('results.*',)):
+            yield BANDIT_SEVERITY.get(item.get('issue_severity')), item
+
+
+def iter_eslint(path: str) -> Iterator[Tuple[Optional[str], Dict]]:
+    with open(path, 'r', encoding='utf-8') as handle:
+        for _, file_result in iter_items(handle, ('*',)):
+            file_path = file_result.get('filePath')
+            for message in file_result.get('messages') or ():
+                message.setdefault('filePath', file_path)
+                yield ESLINT_SEVERITY.get(message.get('severity')), message
+
+
+REPORT_READERS = {
+    'codeql': iter_sarif,
+    'semgrep': iter_semgrep,
+    'bandit': iter_bandit,
+    'eslint': iter_eslint,
+}
+
+
+def find_reports(scanner: str, reports_dir: Path) -> List[str]:
+    return sorted(glob.glob(str(reports_dir / REPORT_FILES[scanner])))
+
+
+def iter_findings(scanner: str, reports: List[str]) -> Iterator[Tuple[Optional[str], Dict]]:
+    """Yield (severity bucket, raw finding) across all report files of a scanner."""
+    reader = REPORT_READERS[scanner]
+    for report in reports:
+        yield from reader(report)
+
+
+def count_findings(findings: Iterator[Tuple[Optional[str], Any]]) -> Tuple[Dict[str, int], int]:
+    """Count findings per severity bucket in one pass; returns (buckets, total)."""
+    counts = dict.fromkeys(SEVERITIES, 0)
+    total = 0
+    for severity, _ in findings:
+        total += 1
+        if severity in counts:
+            counts[severity] += 1
+    return counts, total
+
+
+def _reported_line(snippet: Optional[str], line: int, numbered: bool = False) -> Optional[str]:
+    """The source line a finding points at, from a scanner-provided snippet."""
+    if not snippet or snippet == 'requires login':  # Semgrep OSS redacts lines
+        return None
+    lines = snippet.splitlines()
+    if not numbered:
+        return lines[0] if lines else None
+    prefix = str(line)
+    for text in lines:  # Bandit prefixes every context line with its number
+        number, _, rest = text.partition(' ')
+        if number == prefix:
+            return rest
+    return None
+
+
+def finding_fields(scanner: str, item: Dict,
+                   source_root: Optional[str] = None) -> Tuple[str, int, Optional[str], str, str]:
+    """Normalized (path, line, rule, family, snippet hash) of a raw finding."""
+    if scanner == 'codeql':
+        location = ((item.get('locations') or [{}])[0] or {}).get('physicalLocation') or {}
+        region = location.get('region') or {}
+        path = (location.get('artifactLocation') or {}).get('uri', '')
+        line = region.get('startLine') or 0
+        family = cwe_family((item.get('properties') or {}).get('tags'))
+        rule = item.get('ruleId') or (item.get('rule') or {}).get('id')
+        snippet = _reported_line((region.get('snippet') or {}).get('text'), line)
+    elif scanner == 'semgrep':
+        extra = item.get('extra') or {}
+        path = item.get('path', '')
+        line = (item.get('start') or {}).get('line') or 0
+        family = cwe_family((extra.get('metadata') or {}).get('cwe'))
+        rule = item.get('check_id')
+        snippet = _reported_line(extra.get('lines'), line)
+    elif scanner == 'bandit':
+        path = item.get('filename', '')
+        line = item.get('line_number') or 0
+        family = cwe_family((item.get('issue_cwe') or {}).get('id'))
+        rule = item.get('test_id')
+        snippet = _reported_line(item.get('code'), line, numbered=True)
+    else:
+        path = item.get('filePath', '')
+        line = item.get('line') or 0
+        family = None
+        rule = item.get('ruleId')
+        snippet = _reported_line(item.get('source'), line)
+    return (normalize_path(path, source_root), int(line), rule, family or f'{scanner}:{rule}',
+            snippet_hash(snippet))
+
+
+def record_findings(scanner: str, findings: Iterator[Tuple[Optional[str], Dict]], table: FindingsTable,
+                    source_root: Optional[str] = None) -> Iterator[Tuple[Optional[str], Dict]]:
+    """Pass findings through unchanged, appending each one to the findings columns."""
+    append = table.append
+    for severity, item in findings:
+        path, line, rule, family, snippet = finding_fields(scanner, item, source_root)
+        append(scanner, severity, path, line, rule, family, snippet)
+        yield severity, item
+
+
+def write_json(path: Path, data: Dict):
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(data, handle, indent=2)
+        handle.write('\n')
+
+
+def scanner_summary(scanner: str, counts: Dict[str, int], total: int,
+                    scan_type: str, timestamp: str) -> Dict:
+    return {
+        'scanner': scanner,
+        'timestamp': timestamp,
+        'scan_type': scan_type,
+        'vulnerabilities': counts,
+        'total_findings': total,
+        'status': 'completed',
+    }
+
+
+def process_scanner(scanner: str, reports_dir: Path, results_dir: Path,
+                    scan_type: str, timestamp: str, source_root: Optional[str] = None) -> Optional[Dict]:
+    """Summarize one scanner's reports into <scanner>-summary.json (plus the
+    findings columns, see findings_store.py)."""
+    reports = find_reports(scanner, reports_dir)
+    if not reports:
+        logger.warning(f"⚠️  No {scanner} results file found")
+        return None
+    logger.info(f"📊 Processing {scanner} results...")
+    table = FindingsTable()
+    counts, total = count_findings(record_findings(scanner, iter_findings(scanner, reports), table, source_root))
+    table.write(results_dir / f'{scanner}{COLUMNS_SUFFIX}')
+    summary = scanner_summary(scanner, counts, total, scan_type, timestamp)
+    write_json(results_dir / f'{scanner}-summary.json', summary)
+    logger.info(f"✅ {scanner}: " + ', '.join(f"{k.title()}: {v}" for k, v in counts.items())
+                + f" (total {total})")
+    return summary
+
+
+def load_summaries(results_dir: Path) -> List[Dict]:
+    """Read every <scanner>-summary.json once (overall-summary.json excluded)."""
+    summaries = []
+    for path in sorted(results_dir.glob('*-summary.json')):
+        if path.name == OVERALL_SUMMARY:
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as handle:
+                summary = json.load(handle)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️  Skipping unreadable {path.name}: {e}")
+            continue
+        if isinstance(summary, dict) and isinstance(summary.get('vulnerabilities'), dict):
+            summaries.append(summary)
+    return summaries
+
+
+def deduplicate_findings(results_dir: Path, summaries: List[Dict]) -> Tuple[Dict[str, int], Dict]:
+    """Merge the findings of all scanners through one index; returns (totals, report).
+
+    Scanners whose summary has no findings columns (e.g. written by the shell
+    processor) cannot be merged and contribute their bucket counts as is.
+    """
+    dedup = Deduplicator()
+    unmerged = dict.fromkeys(SEVERITIES, 0)
+    for summary in summaries:
+        scanner = summary.get('scanner')
+        try:
+            findings = ColumnarFindings(results_dir / f'{scanner}{COLUMNS_SUFFIX}')
+        except (OSError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"⚠️  Cannot merge {scanner} findings: {e}")
+            for severity in SEVERITIES:
+                unmerged[severity] += int(summary['vulnerabilities'].get(severity) or 0)
+            continue
+        with findings:
+            for identity in findings.identities():
+                dedup.add(scanner, *identity)
+
+    merged = dedup.severity_counts()
+    totals = {severity: merged[severity] + unmerged[severity] for severity in SEVERITIES}
+    scanner_stats = dedup.scanner_stats()
+    report = {
+        'scanners': scanner_stats,
+        'duplicates_removed': sum(stats['raw'] for stats in scanner_stats.values()) - dedup.total,
+    }
+    return totals, report
+
+
+def generate_overall_summary(results_dir: Path, scan_type: str, timestamp: str,
+                             thresholds: Dict) -> Dict:
+    """Aggregate the scanner summaries and apply the configured thresholds.
+
+    Totals count every distinct finding once, even when several scanners
+    report it; the plain per-scanner sums are kept as raw_total_*.
+    """
+    logger.info("📋 Generating overall summary...")
+    summaries = load_summaries(results_dir)
+    raw_totals = dict.fromkeys(SEVERITIES, 0)
+    for summary in summaries:
+        for severity in SEVERITIES:
+            raw_totals[severity] += int(summary['vulnerabilities'].get(severity) or 0)
+    totals, deduplication = deduplicate_findings(results_dir, summaries)
+
+    status = 'success'
+    if totals['critical'] > thresholds['max_critical']:
+        status = 'failure'
+        logger.error(f"❌ Critical vulnerabilities ({totals['critical']}) exceed threshold "
+                     f"({thresholds['max_critical']})")
+    elif totals['high'] > thresholds['max_high']:
+        status = 'failure'
+        logger.error(f"❌ High vulnerabilities ({totals['high']}) exceed threshold ({thresholds['max_high']})")
+    else:
+        logger.info("✅ Vulnerability counts within acceptable thresholds")
+
+    overall = {
+        'timestamp': timestamp,
+        'scan_type': scan_type,
+        'status': status,
+        'thresholds': thresholds,
+        'total_vulnerabilities': totals,
+        'total_findings': sum(totals.values()),
+        'raw_total_vulnerabilities': raw_totals,
+        'raw_total_findings': sum(raw_totals.values()),
+        'deduplication': deduplication,
+        'scanners_run': [summary.get('scanner') for summary in summaries],
+    }
+    write_json(results_dir / OVERALL_SUMMARY, overall)
+    logger.info("📊 Scan Summary: " + ', '.join(f"{k.title()}: {v}" for k, v in totals.items())
+                + f", Status: {status}")
+    if deduplication['duplicates_removed']:
+        logger.info(f"🔗 Merged {deduplication['duplicates_removed']} duplicate findings "
+                    f"({overall['raw_total_findings']} raw → {overall['total_findings']} distinct)")
+    return overall
+
+
+def load_thresholds(config_file: str) -> Dict:
+    config = load_ci_config(config_file)
+    return {
+        'severity_threshold': get_setting(config, 'sast.severity_threshold', 'medium'),
+        'max_critical': int(get_setting(config, 'sast.max_critical_vulnerabilities', 0)),
+        'max_high': int(get_setting(config, 'sast.max_high_vulnerabilities', 5)),
+    }
+
+
+def write_github_output(overall: Dict):
+    """Expose the results as GitHub Actions step outputs when running in CI."""
+    output_file = os.environ.get('GITHUB_OUTPUT')
+    if not output_file:
+        return
+    totals = overall['total_vulnerabilities']
+    with open(output_file, 'a', encoding='utf-8') as handle:
+        handle.write(f"scan_status={overall['status']}\n")
+        handle.write(f"total_critical={totals['critical']}\n")
+        handle.write(f"total_high={totals['high']}\n")
+        handle.write(f"total_findings={overall['total_findings']}\n")
+
+
+def main() -> int:
+    """Main entry point with proper error handling."""
+    parser = argparse.ArgumentParser(
+        description='📊 Process SAST scanner reports into summary files',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+    python process_results.py semgrep full        # Summarize semgrep-results.json
+    python process_results.py all                 # Summarize every report present
+    python process_results.py --scanner codeql    # Same as the positional form
+        """
+    )
+    parser.add_argument('scanner_name', nargs='?', default='all',
+                        help=f"Scanner to process: {', '.join(REPORT_FILES)} or all (default: all)")
+    parser.add_argument('scan_type', nargs='?', default='full',
+                        help='Scan type recorded in the summaries (default: full)')
+    parser.add_argument('--scanner', help='Alternative to the positional scanner name')
+    parser.add_argument('--config', default=DEFAULT_CONFIG_FILE,
+                        help=f'Pipeline configuration file (default: {DEFAULT_CONFIG_FILE})')
+    parser.add_argument('--reports-dir', default='.',
+                        help='Directory holding the scanner reports (default: current directory)')
+    parser.add_argument('--results-dir', default='./sast-results',
+                        help='Directory for summary files (default: ./sast-results)')
+    parser.add_argument('--source-root', default=None,
+                        help='Checkout root that absolute report paths are made relative to '
+                             '(default: current directory)')
+    parser.add_argument('--history-db', default=None,
+                        help=f'Findings history to append this run to (default: reporting.history.database '
+                             f'or {DEFAULT_HISTORY_DB})')
+    parser.add_argument('--no-history', action='store_true',
+                        help="Do not record this run in the findings history (only 'all' records it)")
+    args = parser.parse_args()
+
+    try:
+        scanner_name = args.scanner or args.scanner_name
+        timestamp = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        reports_dir = Path(args.reports_dir)
+        results_dir = Path(args.results_dir)
+        results_dir.mkdir(parents=True, exist_ok=True)
+
+        if scanner_name == 'all':
+            scanners = list(REPORT_FILES)
+        elif scanner_name in REPORT_FILES:
+            scanners = [scanner_name]
+        else:
+            logger.warning(f"⚠️  Unknown scanner: {scanner_name}")
+            scanners = []
+        for scanner in scanners:
+            process_scanner(scanner, reports_dir, results_dir, args.scan_type, timestamp,
+                            args.source_root)
+
+        overall = generate_overall_summary(results_dir, args.scan_type, timestamp,
+                                           load_thresholds(args.config))
+        write_github_output(overall)
+
+        config = load_ci_config(args.config)
+        if scanner_name != 'all':
+            logger.info("🗃️  History is recorded by the 'all' invocation, skipped")
+        elif not args.no_history and get_setting(config, 'reporting.history.enabled', True):
+            record_results(results_dir, args.history_db
+                           or get_setting(config, 'reporting.history.database', DEFAULT_HISTORY_DB))
+        logger.info("✅ Results processing completed")
+        return 0
+    except KeyboardInterrupt:
+        logger.error("Operation cancelled by user")
+        return 130
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
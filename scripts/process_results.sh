@@ -14,6 +14,15 @@ TIMESTAMP=$(date -u +"%Y-%m-%dT%H:%M:%SZ")
 RESULTS_DIR="./sast-results"
 CONFIG_FILE="ci-config.yaml"
 
+# Prefer the streaming Python processor (reads each report once, buckets CodeQL
+# severities). Set SAST_SHELL_PROCESSOR=1 to force the jq implementation below.
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+if [ -z "${SAST_SHELL_PROCESSOR:-}" ] && command -v python3 >/dev/null 2>&1 \
+    && [ -f "$SCRIPT_DIR/process_results.py" ]; then
+    exec python3 "$SCRIPT_DIR/process_results.py" "$SCANNER_NAME" "$SCAN_TYPE" \
+        --config "$CONFIG_FILE" --results-dir "$RESULTS_DIR"
+fi
+
 # Colors for output
 RED='\033[0;31m'
 GREEN='\033[0;32m'
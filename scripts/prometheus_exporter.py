@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Prometheus Exporter - Long-running /metrics endpoint for SAST results
+
+Purpose: Serve the series update_grafana.sh pushes to the pushgateway (and
+         that prometheus-config/sast_rules.yml alerts on) straight from the
+         sast-results directory. A watcher thread re-parses a summary file
+         only when its mtime/size/inode changes and re-renders the exposition
+         text once; scrapes just return the pre-rendered bytes. Scan duration
+         and per-scanner runtimes are also collected into histograms, one
+         observation per new scanner-runs.json.
+Usage: python prometheus_exporter.py [--results-dir DIR] [--port PORT]
+Example: python prometheus_exporter.py --results-dir ./sast-results --port 9469
+"""
+
+import argparse
+import calendar
+import gzip
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 9469
+DEFAULT_POLL_SECONDS = 5.0
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+OVERALL_SUMMARY = 'overall-summary.json'
+RUNS_FILE = 'scanner-runs.json'
+SEVERITIES = ('critical', 'high', 'medium', 'low')
+
+SCAN_DURATION_BUCKETS = (30, 60, 120, 300, 600, 900, 1200, 1800, 2700, 3600)
+SCANNER_RUNTIME_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+
+def escape_label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{escape_label(value)}"' for key, value in labels.items()) + '}'
+
+
+def format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Histogram:
+    """Cumulative Prometheus histogram, one child per label set."""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float], label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.label_names = label_names
+        self.children: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, *label_values: str):
+        child = self.children.setdefault(label_values, [[0] * len(self.buckets), 0.0, 0])
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                child[0][index] += 1
+        child[1] += value
+        child[2] += 1
+
+    def render(self, base_labels: Dict[str, str]) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for label_values, (counts, total, count) in sorted(self.children.items()):
+            labels = dict(base_labels, **dict(zip(self.label_names, label_values)))
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{format_labels(dict(labels, le=format_value(bound)))} {bucket_count}')
+            lines.append(f'{self.name}_bucket{format_labels(dict(labels, le="+Inf"))} {count}')
+            lines.append(f'{self.name}_sum{format_labels(labels)} {format_value(total)}')
+            lines.append(f'{self.name}_count{format_labels(labels)} {count}')
+        return lines
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[int]:
+    try:
+        return calendar.timegm(time.strptime(value, '%Y-%m-%dT%H:%M:%SZ'))
+    except (TypeError, ValueError):
+        return None
+
+
+class ResultsWatcher:
+    """Tracks the sast-results files and keeps the rendered metrics up to date."""
+
+    def __init__(self, results_dir: Path, repository: str):
+        self.results_dir = results_dir
+        self.base_labels = {'repository': repository}
+        self._stats: Dict[str, Tuple[int, int, int]] = {}
+        self._parsed: Dict[str, Dict] = {}
+        self._last_run_id = None
+        self.reloads = 0
+        self.parse_errors = 0
+        self.scan_histogram = Histogram('sast_scan_run_duration_seconds',
+                                        'Wall time of complete SAST scanner runs', SCAN_DURATION_BUCKETS)
+        self.scanner_histogram = Histogram('sast_scanner_runtime_seconds', 'Wall time of each scanner run',
+                                           SCANNER_RUNTIME_BUCKETS, ('scanner',))
+        self.rendered = b''
+        self.rendered_gzip = b''
+        self.render()
+
+    def poll(self) -> bool:
+        """Re-parse changed files; returns True if the metrics were re-rendered."""
+        try:
+            names = [entry.name for entry in os.scandir(self.results_dir)
+                     if entry.name.endswith('-summary.json') or entry.name == RUNS_FILE]
+        except OSError:
+            names = []
+        changed = False
+        for name in names:
+            try:
+                stat = os.stat(self.results_dir / name)
+            except OSError:
+                continue
+            signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            if self._stats.get(name) == signature:
+                continue
+            self._stats[name] = signature
+            try:
+                with open(self.results_dir / name, 'r', encoding='utf-8') as handle:
+                    document = json.load(handle)
+            except (OSError, ValueError):
+                self.parse_errors += 1  # probably mid-write: retried when its stat changes again
+                self._stats.pop(name, None)
+                continue
+            if not isinstance(document, dict):
+                continue
+            self._parsed[name] = document
+            changed = True
+            if name == RUNS_FILE:
+                self._observe_runs(document)
+        for name in set(self._parsed) - set(names):
+            del self._parsed[name]
+            self._stats.pop(name, None)
+            changed = True
+        if changed:
+            self.reloads += 1
+            self.render()
+        return changed
+
+    def _observe_runs(self, runs: Dict):
+        run_id = (runs.get('timestamp'), runs.get('wall_seconds'))
+        if run_id == self._last_run_id:
+            return
+        self._last_run_id = run_id
+        if runs.get('wall_seconds') is not None:
+            self.scan_histogram.observe(float(runs['wall_seconds']))
+        for run in runs.get('scanners') or ():
+            if run.get('status') != 'skipped' and run.get('wall_seconds') is not None:
+                self.scanner_histogram.observe(float(run['wall_seconds']), run.get('scanner', 'unknown'))
+
+    def render(self):
+        labels = self.base_labels
+        overall = self._parsed.get(OVERALL_SUMMARY, {})
+        runs = self._parsed.get(RUNS_FILE, {})
+        totals = overall.get('total_vulnerabilities') or {}
+        lines = []
+
+        def family(name, metric_type, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for sample_labels, value in samples:
+                lines.append(f'{name}{format_labels(dict(labels, **sample_labels))} {format_value(value)}')
+
+        if overall:
+            family('sast_vulnerabilities_total', 'gauge', 'Vulnerabilities found by the last SAST scan',
+                   [({'severity': severity}, int(totals.get(severity) or 0)) for severity in SEVERITIES])
+            family('sast_findings_total', 'gauge', 'Distinct findings of the last SAST scan',
+                   [({}, int(overall.get('total_findings') or 0))])
+            if 'raw_total_findings' in overall:
+                family('sast_raw_findings_total', 'gauge', 'Findings of the last scan before deduplication',
+                       [({}, int(overall['raw_total_findings']))])
+            family('sast_scan_status', 'gauge', 'Status of the last SAST scan (1=success, 0=failure)',
+                   [({}, 1 if overall.get('status') == 'success' else 0)])
+            family('sast_files_scanned_total', 'gauge', 'Files scanned by the last SAST scan',
+                   [({}, int(overall.get('files_scanned') or 0))])
+            timestamp = _parse_timestamp(overall.get('timestamp'))
+            if timestamp is not None:
+                family('sast_scan_timestamp_seconds', 'gauge', 'Unix timestamp of the last scan',
+                       [({}, timestamp)])
+        duration = runs.get('wall_seconds', overall.get('scan_duration'))
+        if duration is not None:
+            family('sast_scan_duration_seconds', 'gauge', 'Time taken by the last SAST scan',
+                   [({}, float(duration))])
+
+        scanner_samples = []
+        for name in sorted(self._parsed):
+            summary = self._parsed[name]
+            if name == OVERALL_SUMMARY or name == RUNS_FILE or 'scanner' not in summary:
+                continue
+            counts = summary.get('vulnerabilities') or {}
+            scanner_samples += [({'scanner': summary['scanner'], 'severity': severity},
+                                 int(counts.get(severity) or 0)) for severity in SEVERITIES]
+        if scanner_samples:
+            family('sast_scanner_vulnerabilities', 'gauge', 'Vulnerabilities per scanner in the last scan',
+                   scanner_samples)
+
+        lines += self.scan_histogram.render(labels)
+        lines += self.scanner_histogram.render(labels)
+        family('sast_exporter_reloads_total', 'counter', 'Times the exporter re-rendered after a change',
+               [({}, self.reloads)])
+        family('sast_exporter_parse_errors_total', 'counter', 'Result files that could not be parsed',
+               [({}, self.parse_errors)])
+
+        text = ('\n'.join(lines) + '\n').encode('utf-8')
+        # Swap both at once so a concurrent scrape never sees a mismatched pair
+        self.rendered, self.rendered_gzip = text, gzip.compress(text, compresslevel=5)
+
+    def run(self, interval: float, stop: threading.Event):
+        while not stop.wait(interval):
+            try:
+                self.poll()
+            except Exception as e:  # keep serving the last good metrics
+                logger.error(f"Unexpected error while reloading results: {e}")
+
+
+def make_handler(watcher: ResultsWatcher):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+        def do_GET(self):
+            if self.path.split('?', 1)[0] == '/metrics':
+                body = watcher.rendered
+                gzipped = 'gzip' in (self.headers.get('Accept-Encoding') or '')
+                if gzipped:
+                    body = watcher.rendered_gzip
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                if gzipped:
+                    self.send_header('Content-Encoding', 'gzip')
+            elif self.path == '/healthz':
+                body = b'ok\n'
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain')
+            else:
+                body = b'not found\n'
+                self.send_response(404)
+                self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return MetricsHandler
+
+
+def main() -> int:
+    """Main entry point with proper error handling."""
+    parser = argparse.ArgumentParser(
+        description='📈 Serve SAST results as Prometheus metrics',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+    python prometheus_exporter.py                            # Serve ./sast-results on :9469
+    python prometheus_exporter.py --results-dir /data/sast   # Watch another directory
+    python prometheus_exporter.py --once                     # Print the metrics and exit
+        """
+    )
+    parser.add_argument('--results-dir', default='./sast-results',
+                        help='Directory with the summary files (default: ./sast-results)')
+    parser.add_argument('--host', default='0.0.0.0', help='Address to listen on (default: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT})')
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_SECONDS,
+                        help=f'Seconds between checks for changed results (default: {DEFAULT_POLL_SECONDS})')
+    parser.add_argument('--repository', default=os.environ.get('GITHUB_REPOSITORY', 'unknown'),
+                        help='repository label value (default: $GITHUB_REPOSITORY)')
+    parser.add_argument('--once', action='store_true', help='Print the current metrics and exit')
+    args = parser.parse_args()
+
+    try:
+        watcher = ResultsWatcher(Path(args.results_dir), args.repository)
+        watcher.poll()
+        if args.once:
+            sys.stdout.write(watcher.rendered.decode('utf-8'))
+            return 0
+
+        stop = threading.Event()
+        thread = threading.Thread(target=watcher.run, args=(args.poll_interval, stop),
+                                  name='results-watcher', daemon=True)
+        thread.start()
+        server = ThreadingHTTPServer((args.host, args.port), make_handler(watcher))
+        server.daemon_threads = True
+        logger.info(f"🚀 Serving metrics for {args.results_dir} on http://{args.host}:{args.port}/metrics")
+        try:
+            server.serve_forever()
+        finally:
+            stop.set()
+            server.server_close()
+        return 0
+    except KeyboardInterrupt:
+        logger.error("Operation cancelled by user")
+        return 130
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+SAST Config - Shared loader for ci-config.yaml
+
+Purpose: Give the Python pipeline tools one way to read ci-config.yaml,
+         mirroring the shell scripts: CONFIG_JSON from the environment wins,
+         then the YAML file (when PyYAML is installed), then built-in defaults.
+Usage: from sast_config import load_ci_config, get_setting
+Example: python sast_config.py sast.codeql.timeout_minutes
+"""
+
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+try:
+    import yaml
+except ImportError:  # PyYAML is optional, callers fall back to defaults
+    yaml = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG_FILE = 'ci-config.yaml'
+
+
+def load_ci_config(config_file: str = DEFAULT_CONFIG_FILE) -> Dict[str, Any]:
+    """Load the pipeline configuration, returning {} when none is available."""
+    config_json = os.environ.get('CONFIG_JSON')
+    if config_json:
+        try:
+            return json.loads(config_json)
+        except ValueError as e:
+            logger.warning(f"Ignoring invalid CONFIG_JSON: {e}")
+
+    path = Path(config_file)
+    if not path.is_file():
+        return {}
+    if yaml is None:
+        logger.warning("PyYAML not installed, using default settings")
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as handle:
+            return yaml.safe_load(handle) or {}
+    except (OSError, yaml.YAMLError) as e:
+        logger.warning(f"Cannot read {path}: {e}")
+        return {}
+
+
+def get_setting(config: Dict[str, Any], dotted_key: str, default: Any = None) -> Any:
+    """Look up ``a.b.c`` in nested dicts, returning ``default`` if any level is missing."""
+    value = config
+    for part in dotted_key.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return default
+        value = value[part]
+    return default if value is None else value
+
+
+def main() -> int:
+    """Print one setting from ci-config.yaml as JSON."""
+    if len(sys.argv) < 2:
+        print("Usage: python sast_config.py <dotted.key> [config_file]", file=sys.stderr)
+        return 1
+    config = load_ci_config(sys.argv[2] if len(sys.argv) > 2 else DEFAULT_CONFIG_FILE)
+    print(json.dumps(get_setting(config, sys.argv[1])))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
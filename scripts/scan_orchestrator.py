@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Scan Orchestrator - Run the recommended SAST scanners concurrently
+
+Purpose: Take the output of generate_scanner_config() (from a fresh language
+         detection or a saved JSON file) and run every scanner as its own
+         process at the same time, longest expected job first, bounded by
+         the CPU count. Per-scanner timeouts come from ci-config.yaml and
+         wall-clock time, CPU time and peak RSS are recorded for each run.
+         Reports are written under the names process_results.sh reads.
+         With --base-ref only the changed files are scanned where the
+         scanner accepts a file list (see incremental_scan.py); with
+         --findings-cache files whose findings are cached are skipped too
+         (see findings_cache.py). Semgrep gets configs/semgrep-rules.yaml
+         pruned to the detected languages (see semgrep_rule_pack.py).
+         The detection's profile is written to the results directory for
+         the scan duration and file count metrics.
+Usage: python scan_orchestrator.py [path] [options]
+Example: python scan_orchestrator.py . --config ci-config.yaml --max-parallel 4
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from detection_cache import CACHE_DIR_NAME
+from findings_cache import DEFAULT_MAX_BYTES, CacheSession, FindingsCache
+from ignore_rules import IgnoreMatcher, excludes_from_config
+from incremental_scan import MODE_INCREMENTAL, plan_incremental_scan
+from sast_config import DEFAULT_CONFIG_FILE, get_setting, load_ci_config
+from scan_profile import PROFILE_FILE, ScanProfile, write_profile
+from semgrep_rule_pack import DEFAULT_RULES_FILE, build_rule_pack
+
+language_detector = importlib.import_module('language-detector')
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT_MINUTES = 30
+KILL_GRACE_SECONDS = 10
+RUNS_FILE_NAME = 'scanner-runs.json'
+
+# Exit codes that mean "scan finished" (1 = findings reported)
+SUCCESS_EXIT_CODES = {
+    'codeql': {0},
+    'semgrep': {0, 1},
+    'bandit': {0, 1},
+    'eslint': {0, 1},
+}
+
+# CodeQL extracts TypeScript with the JavaScript extractor
+CODEQL_LANGUAGES = {'typescript': 'javascript'}
+
+
+class ScannerJob:
+    """One scanner run: a sequence of commands sharing a timeout and a report file."""
+
+    def __init__(self, scanner: str, commands: List[List[str]], report: str, timeout_seconds: float):
+        self.scanner = scanner
+        self.commands = commands
+        self.report = report
+        self.timeout_seconds = timeout_seconds
+        cost = language_detector.SCANNER_COST
+        performance = language_detector.SCANNER_INFO.get(scanner, {}).get('performance')
+        self.expected_cost = cost.get(performance, 1.0)
+
+    def to_dict(self) -> Dict:
+        return {
+            'scanner': self.scanner,
+            'commands': self.commands,
+            'report': self.report,
+            'timeout_seconds': self.timeout_seconds,
+        }
+
+
+def scanner_timeout(ci_config: Dict, scanner: str) -> float:
+    """Timeout for ``scanner`` in seconds: sast.<scanner>.timeout_minutes, then pipeline.timeouts.sast_scan."""
+    minutes = get_setting(ci_config, f'sast.{scanner}.timeout_minutes',
+                          get_setting(ci_config, 'pipeline.timeouts.sast_scan', DEFAULT_TIMEOUT_MINUTES))
+    return float(minutes) * 60
+
+
+def build_jobs(scanner_config: Dict, ci_config: Dict, source_root: str, output_dir: Path,
+               targets: Optional[Dict[str, List[str]]] = None) -> List[ScannerJob]:
+    """Translate generate_scanner_config() output into runnable jobs.
+
+    ``targets`` maps scanners to project-relative files to scan instead of
+    the whole source root; a scanner with an empty list is not started.
+    """
+    jobs = []
+    settings = scanner_config.get('scanner_config', {})
+    for scanner in scanner_config.get('scanners', []):
+        options = settings.get(scanner, {})
+        timeout = scanner_timeout(ci_config, scanner)
+        if targets is not None and scanner in targets:
+            if not targets[scanner]:
+                logger.info(f"⏭️  {scanner}: no files to scan")
+                continue
+            paths = [os.path.join(source_root, path) for path in targets[scanner]]
+        else:
+            paths = [source_root]
+        if scanner == 'codeql':
+            languages = []
+            for lang in options.get('languages', []):
+                lang = CODEQL_LANGUAGES.get(lang, lang)
+                if lang not in languages:
+                    languages.append(lang)
+            if not languages:
+                continue
+            db_dir = output_dir / '.codeql-db'
+            commands = [['codeql', 'database', 'create', str(db_dir), '--db-cluster', '--overwrite',
+                         f'--language={",".join(languages)}', f'--source-root={source_root}']]
+            suite = options.get('queries', 'security-and-quality')
+            for lang in languages:
+                report = 'codeql-results.sarif' if len(languages) == 1 else f'codeql-results-{lang}.sarif'
+                commands.append(['codeql', 'database', 'analyze', str(db_dir / lang),
+                                 f'codeql/{lang}-queries:codeql-suites/{lang}-{suite}.qls',
+                                 '--format=sarif-latest', f'--output={output_dir / report}'])
+            jobs.append(ScannerJob(scanner, commands, str(output_dir / 'codeql-results*.sarif'), timeout))
+        elif scanner == 'semgrep':
+            report = str(output_dir / 'semgrep-results.json')
+            command = ['semgrep', 'scan', '--json', '--output', report]
+            for rules in (options.get('config'), options.get('rules')):
+                if rules:
+                    command += ['--config', rules]
+            custom_rules = get_setting(ci_config, 'sast.semgrep.custom_rules', DEFAULT_RULES_FILE)
+            if custom_rules and Path(custom_rules).is_file():
+                if 'languages' in options and get_setting(ci_config, 'sast.semgrep.prune_rules', True):
+                    try:
+                        pack = build_rule_pack(options['languages'], custom_rules,
+                                               os.path.join(source_root, CACHE_DIR_NAME))
+                    except (OSError, ValueError) as e:
+                        logger.warning(f"⚠️  Cannot prune {custom_rules}, passing it unchanged: {e}")
+                        command += ['--config', custom_rules]
+                    else:
+                        if pack is not None:
+                            command += ['--config', str(pack)]
+                else:
+                    command += ['--config', custom_rules]
+            if options.get('severity'):
+                command += ['--severity', options['severity']]
+            for pattern in get_setting(ci_config, 'sast.semgrep.exclude_paths', []):
+                command += ['--exclude', pattern]
+            jobs.append(ScannerJob(scanner, [command + paths], report, timeout))
+        elif scanner == 'bandit':
+            report = str(output_dir / 'bandit-report.json')
+            command = ['bandit', '-r', *paths, '-f', 'json', '-o', report,
+                       '--confidence-level', options.get('confidence', 'medium'),
+                       '--severity-level', options.get('severity', 'medium')]
+            if Path('configs/bandit.yaml').is_file():
+                command += ['-c', 'configs/bandit.yaml']
+            jobs.append(ScannerJob(scanner, [command], report, timeout))
+        elif scanner == 'eslint':
+            report = str(output_dir / 'eslint-report.json')
+            command = ['npx', '--no-install', 'eslint', *paths, '-f', 'json', '-o', report,
+                       '--ext', ','.join(options.get('extensions', ['.js', '.jsx', '.ts', '.tsx']))]
+            if Path('configs/.eslintrc.security.json').is_file():
+                command += ['--config', 'configs/.eslintrc.security.json']
+            jobs.append(ScannerJob(scanner, [command], report, timeout))
+        else:
+            logger.warning(f"No command known for scanner '{scanner}', skipping")
+    return jobs
+
+
+def _kill_group(process: subprocess.Popen, finished: threading.Event):
+    """Terminate the scanner and everything it spawned, escalating to SIGKILL.
+
+    The child is reaped by the supervising thread, which sets ``finished``;
+    polling here would race with its wait4() call.
+    """
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        return
+    if finished.wait(KILL_GRACE_SECONDS):
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _run_command(command: List[str], timeout: float, log_handle) -> Dict:
+    """Run one command and return exit code, timing and resource usage."""
+    started = time.monotonic()
+    process = subprocess.Popen(command, stdout=log_handle, stderr=subprocess.STDOUT,
+                               start_new_session=True)
+    timed_out = threading.Event()
+    finished = threading.Event()
+
+    def on_timeout():
+        timed_out.set()
+        _kill_group(process, finished)
+
+    timer = threading.Timer(max(timeout, 0), on_timeout)
+    timer.daemon = True
+    timer.start()
+    try:
+        if hasattr(os, 'wait4'):
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            cpu_seconds = usage.ru_utime + usage.ru_stime
+            peak_rss_kb = usage.ru_maxrss
+        else:
+            process.wait()
+            cpu_seconds = None
+            peak_rss_kb = None
+    finally:
+        finished.set()
+        timer.cancel()
+
+    return {
+        'exit_code': process.returncode,
+        'timed_out': timed_out.is_set(),
+        'wall_seconds': time.monotonic() - started,
+        'cpu_seconds': cpu_seconds,
+        'peak_rss_kb': peak_rss_kb,
+    }
+
+
+def run_job(job: ScannerJob, log_dir: Path) -> Dict:
+    """Run a job's commands in order within the job's timeout budget."""
+    result = {
+        'scanner': job.scanner,
+        'status': 'completed',
+        'report': job.report,
+        'exit_code': None,
+        'wall_seconds': 0.0,
+        'cpu_seconds': 0.0,
+        'peak_rss_kb': 0,
+        'timeout_seconds': job.timeout_seconds,
+    }
+    missing = [cmd[0] for cmd in job.commands if shutil.which(cmd[0]) is None]
+    if missing:
+        result['status'] = 'skipped'
+        result['reason'] = f"{missing[0]} not found on PATH"
+        logger.warning(f"⚠️  {job.scanner}: {result['reason']}")
+        return result
+
+    logger.info(f"🚀 Starting {job.scanner}")
+    log_path = log_dir / f'{job.scanner}.log'
+    result['log'] = str(log_path)
+    with open(log_path, 'wb') as log_handle:
+        for command in job.commands:
+            remaining = job.timeout_seconds - result['wall_seconds']
+            run = _run_command(command, remaining, log_handle)
+            result['exit_code'] = run['exit_code']
+            result['wall_seconds'] += run['wall_seconds']
+            if run['cpu_seconds'] is None:
+                result['cpu_seconds'] = result['peak_rss_kb'] = None
+            elif result['cpu_seconds'] is not None:
+                result['cpu_seconds'] += run['cpu_seconds']
+                result['peak_rss_kb'] = max(result['peak_rss_kb'], run['peak_rss_kb'])
+            if run['timed_out']:
+                result['status'] = 'timeout'
+                break
+            if run['exit_code'] not in SUCCESS_EXIT_CODES.get(job.scanner, {0}):
+                result['status'] = 'failed'
+                break
+
+    result['wall_seconds'] = round(result['wall_seconds'], 3)
+    if result['cpu_seconds'] is not None:
+        result['cpu_seconds'] = round(result['cpu_seconds'], 3)
+    icon = '✅' if result['status'] == 'completed' else '❌'
+    logger.info(f"{icon} {job.scanner} {result['status']} in {result['wall_seconds']:.1f}s")
+    return result
+
+
+def schedule(jobs: List[ScannerJob]) -> List[ScannerJob]:
+    """Order jobs longest expected first, ties broken by scanner priority."""
+    priority = language_detector.SCANNER_PRIORITY
+    return sorted(jobs, key=lambda job: (-job.expected_cost, priority.get(job.scanner, 99)))
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (respects container/affinity limits)."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def run_scanners(jobs: List[ScannerJob], max_parallel: Optional[int], log_dir: Path) -> List[Dict]:
+    """Run jobs concurrently; parallelism is capped by the CPU count."""
+    if not jobs:
+        return []
+    cpus = available_cpus()
+    workers = max(1, min(len(jobs), max_parallel or cpus, cpus))
+    log_dir.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scanner') as pool:
+        futures = [pool.submit(run_job, job, log_dir) for job in schedule(jobs)]
+        return [future.result() for future in futures]
+
+
+def main() -> int:
+    """Main entry point with proper error handling."""
+    parser = argparse.ArgumentParser(
+        description='🚀 Run recommended SAST scanners concurrently',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+    python scan_orchestrator.py                          # Detect languages and scan current directory
+    python scan_orchestrator.py --scanner-config cfg.json  # Use a saved generate_scanner_config() result
+    python scan_orchestrator.py --dry-run                # Show the job plan without running it
+    python scan_orchestrator.py --base-ref origin/main   # Scan only what this branch changed
+    python scan_orchestrator.py --findings-cache         # Reuse findings for unchanged files
+        """
+    )
+    parser.add_argument('path', nargs='?', default='.',
+                        help='Project path to scan (default: current directory)')
+    parser.add_argument('--config', default=DEFAULT_CONFIG_FILE,
+                        help=f'Pipeline configuration file (default: {DEFAULT_CONFIG_FILE})')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--scanner-config',
+                        help='JSON file with generate_scanner_config() output (default: run detection)')
+    source.add_argument('--base-ref',
+                        help='Incremental mode: scan only files changed since this branch, tag or commit')
+    parser.add_argument('--head-ref', default='HEAD',
+                        help='Revision compared with --base-ref (default: HEAD)')
+    parser.add_argument('--output-dir', default='.',
+                        help='Directory for scanner reports (default: current directory)')
+    parser.add_argument('--results-dir', default='./sast-results',
+                        help='Directory for run metrics and logs (default: ./sast-results)')
+    parser.add_argument('--max-parallel', type=int,
+                        help='Maximum scanners running at once (default and cap: CPU count)')
+    parser.add_argument('--findings-cache', action='store_true',
+                        help='Scan only files without cached findings and merge the cached ones '
+                             'into the reports')
+    parser.add_argument('--cache-dir',
+                        help='Findings cache directory (default: <path>/.sast-cache)')
+    parser.add_argument('--cache-size-mb', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help='Findings cache size limit; least recently used entries are evicted '
+                             f'(default: {DEFAULT_MAX_BYTES // (1024 * 1024)})')
+    parser.add_argument('--no-ignore', action='store_true',
+                        help='Also detect and scan files matched by .gitignore or the configured exclude_paths')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Print the scheduled jobs as JSON and exit')
+    args = parser.parse_args()
+
+    try:
+        ci_config = load_ci_config(args.config)
+        ignore_matcher = None
+        if not args.no_ignore:
+            ignore_matcher = IgnoreMatcher(args.path, excludes_from_config(ci_config))
+        scanner_config = None
+        targets = None
+        detection_profile = None  # written for influxdb_integration (sast_scan_duration, sast_files_scanned)
+        scan_mode = {'mode': 'full'}
+        if args.base_ref:
+            plan = plan_incremental_scan(args.path, args.base_ref, args.head_ref,
+                                         ignore_matcher=ignore_matcher, profile=ScanProfile())
+            detection_profile = plan.get('profile')
+            scan_mode = {key: plan[key] for key in ('mode', 'reason', 'base_ref', 'head_ref', 'changed_files')
+                         if key in plan}
+            if plan['mode'] == MODE_INCREMENTAL:
+                logger.info(f"🎯 Incremental scan: {plan['reason']}")
+                scanner_config = plan['scanner_config']
+                targets = plan['targets']
+            else:
+                logger.info(f"🔁 Falling back to a full scan: {plan['reason']}")
+        if args.scanner_config:
+            with open(args.scanner_config, 'r', encoding='utf-8') as handle:
+                scanner_config = json.load(handle)
+        elif scanner_config is None:
+            detector = language_detector.LanguageDetector(args.path, ignore_matcher=ignore_matcher,
+                                                          profile=ScanProfile())
+            detection = detector.scan_directory()
+            detection_profile = detection['profile']
+            scanner_config = language_detector.generate_scanner_config(detection['recommendations'],
+                                                                       detection['detected_languages'])
+
+        output_dir = Path(args.output_dir)
+        cache = session = None
+        if args.findings_cache:
+            cache = FindingsCache.for_project(args.path, args.cache_dir,
+                                              max_bytes=args.cache_size_mb * 1024 * 1024)
+            session = CacheSession(cache, args.path, output_dir, ignore_matcher)
+            targets = session.plan(scanner_config, ci_config, targets)
+        jobs = schedule(build_jobs(scanner_config, ci_config, args.path, output_dir, targets))
+        if args.dry_run:
+            print(json.dumps([job.to_dict() for job in jobs], indent=2))
+            if cache is not None:
+                cache.close()
+            return 0
+
+        output_dir.mkdir(parents=True, exist_ok=True)
+        results_dir = Path(args.results_dir)
+        started = time.monotonic()
+        runs = run_scanners(jobs, args.max_parallel, results_dir / 'logs')
+        summary = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'wall_seconds': round(time.monotonic() - started, 3),
+            'scan_mode': scan_mode,
+            'scanners': runs,
+        }
+        if session is not None:
+            summary['findings_cache'] = session.finish(runs)
+            cache.close()
+            for scanner, stats in summary['findings_cache'].items():
+                if stats['hit_rate'] is not None:
+                    logger.info(f"♻️  {scanner}: {stats['hits']}/{stats['files']} files from cache "
+                                f"({stats['hit_rate']:.0%} hit rate)")
+        with open(results_dir / RUNS_FILE_NAME, 'w', encoding='utf-8') as handle:
+            json.dump(summary, handle, indent=2)
+        if detection_profile is not None:
+            write_profile(results_dir / PROFILE_FILE, detection_profile)
+        logger.info(f"📊 {len(runs)} scanners finished in {summary['wall_seconds']:.1f}s")
+        return 0 if all(run['status'] in ('completed', 'skipped') for run in runs) else 1
+    except KeyboardInterrupt:
+        logger.error("Operation cancelled by user")
+        return 130
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
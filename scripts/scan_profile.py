@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Scan Profile - Phase timers and counters for LanguageDetector
+
+Purpose: Collect where a detection run spends its time (walk, classify,
+         manifest matching, content sniffing, merge, recommendations) and
+         how much work it did (directories visited and pruned, files
+         classified, pattern-match attempts). Each thread accumulates into
+         its own dicts, so the parallel walker needs no locking on the hot
+         path; phase times of worker threads are summed.
+Usage: used through `language-detector.py --profile`
+Example: python language-detector.py . --json --profile --profile-file sast-results/detection-profile.json
+"""
+
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+# Written next to the other results; influxdb_integration reads it for
+# sast_scan_duration / sast_files_scanned
+PROFILE_FILE = 'detection-profile.json'
+
+
+class ScanProfile:
+    """Per-phase wall-clock timers and event counters for one detection run."""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = ({}, {}, {})  # seconds by phase, calls by phase, counters
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def add_time(self, phase: str, seconds: float, calls: int = 1):
+        seconds_by_phase, calls_by_phase, _ = self._shard()
+        seconds_by_phase[phase] = seconds_by_phase.get(phase, 0.0) + seconds
+        calls_by_phase[phase] = calls_by_phase.get(phase, 0) + calls
+
+    def count(self, counter: str, amount: int = 1):
+        counters = self._shard()[2]
+        counters[counter] = counters.get(counter, 0) + amount
+
+    @contextmanager
+    def phase(self, name: str):
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self.add_time(name, self.clock() - started)
+
+    def timed(self, phase: str, func: Callable) -> Callable:
+        """Wrap ``func`` so every call is added to ``phase``."""
+        clock = self.clock
+        add_time = self.add_time
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add_time(phase, clock() - started)
+        return wrapper
+
+    def to_dict(self, total_seconds: Optional[float] = None, files_scanned: Optional[int] = None) -> Dict:
+        """Merge all threads into the JSON block attached to the detection results."""
+        seconds, calls, counters = {}, {}, {}
+        with self._lock:
+            shards = list(self._shards)
+        for shard_seconds, shard_calls, shard_counters in shards:
+            for phase, value in shard_seconds.items():
+                seconds[phase] = seconds.get(phase, 0.0) + value
+            for phase, value in shard_calls.items():
+                calls[phase] = calls.get(phase, 0) + value
+            for counter, value in shard_counters.items():
+                counters[counter] = counters.get(counter, 0) + value
+        profile = {
+            'phases': {phase: {'seconds': round(seconds[phase], 6), 'calls': calls.get(phase, 0)}
+                       for phase in sorted(seconds, key=seconds.get, reverse=True)},
+            'counters': dict(sorted(counters.items())),
+        }
+        if total_seconds is not None:
+            profile['total_seconds'] = round(total_seconds, 6)
+        if files_scanned is not None:
+            profile['files_scanned'] = files_scanned
+        return profile
+
+
+def write_profile(path: str, profile: Dict):
+    """Save a profile block (e.g. to sast-results/detection-profile.json)."""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with open(target, 'w', encoding='utf-8') as handle:
+        json.dump(profile, handle, indent=2)
+        handle.write('\n')
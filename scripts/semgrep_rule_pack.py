@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Semgrep Rule Pack - Prune configs/semgrep-rules.yaml to the detected languages
+
+Purpose: Semgrep parses and compiles every rule it is given and, for each
+         rule, walks every target file of the rule's languages. A Python-only
+         repository gains nothing from the JavaScript and Java rules, so
+         before Semgrep starts this keeps only the rules whose `languages:`
+         intersect what LanguageDetector found, narrows each kept rule's
+         language list to that intersection and writes the result to
+         .sast-cache/semgrep-packs/<key>.yaml. The key hashes the rules file
+         and the language set, so a pack is built once and reused until
+         either changes. Language-independent rules (generic, regex) are
+         always kept. Remote packs (`--config auto`, `p/...`) are resolved by
+         Semgrep itself and are passed through unchanged.
+Usage: python semgrep_rule_pack.py [path] [options]
+Example: python semgrep_rule_pack.py . --languages python,go
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+import yaml
+
+from detection_cache import CACHE_DIR_NAME
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_FILE = 'configs/semgrep-rules.yaml'
+PACKS_DIR_NAME = 'semgrep-packs'
+PACK_FORMAT_VERSION = 1
+
+# Semgrep languages that do not depend on the target's programming language
+LANGUAGE_INDEPENDENT = {'generic', 'regex', 'none'}
+
+# Semgrep aliases -> the canonical names used below
+SEMGREP_ALIASES = {
+    'js': 'javascript',
+    'ts': 'typescript',
+    'py': 'python',
+    'golang': 'go',
+    'c#': 'csharp',
+    'c++': 'cpp',
+    'kt': 'kotlin',
+    'rb': 'ruby',
+}
+
+# LanguageDetector names -> Semgrep languages covering the same files
+# (the detector counts .c/.h sources as cpp)
+DETECTOR_TO_SEMGREP = {
+    'cpp': {'c', 'cpp'},
+}
+
+
+def semgrep_languages(languages: Iterable[str]) -> Set[str]:
+    """Translate LanguageDetector language names into Semgrep's."""
+    result = set()
+    for lang in languages:
+        lang = str(lang).lower()
+        result.update(DETECTOR_TO_SEMGREP.get(lang, {SEMGREP_ALIASES.get(lang, lang)}))
+    return result
+
+
+def prune_rules(rules: List[Dict], languages: Set[str]) -> List[Dict]:
+    """Rules that can match one of ``languages``, restricted to those languages.
+
+    Rules without a `languages:` list and language-independent rules are
+    kept as they are.
+    """
+    pruned = []
+    for rule in rules:
+        declared = rule.get('languages') if isinstance(rule, dict) else None
+        if not isinstance(declared, list):
+            pruned.append(rule)
+            continue
+        if any(str(lang).lower() in LANGUAGE_INDEPENDENT for lang in declared):
+            pruned.append(rule)
+            continue
+        kept = [lang for lang in declared
+                if SEMGREP_ALIASES.get(str(lang).lower(), str(lang).lower()) in languages]
+        if kept:
+            pruned.append(dict(rule, languages=kept))
+    return pruned
+
+
+def pack_key(rules_bytes: bytes, languages: Set[str]) -> str:
+    """Cache key of the pack for this rules file content and language set."""
+    digest = hashlib.sha256(rules_bytes)
+    digest.update(json.dumps([PACK_FORMAT_VERSION, sorted(languages)]).encode('utf-8'))
+    return digest.hexdigest()[:24]
+
+
+def build_rule_pack(languages: Iterable[str], rules_file: str = DEFAULT_RULES_FILE,
+                    cache_dir: Optional[str] = None) -> Optional[Path]:
+    """Path of the rules file pruned to ``languages``, building it on a cache miss.
+
+    ``cache_dir`` defaults to ./.sast-cache. Returns None if no rule applies
+    to the detected languages; Semgrep should then not get the file at all.
+    Raises ValueError if the rules file cannot be parsed.
+    """
+    rules_bytes = Path(rules_file).read_bytes()
+    wanted = semgrep_languages(languages)
+    packs_dir = Path(cache_dir or CACHE_DIR_NAME) / PACKS_DIR_NAME
+    pack_path = packs_dir / f'{pack_key(rules_bytes, wanted)}.yaml'
+    empty_marker = pack_path.with_suffix('.empty')
+    if pack_path.is_file():
+        return pack_path
+    if empty_marker.is_file():
+        return None
+
+    try:
+        document = yaml.safe_load(rules_bytes) or {}
+    except yaml.YAMLError as e:
+        raise ValueError(f"{rules_file} is not valid YAML: {e}") from e
+    rules = document.get('rules') if isinstance(document, dict) else None
+    if not isinstance(rules, list):
+        raise ValueError(f"{rules_file} has no 'rules' list")
+    pruned = prune_rules(rules, wanted)
+    logger.info(f"✂️  Semgrep rule pack for {', '.join(sorted(wanted)) or 'no languages'}: "
+                f"{len(pruned)}/{len(rules)} rules from {rules_file}")
+
+    packs_dir.mkdir(parents=True, exist_ok=True)
+    if not pruned:
+        empty_marker.touch()
+        return None
+    handle, tmp_path = tempfile.mkstemp(dir=packs_dir, prefix='.pack-', suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'w', encoding='utf-8') as stream:
+            stream.write(f'# Generated from {rules_file} for: {", ".join(sorted(wanted))}\n')
+            yaml.safe_dump(dict(document, rules=pruned), stream, sort_keys=False, allow_unicode=True)
+        os.replace(tmp_path, pack_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return pack_path
+
+
+def main() -> int:
+    """Main entry point with proper error handling."""
+    parser = argparse.ArgumentParser(
+        description='✂️ Build a Semgrep rules file pruned to the detected languages',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+    python semgrep_rule_pack.py                          # Detect languages in . and build the pack
+    python semgrep_rule_pack.py /path/to/project         # Detect in a specific directory
+    python semgrep_rule_pack.py --languages python,go    # Skip detection
+        """
+    )
+    parser.add_argument('path', nargs='?', default='.',
+                        help='Project path to detect languages in (default: current directory)')
+    parser.add_argument('--languages',
+                        help='Comma-separated languages instead of running detection')
+    parser.add_argument('--rules', default=DEFAULT_RULES_FILE,
+                        help=f'Semgrep rules file to prune (default: {DEFAULT_RULES_FILE})')
+    parser.add_argument('--cache-dir',
+                        help=f'Cache directory (default: <path>/{CACHE_DIR_NAME})')
+    args = parser.parse_args()
+
+    try:
+        if args.languages is not None:
+            languages = [lang.strip() for lang in args.languages.split(',') if lang.strip()]
+        else:
+            language_detector = importlib.import_module('language-detector')
+            detection = language_detector.LanguageDetector(args.path).scan_directory()
+            languages = [info['language'] for info in detection['detected_languages']]
+        pack = build_rule_pack(languages, args.rules,
+                               args.cache_dir or os.path.join(args.path, CACHE_DIR_NAME))
+        if pack is None:
+            logger.warning(f"⚠️  No rule in {args.rules} applies to: {', '.join(languages) or 'no languages'}")
+            return 0
+        print(pack)
+        return 0
+    except KeyboardInterrupt:
+        logger.error("Operation cancelled by user")
+        return 130
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,6 +13,8 @@ PIPELINE_TYPE="${2:-SAST Scan}"
 CUSTOM_MESSAGE="${3:-}"
 TIMESTAMP=$(date -u +"%Y-%m-%dT%H:%M:%SZ")
 RESULTS_DIR="./sast-results"
+# Upper bound for each curl call of the fallback path below
+CURL_MAX_TIME="${NOTIFY_CURL_MAX_TIME:-15}"
 
 # Colors for output
 RED='\033[0;31m'
@@ -224,7 +226,7 @@ send_slack_notification() {
         local message_content
         message_content=$(generate_message_content "slack")
         
-        if curl -s -X POST -H 'Content-type: application/json' \
+        if curl -s --max-time "$CURL_MAX_TIME" -X POST -H 'Content-type: application/json' \
            --data "$message_content" \
            "$webhook_url" > /dev/null; then
             echo -e "${GREEN}✅ Slack notification sent successfully${NC}"
@@ -258,7 +260,7 @@ send_email_notification() {
         # Send email using curl (SMTP)
         if command -v curl >/dev/null 2>&1 && [ -n "${EMAIL_SMTP_PASSWORD:-}" ]; then
             for recipient in ${recipients//,/ }; do
-                if curl -s --url "smtp://$smtp_server:$smtp_port" \
+                if curl -s --max-time "$CURL_MAX_TIME" --url "smtp://$smtp_server:$smtp_port" \
                    --ssl-reqd \
                    --mail-from "$sender_email" \
                    --mail-rcpt "$recipient" \
@@ -290,7 +292,7 @@ send_teams_notification() {
         local message_content
         message_content=$(generate_message_content "teams")
         
-        if curl -s -X POST -H 'Content-Type: application/json' \
+        if curl -s --max-time "$CURL_MAX_TIME" -X POST -H 'Content-Type: application/json' \
            --data "$message_content" \
            "$webhook_url" > /dev/null; then
             echo -e "${GREEN}✅ Teams notification sent successfully${NC}"
@@ -350,7 +352,7 @@ EOF
         if [ -n "${JIRA_API_TOKEN:-}" ] && command -v curl >/dev/null 2>&1; then
             local jira_user=$(echo "$CONFIG" | jq -r '.integrations.jira.assignee // "admin"')
             
-            if curl -s -X POST \
+            if curl -s --max-time "$CURL_MAX_TIME" -X POST \
                -H "Content-Type: application/json" \
                -H "Authorization: Basic $(echo -n "$jira_user:$JIRA_API_TOKEN" | base64)" \
                --data "$jira_payload" \
@@ -401,6 +403,21 @@ main() {
     
     echo -e "${GREEN}📨 Sending notifications for $PIPELINE_TYPE with status: $STATUS${NC}"
     
+    # Python dispatcher: all channels concurrently over reused connections,
+    # per-channel and overall deadlines, retries with jitter
+    local script_dir
+    script_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+    if command -v python3 >/dev/null 2>&1 && [ -f "$script_dir/notify_dispatcher.py" ]; then
+        if python3 "$script_dir/notify_dispatcher.py" "$STATUS" "$PIPELINE_TYPE" "$CUSTOM_MESSAGE" \
+            --results-dir "$RESULTS_DIR"; then
+            echo -e "${GREEN}✅ All notifications processed${NC}"
+        else
+            echo -e "${RED}❌ Some notifications could not be delivered${NC}"
+        fi
+        update_grafana_metrics
+        return
+    fi
+    
     # Send notifications in parallel for better performance
     {
         send_slack_notification &
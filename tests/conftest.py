@@ -0,0 +1,8 @@
+"""Shared pytest setup: the pipeline scripts are imported by module name from scripts/."""
+
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / 'scripts'
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
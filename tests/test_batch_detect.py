@@ -0,0 +1,66 @@
+"""batch_detect.run_batch: checkpointing of failures and crashed workers."""
+
+import io
+import json
+import os
+
+import batch_detect
+from batch_detect import STATUS_ERROR, STATUS_OK, Checkpoint, run_batch
+
+
+def detect_or_crash(repo, options):
+    if repo.endswith('crash') and not os.environ.get('BATCH_TEST_FIXED'):
+        os._exit(1)  # what an OOM kill looks like to the pool
+    if repo.endswith('broken') and not os.environ.get('BATCH_TEST_FIXED'):
+        return {'repo': repo, 'status': STATUS_ERROR, 'error': 'OSError: unreadable', 'seconds': 0}
+    return {'repo': repo, 'status': STATUS_OK, 'seconds': 0, 'result': {}}
+
+
+def records(output):
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_failures_are_retried_on_resume(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_detect, 'detect_repository', detect_or_crash)
+    monkeypatch.delenv('BATCH_TEST_FIXED', raising=False)
+    repos = ['r0', 'r1-broken', 'r2', 'r3', 'r4-broken', 'r5']
+    path = str(tmp_path / 'batch.ckpt')
+
+    output = io.StringIO()
+    stats = run_batch(repos, {}, output, Checkpoint(path), workers=2)
+    assert stats == {'completed': 4, 'failed': 2, 'skipped': 0}
+    checkpoint = Checkpoint.load(path)
+    assert checkpoint.watermark == len(repos)
+    assert checkpoint.failed == {1: 'r1-broken', 4: 'r4-broken'}
+
+    monkeypatch.setenv('BATCH_TEST_FIXED', '1')
+    output = io.StringIO()
+    stats = run_batch(repos, {}, output, Checkpoint.load(path), workers=2)
+    assert stats == {'completed': 2, 'failed': 0, 'skipped': 4}
+    assert sorted(record['repo'] for record in records(output)) == ['r1-broken', 'r4-broken']
+    checkpoint = Checkpoint.load(path)
+    assert checkpoint.failed == {} and checkpoint.done_ahead == {} and checkpoint.watermark == len(repos)
+
+
+def test_crashed_worker_becomes_error_records(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_detect, 'detect_repository', detect_or_crash)
+    monkeypatch.delenv('BATCH_TEST_FIXED', raising=False)
+    repos = ['r0', 'r1', 'r2-crash'] + [f'r{i}' for i in range(3, 12)]
+    path = str(tmp_path / 'batch.ckpt')
+
+    output = io.StringIO()
+    stats = run_batch(repos, {}, output, Checkpoint(path), workers=1)
+    by_repo = {record['repo']: record for record in records(output)}
+    assert sorted(by_repo) == sorted(repos)
+    assert by_repo['r2-crash']['status'] == STATUS_ERROR
+    assert by_repo['r2-crash']['error'].startswith('BrokenProcessPool')
+    assert by_repo['r11']['status'] == STATUS_OK  # the batch went on in a new pool
+    assert stats['completed'] + stats['failed'] == len(repos)
+    failed = Checkpoint.load(path).failed
+    assert 2 in failed and len(failed) == stats['failed']
+
+    monkeypatch.setenv('BATCH_TEST_FIXED', '1')
+    output = io.StringIO()
+    stats = run_batch(repos, {}, output, Checkpoint.load(path), workers=1)
+    assert stats['failed'] == 0 and stats['completed'] == len(failed)
+    assert Checkpoint.load(path).failed == {}
@@ -0,0 +1,105 @@
+"""Findings history run keys and process_results.py recording."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+import process_results
+from findings_history import FindingsHistory, load_run, record_results
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PIPELINES = ('.github/workflows/sast-security-scan.yml', 'bitbucket-pipelines.yml')
+
+
+@pytest.fixture
+def results_dir(tmp_path, monkeypatch):
+    for name in ('GITHUB_RUN_ID', 'GITHUB_RUN_ATTEMPT', 'BITBUCKET_REPO_FULL_NAME', 'BITBUCKET_BRANCH',
+                 'BITBUCKET_COMMIT', 'BITBUCKET_BUILD_NUMBER'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('GITHUB_REPOSITORY', 'acme/web')
+    monkeypatch.setenv('GITHUB_REF_NAME', 'main')
+    monkeypatch.setenv('GITHUB_SHA', 'abc123')
+    directory = tmp_path / 'sast-results'
+    directory.mkdir()
+    return directory
+
+
+def write_summary(results_dir, timestamp, high):
+    (results_dir / 'overall-summary.json').write_text(json.dumps({
+        'timestamp': timestamp, 'scan_type': 'full', 'status': 'success', 'scanners_run': [],
+        'total_vulnerabilities': {'critical': 0, 'high': high, 'medium': 0, 'low': 0}}))
+
+
+def run_count(db_path):
+    history = FindingsHistory(str(db_path))
+    try:
+        runs = history._conn.execute('SELECT COUNT(*) FROM runs').fetchone()[0]
+        rollup_runs = history._conn.execute("SELECT runs FROM rollups WHERE period = 'day'").fetchone()[0]
+    finally:
+        history.close()
+    return runs, rollup_runs
+
+
+def test_pipeline_run_is_recorded_once(results_dir, tmp_path, monkeypatch):
+    monkeypatch.setenv('GITHUB_RUN_ID', '4242')
+    db_path = tmp_path / 'history.sqlite'
+    write_summary(results_dir, '2026-10-01T10:00:00Z', 1)
+    assert record_results(results_dir, str(db_path))
+    write_summary(results_dir, '2026-10-01T10:05:00Z', 2)
+    assert not record_results(results_dir, str(db_path))
+    assert run_count(db_path) == (1, 1)
+
+    monkeypatch.setenv('GITHUB_RUN_ATTEMPT', '2')
+    assert load_run(results_dir)['run']['run_key'] == 'acme/web|main|abc123|4242|2'
+    assert record_results(results_dir, str(db_path))
+
+
+def test_bitbucket_build_is_the_pipeline_run(results_dir, monkeypatch):
+    for name in ('GITHUB_REPOSITORY', 'GITHUB_REF_NAME', 'GITHUB_SHA'):
+        monkeypatch.delenv(name)
+    monkeypatch.setenv('BITBUCKET_REPO_FULL_NAME', 'acme/api')
+    monkeypatch.setenv('BITBUCKET_BRANCH', 'develop')
+    monkeypatch.setenv('BITBUCKET_COMMIT', 'def456')
+    monkeypatch.setenv('BITBUCKET_BUILD_NUMBER', '77')
+    write_summary(results_dir, '2026-10-01T10:00:00Z', 1)
+    run = load_run(results_dir)['run']
+    assert (run['repository'], run['branch'], run['commit_sha']) == ('acme/api', 'develop', 'def456')
+    assert run['run_key'] == 'acme/api|develop|def456|77|1'
+
+
+def test_local_runs_are_keyed_by_timestamp(results_dir, tmp_path):
+    db_path = tmp_path / 'history.sqlite'
+    write_summary(results_dir, '2026-10-01T10:00:00Z', 1)
+    assert 'run_key' not in load_run(results_dir)['run']
+    assert record_results(results_dir, str(db_path))
+    write_summary(results_dir, '2026-10-01T10:05:00Z', 1)
+    assert record_results(results_dir, str(db_path))
+    assert run_count(db_path) == (2, 2)
+
+
+@pytest.mark.parametrize('scanners, recorded', [
+    (['semgrep', 'codeql', 'all'], 1),
+    (['semgrep', 'codeql'], 0),
+])
+def test_only_the_all_invocation_records_history(results_dir, tmp_path, monkeypatch, scanners, recorded):
+    monkeypatch.chdir(tmp_path)
+    db_path = tmp_path / 'history.sqlite'
+    for scanner in scanners:
+        monkeypatch.setattr(sys, 'argv', ['process_results.py', scanner, '--results-dir', str(results_dir),
+                                          '--history-db', str(db_path)])
+        assert process_results.main() == 0
+    if recorded:
+        assert run_count(db_path) == (1, 1)
+    else:
+        assert not db_path.exists()
+
+
+@pytest.mark.parametrize('pipeline', PIPELINES)
+def test_pipelines_record_once_and_export(pipeline):
+    text = (REPO_ROOT / pipeline).read_text(encoding='utf-8')
+    calls = [line for line in text.splitlines() if 'process_results' in line and not line.strip().startswith('#')]
+    assert len(calls) == 1 and ' all' in calls[0]
+    assert 'findings_history.py export' in text
@@ -0,0 +1,43 @@
+"""Findings columns as the single per-finding sidecar of process_results.py."""
+
+import json
+
+from findings_store import COLUMNS_SUFFIX, ColumnarFindings, FindingsTable
+from process_results import generate_overall_summary, process_scanner
+
+THRESHOLDS = {'severity_threshold': 'critical', 'max_critical': 100, 'max_high': 100}
+
+
+def test_identities_round_trip(tmp_path):
+    table = FindingsTable()
+    table.append('semgrep', 'high', 'app.py', 12, 'python.sqli', 'CWE-89', '0123456789ab')
+    table.append('semgrep', None, 'web/a b.js', 0, None, 'semgrep:x')
+    table.write(tmp_path / f'semgrep{COLUMNS_SUFFIX}')
+    with ColumnarFindings(tmp_path / f'semgrep{COLUMNS_SUFFIX}') as findings:
+        assert list(findings.identities()) == [('high', 'app.py', 12, 'CWE-89', '0123456789ab'),
+                                               (None, 'web/a b.js', 0, 'semgrep:x', '')]
+        assert findings[0].snippet == '0123456789ab'
+
+
+def test_overall_summary_merges_scanners_from_the_columns(tmp_path):
+    reports, results = tmp_path / 'reports', tmp_path / 'results'
+    reports.mkdir()
+    results.mkdir()
+    (reports / 'semgrep-results.json').write_text(json.dumps({'results': [
+        {'check_id': 'sqli', 'path': 'app.py', 'start': {'line': 10},
+         'extra': {'severity': 'ERROR', 'lines': 'cursor.execute(q % x)', 'metadata': {'cwe': ['CWE-89: SQLi']}}},
+        {'check_id': 'xss', 'path': 'web.py', 'start': {'line': 3},
+         'extra': {'severity': 'WARNING', 'metadata': {'cwe': ['CWE-79: XSS']}}},
+    ]}))
+    (reports / 'bandit-report.json').write_text(json.dumps({'results': [
+        {'test_id': 'B608', 'filename': './app.py', 'line_number': 10, 'issue_severity': 'HIGH',
+         'issue_cwe': {'id': 89}, 'code': '10 cursor.execute(q % x)\n'},
+    ]}))
+    for scanner in ('semgrep', 'bandit'):
+        process_scanner(scanner, reports, results, 'full', '2026-01-01T00:00:00Z')
+
+    overall = generate_overall_summary(results, 'full', '2026-01-01T00:00:00Z', THRESHOLDS)
+    assert overall['raw_total_findings'] == 3
+    assert overall['total_findings'] == 2
+    assert sorted(path.name for path in results.iterdir() if 'findings' in path.name) == [
+        f'bandit{COLUMNS_SUFFIX}', f'semgrep{COLUMNS_SUFFIX}']
@@ -0,0 +1,54 @@
+"""Gitignore pattern compilation and matching."""
+
+import pytest
+
+from ignore_rules import IgnoreMatcher, IgnoreRules, parse_rule
+
+
+@pytest.mark.parametrize('pattern, matches, misses', [
+    ('[]a]', [']', 'a'], ['b', '[]a]']),
+    ('[!]]', ['a', '-'], [']']),
+    ('[^]a]x', ['bx'], [']x', 'ax']),
+    ('[a-c].log', ['a.log', 'c.log'], ['d.log']),
+    ('[!a-c].log', ['d.log'], ['b.log']),
+    ('file[0-9]', ['file7'], ['file', 'filex']),
+    ('[\\]]', [']'], ['\\']),
+    ('[a-]', ['a', '-'], ['b']),
+    ('[', ['['], ['a']),
+    ('x[', ['x['], ['x']),
+])
+def test_bracket_expressions(pattern, matches, misses):
+    rule = parse_rule(pattern)
+    for name in matches:
+        assert rule.regex.fullmatch(name), name
+    for name in misses:
+        assert not rule.regex.fullmatch(name), name
+
+
+def test_reversed_range_matches_its_first_character():
+    rule = parse_rule('[z-a]')
+    assert rule is not None
+    assert rule.regex.fullmatch('z')
+    assert not any(rule.regex.fullmatch(name) for name in 'am-')
+
+
+def test_brackets_never_match_a_slash():
+    assert not parse_rule('a[!x]b').regex.fullmatch('a/b')
+    assert not parse_rule('a[.-0]b').regex.fullmatch('a/b')
+    assert parse_rule('a[.-0]b').regex.fullmatch('a.b')
+
+
+def test_unusual_lines_do_not_break_the_file():
+    rules = IgnoreRules(['[]a]', '[z-a]', '[!]]x', '*.log', 'build/'])
+    assert rules.match('debug.log', 'debug.log', False)
+    assert rules.match('build', 'build', True)
+    assert rules.match(']', ']', False)
+    assert rules.match('src', 'src', True) is None
+
+
+def test_walk_survives_unusual_gitignore(tmp_path):
+    (tmp_path / '.gitignore').write_text('[]a]\n[z-a]\n*.tmp\n')
+    matcher = IgnoreMatcher(str(tmp_path))
+    assert matcher.is_ignored('cache.tmp')
+    assert matcher.is_ignored('a')
+    assert not matcher.is_ignored('src/app.py')
@@ -0,0 +1,72 @@
+"""full_scan_reason() and plan_incremental_scan(): when and what an incremental scan runs."""
+
+import importlib
+import subprocess
+
+import pytest
+
+from incremental_scan import (FULL_SCAN_TRIGGERS, MAX_INCREMENTAL_FILES, MODE_INCREMENTAL, full_scan_reason,
+                              plan_incremental_scan)
+
+language_detector = importlib.import_module('language-detector')
+
+MANIFEST_NAMES = sorted({name for patterns in language_detector.LANGUAGE_PATTERNS.values()
+                         for name in patterns['files'] if '*' not in name})
+
+
+@pytest.mark.parametrize('name', MANIFEST_NAMES)
+def test_every_manifest_triggers_full_scan(name):
+    assert full_scan_reason([('M', name)]) == f"dependency manifest changed: {name}"
+    assert full_scan_reason([('A', f'services/api/{name}')]) is not None
+
+
+@pytest.mark.parametrize('name', ['Gemfile', 'Pipfile', 'Makefile', 'CMakeLists.txt', 'Package.swift'])
+def test_capitalized_manifests_trigger_full_scan(name):
+    assert full_scan_reason([('M', 'src/app.py'), ('M', name)]) is not None
+
+
+def test_wildcard_manifest_triggers_full_scan():
+    assert full_scan_reason([('M', 'src/App/App.csproj')]) is not None
+
+
+@pytest.mark.parametrize('path', FULL_SCAN_TRIGGERS)
+def test_scanner_configuration_triggers_full_scan(path):
+    assert full_scan_reason([('M', path)]) == f"scanner configuration changed: {path}"
+
+
+def test_source_changes_stay_incremental():
+    changes = [('M', 'src/app.py'), ('A', 'web/index.ts'), ('D', 'docs/gemfile.md')]
+    assert full_scan_reason(changes) is None
+
+
+def test_large_change_sets_trigger_full_scan():
+    changes = [('M', f'src/module_{i}.py') for i in range(MAX_INCREMENTAL_FILES + 1)]
+    assert 'files changed' in full_scan_reason(changes)
+
+
+def git(repo, *args):
+    subprocess.run(['git', '-c', 'user.name=t', '-c', 'user.email=t@example.com', *args], cwd=repo,
+                   check=True, capture_output=True)
+
+
+def test_every_changed_language_gets_its_scanners(tmp_path):
+    git(tmp_path, 'init', '-q')
+    (tmp_path / 'README.md').write_text('demo\n')
+    git(tmp_path, 'add', '.')
+    git(tmp_path, 'commit', '-q', '-m', 'base')
+    git(tmp_path, 'tag', 'base')
+    (tmp_path / 'src').mkdir()
+    for i in range(10):
+        (tmp_path / 'src' / f'module_{i}.py').write_text('print(1)\n')
+    (tmp_path / 'web').mkdir()
+    (tmp_path / 'web' / 'app.js').write_text('console.log(1);\n')
+    git(tmp_path, 'add', '.')
+    git(tmp_path, 'commit', '-q', '-m', 'change')
+
+    plan = plan_incremental_scan(str(tmp_path), 'base')
+    assert plan['mode'] == MODE_INCREMENTAL
+    config = plan['scanner_config']
+    assert {'semgrep', 'bandit', 'eslint', 'codeql'} <= set(config['scanners'])
+    assert 'javascript' in config['scanner_config']['codeql']['languages']
+    assert plan['targets']['eslint'] == ['web/app.js']
+    assert len(plan['targets']['bandit']) == 10 and len(plan['targets']['semgrep']) == 11
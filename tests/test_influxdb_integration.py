@@ -0,0 +1,197 @@
+"""InfluxWriter against a local stand-in /api/v2/write server."""
+
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from influxdb_integration import SPOOL_SUFFIX, InfluxWriter, Point, build_points
+
+
+class StubInflux(ThreadingHTTPServer):
+    """Answers each write with the next scripted (status, headers); 204 once the script runs out."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), WriteHandler)
+        self.script = []
+        self.requests = []
+        self.url = f'http://127.0.0.1:{self.server_address[1]}'
+
+    def respond(self, *responses):
+        self.script.extend(responses)
+
+    @property
+    def bodies(self):
+        return [request['body'] for request in self.requests]
+
+
+class WriteHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        parts = urlsplit(self.path)
+        self.server.requests.append({
+            'path': parts.path,
+            'query': {key: values[0] for key, values in parse_qs(parts.query).items()},
+            'headers': dict(self.headers),
+            'raw': body,
+            'body': gzip.decompress(body).decode('utf-8'),
+            'client': self.client_address,
+        })
+        status, headers = self.server.script.pop(0) if self.server.script else (204, {})
+        payload = b'' if status == 204 else b'{"code":"stub"}'
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    stub = StubInflux()
+    thread = threading.Thread(target=stub.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield stub
+    stub.shutdown()
+    stub.server_close()
+
+
+@pytest.fixture
+def sleeps():
+    return []
+
+
+def make_writer(url, tmp_path, sleeps, **options):
+    options.setdefault('spool_dir', str(tmp_path / 'spool'))
+    return InfluxWriter(url, 'secret-token', 'my org', 'sast metrics', sleep=sleeps.append, **options)
+
+
+def test_line_protocol_escaping():
+    point = Point('sast findings,v2', {'repository': 'acme/web app', 'branch': 'feat,x=1', 'empty': ''},
+                  {'value': 3, 'ratio': 0.5, 'ok': True, 'note': 'say "hi" \\ bye'}, 1700000000000000000)
+    assert point.to_line() == (
+        'sast\\ findings\\,v2,branch=feat\\,x\\=1,repository=acme/web\\ app '
+        'value=3i,ratio=0.5,ok=true,note="say \\"hi\\" \\\\ bye" 1700000000000000000')
+
+
+def test_batches_are_gzipped_on_one_connection(server, tmp_path, sleeps):
+    writer = make_writer(server.url, tmp_path, sleeps, batch_size=2)
+    writer.write(Point('m', {'scanner': f's{i}'}, {'value': i}, i) for i in range(5))
+    writer.close()
+
+    assert len(server.requests) == 3
+    first = server.requests[0]
+    assert first['path'] == '/api/v2/write'
+    assert first['query'] == {'org': 'my org', 'bucket': 'sast metrics', 'precision': 'ns'}
+    assert first['headers']['Content-Encoding'] == 'gzip'
+    assert first['headers']['Authorization'] == 'Token secret-token'
+    assert first['raw'][:2] == b'\x1f\x8b'
+    assert server.bodies == ['m,scanner=s0 value=0i 0\nm,scanner=s1 value=1i 1\n',
+                             'm,scanner=s2 value=2i 2\nm,scanner=s3 value=3i 3\n',
+                             'm,scanner=s4 value=4i 4\n']
+    assert len({request['client'] for request in server.requests}) == 1
+    assert writer.stats['points_written'] == 5 and writer.stats['batches_sent'] == 3
+
+
+def test_throttling_honours_retry_after(server, tmp_path, sleeps):
+    server.respond((429, {'Retry-After': '7'}))
+    writer = make_writer(server.url, tmp_path, sleeps)
+    writer.write([Point('m', {}, {'value': 1}, 1)])
+    writer.close()
+
+    assert len(server.requests) == 2
+    assert server.bodies[0] == server.bodies[1]
+    assert len(sleeps) == 1 and 7 * 0.8 <= sleeps[0] <= 7 * 1.2
+    assert writer.stats['retries'] == 1 and writer.stats['points_written'] == 1
+
+
+def test_server_errors_back_off_exponentially(server, tmp_path, sleeps):
+    server.respond((503, {}), (500, {}), (502, {}))
+    writer = make_writer(server.url, tmp_path, sleeps)
+    writer.write([Point('m', {}, {'value': 1}, 1)])
+    writer.close()
+
+    assert len(server.requests) == 4
+    assert writer.stats['retries'] == 3 and writer.stats['points_written'] == 1
+    for expected, slept in zip((0.5, 1.0, 2.0), sleeps):
+        assert expected * 0.8 <= slept <= expected * 1.2
+
+
+def test_rejected_batches_are_dropped_without_retry(server, tmp_path, sleeps):
+    server.respond((400, {}))
+    writer = make_writer(server.url, tmp_path, sleeps)
+    writer.write([Point('m', {}, {'value': 1}, 1)])
+    writer.close()
+
+    assert len(server.requests) == 1 and sleeps == []
+    assert writer.stats['points_dropped'] == 1
+    assert not list((tmp_path / 'spool').glob('*' + SPOOL_SUFFIX))
+
+
+def test_unavailable_server_spools_and_next_run_replays(server, tmp_path, sleeps):
+    server.respond(*[(503, {})] * 3)
+    writer = make_writer(server.url, tmp_path, sleeps, max_retries=2)
+    writer.write([Point('m', {'run': '1'}, {'value': 1}, 1)])
+    writer.close()
+
+    spooled = list((tmp_path / 'spool').glob('*' + SPOOL_SUFFIX))
+    assert len(spooled) == 1 and writer.stats['batches_spooled'] == 1
+    assert gzip.decompress(spooled[0].read_bytes()).decode() == 'm,run=1 value=1i 1\n'
+
+    next_run = make_writer(server.url, tmp_path, sleeps)
+    assert next_run.flush_spool() == 1
+    next_run.write([Point('m', {'run': '2'}, {'value': 2}, 2)])
+    next_run.close()
+
+    assert server.bodies[-2:] == ['m,run=1 value=1i 1\n', 'm,run=2 value=2i 2\n']
+    assert not list((tmp_path / 'spool').glob('*' + SPOOL_SUFFIX))
+
+
+def test_refused_connection_spools(tmp_path, sleeps):
+    unused = StubInflux()
+    url = unused.url
+    unused.server_close()
+    writer = make_writer(url, tmp_path, sleeps, max_retries=1)
+    writer.write([Point('m', {}, {'value': 1}, 1)])
+    writer.close()
+
+    assert writer.stats['batches_spooled'] == 1 and writer.stats['retries'] == 1
+    assert len(list((tmp_path / 'spool').glob('*' + SPOOL_SUFFIX))) == 1
+
+
+def test_spool_stops_at_first_batch_still_failing(server, tmp_path, sleeps):
+    spool = tmp_path / 'spool'
+    spool.mkdir()
+    for name, line in (('001', 'm value=1i 1'), ('002', 'm value=2i 2')):
+        (spool / (name + SPOOL_SUFFIX)).write_bytes(gzip.compress((line + '\n').encode()))
+    server.respond((204, {}), (503, {}), (503, {}))
+    writer = make_writer(server.url, tmp_path, sleeps, max_retries=1)
+
+    assert writer.flush_spool() == 1
+    assert [path.name for path in spool.glob('*' + SPOOL_SUFFIX)] == ['002' + SPOOL_SUFFIX]
+
+
+@pytest.mark.parametrize('files, duration', [
+    ({}, 0.0),
+    ({'overall-summary.json': {'scan_duration': 40}}, 40.25),
+    ({'scanner-runs.json': {'wall_seconds': 55.5}}, 55.75),
+    ({'overall-summary.json': {'scan_duration': 40}, 'scanner-runs.json': {'wall_seconds': 55.5}}, 55.75),
+])
+def test_detection_time_is_only_added_to_a_scan_duration(tmp_path, files, duration):
+    (tmp_path / 'detection-profile.json').write_text(json.dumps({'total_seconds': 0.25, 'files_scanned': 12}))
+    for name, content in files.items():
+        (tmp_path / name).write_text(json.dumps(content))
+    points = {point.measurement: point for point in build_points(tmp_path, 'success', {}, 1)}
+    assert points['sast_scan_duration'].fields == {'value': duration}
+    assert points['sast_files_scanned'].fields == {'value': 12}
@@ -0,0 +1,505 @@
+"""Notification dispatch against local stub HTTP and SMTP servers."""
+
+import asyncio
+import base64
+import json
+import select
+import shutil
+import socket
+import socketserver
+import ssl
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import pytest
+
+import notify_dispatcher
+from notify_dispatcher import Channel, build_channels, dispatch
+
+CONTEXT = {'pipeline_type': 'SAST Scan', 'custom_message': '', 'timestamp': '2026-01-01T00:00:00Z'}
+NOTIFY_ENV = ('SLACK_WEBHOOK', 'TEAMS_WEBHOOK', 'NOTIFY_WEBHOOK_URL', 'JIRA_API_TOKEN', 'JIRA_USER',
+              'EMAIL_SMTP_PASSWORD', 'HTTPS_PROXY', 'HTTP_PROXY', 'NO_PROXY', 'ALL_PROXY',
+              'https_proxy', 'http_proxy', 'no_proxy', 'all_proxy')
+
+
+class Reply:
+    """One scripted HTTP response."""
+
+    def __init__(self, status=200, body=b'ok', headers=None, chunked=False, delay=0.0, raw=None):
+        self.status = status
+        self.raw = raw  # sent verbatim instead of a well-formed response
+        self.body = body
+        self.headers = headers or {}
+        self.chunked = chunked
+        self.delay = delay
+
+
+class StubHTTP(ThreadingHTTPServer):
+    """Answers each path with its next scripted Reply (200 'ok' once the script runs out)."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.scripts = {}
+        self.requests = []
+        self.url = f'http://127.0.0.1:{self.server_address[1]}'
+
+    def script(self, path, *replies):
+        self.scripts.setdefault(path, []).extend(replies)
+        return self.url + path
+
+    def requests_to(self, path):
+        return [request for request in self.requests if request['path'] == path]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        path = self.path
+        if path.startswith('http://'):  # absolute form, forwarded by a proxy
+            parts = urlsplit(path)
+            path = parts.path + (f'?{parts.query}' if parts.query else '')
+        self.server.requests.append({'path': path, 'target': self.path, 'headers': dict(self.headers),
+                                     'json': json.loads(body), 'client': self.client_address})
+        script = self.server.scripts.get(path)
+        reply = script.pop(0) if script else Reply()
+        if reply.delay:
+            time.sleep(reply.delay)
+        if reply.raw is not None:
+            self.wfile.write(reply.raw)
+            self.close_connection = True
+            return
+        self.send_response(reply.status)
+        for name, value in reply.headers.items():
+            self.send_header(name, value)
+        if reply.chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for start in range(0, len(reply.body), 3):
+                chunk = reply.body[start:start + 3]
+                self.wfile.write(f'{len(chunk):x};ext=1\r\n'.encode() + chunk + b'\r\n')
+            self.wfile.write(b'0\r\nX-Trailer: done\r\n\r\n')
+        else:
+            self.send_header('Content-Length', str(len(reply.body)))
+            self.end_headers()
+            self.wfile.write(reply.body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubSMTP(socketserver.ThreadingTCPServer):
+    """Plain-text SMTP server recording every message (envelope and data) per session."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.sessions = []
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        session = {'mail_from': None, 'rcpt_to': [], 'data': b''}
+        self.server.sessions.append(session)
+        self.reply('220 stub ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('ascii').strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb == 'EHLO':
+                self.reply('250-stub')
+                self.reply('250 8BITMIME')
+            elif verb == 'MAIL':
+                session['mail_from'] = command
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                session['rcpt_to'].append(command.split(':', 1)[1].strip('<> '))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 go ahead')
+                lines = []
+                for data_line in iter(self.rfile.readline, b''):
+                    if data_line == b'.\r\n':
+                        break
+                    lines.append(data_line)
+                session['data'] = b''.join(lines)
+                self.reply('250 queued')
+            elif verb == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class StubProxy(socketserver.ThreadingTCPServer):
+    """HTTP proxy: CONNECT tunnels and absolute-form forwarding; answers ``refuse`` instead if set."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), ProxyHandler)
+        self.requests = []
+        self.refuse = None
+        self.url = f'http://127.0.0.1:{self.server_address[1]}'
+
+
+class ProxyHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        head = b''
+        while b'\r\n\r\n' not in head:
+            data = self.request.recv(4096)
+            if not data:
+                return
+            head += data
+        request_line, _, rest = head.decode('latin-1').partition('\r\n')
+        headers = dict(line.split(': ', 1) for line in rest.split('\r\n\r\n')[0].split('\r\n') if line)
+        self.server.requests.append({'line': request_line, 'headers': headers})
+        if self.server.refuse:
+            self.request.sendall(f'HTTP/1.1 {self.server.refuse}\r\nContent-Length: 0\r\n\r\n'.encode())
+            return
+        method, target, _ = request_line.split(' ')
+        if method == 'CONNECT':
+            host, _, port = target.rpartition(':')
+            upstream = socket.create_connection((host, int(port)))
+            self.request.sendall(b'HTTP/1.1 200 Connection established\r\n\r\n')
+        else:
+            parts = urlsplit(target)
+            upstream = socket.create_connection((parts.hostname, parts.port or 80))
+            upstream.sendall(head)
+        with upstream:
+            sockets = [self.request, upstream]
+            while True:
+                readable, _, _ = select.select(sockets, [], [], 5)
+                if not readable:
+                    return
+                for source in readable:
+                    data = source.recv(65536)
+                    if not data:
+                        return
+                    (upstream if source is self.request else self.request).sendall(data)
+
+
+def _serve(server):
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    return server
+
+
+@pytest.fixture
+def http_server():
+    server = _serve(StubHTTP())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def smtp_server():
+    server = _serve(StubSMTP())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def proxy_server():
+    server = _serve(StubProxy())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def tls_server(tmp_path):
+    """StubHTTP over TLS for 'localhost', with a client context trusting its self-signed certificate."""
+    if shutil.which('openssl') is None:
+        pytest.skip('openssl is needed to create a test certificate')
+    cert, key = tmp_path / 'cert.pem', tmp_path / 'key.pem'
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                    '-subj', '/CN=localhost', '-addext', 'subjectAltName=DNS:localhost',
+                    '-keyout', str(key), '-out', str(cert)], check=True, capture_output=True)
+    server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    server_context.load_cert_chain(cert, key)
+    server = StubHTTP()
+    server.socket = server_context.wrap_socket(server.socket, server_side=True)
+    server.url = f'https://localhost:{server.server_address[1]}'
+    _serve(server)
+    yield server, ssl.create_default_context(cafile=str(cert))
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def quick_backoff(monkeypatch):
+    monkeypatch.setattr(notify_dispatcher, 'BACKOFF_BASE_SECONDS', 0.01)
+    for name in NOTIFY_ENV:
+        monkeypatch.delenv(name, raising=False)
+
+
+def event(repository, status='failure', critical=1, high=2):
+    return {'repository': repository, 'branch': 'main', 'commit': 'abc123', 'status': status,
+            'critical': critical, 'high': high, 'medium': 0, 'low': 0, 'total': critical + high}
+
+
+def http_channel(name, url, payload=None):
+    return Channel(name, 'http', url, payload if payload is not None else {'text': name}, {})
+
+
+def test_channels_are_sent_concurrently(http_server):
+    channels = [http_channel(f'hook{i}', http_server.script(f'/hook{i}', Reply(delay=0.3)))
+                for i in range(4)]
+    started = time.monotonic()
+    results = asyncio.run(dispatch(channels, deadline_seconds=5, channel_timeout=5))
+    assert time.monotonic() - started < 1.0
+    assert all(result == dict(result, status='sent', attempts=1) for result in results.values())
+
+
+def test_channel_timeout_does_not_hold_up_other_channels(http_server):
+    slow = http_channel('slow', http_server.script('/slow', Reply(delay=3)))
+    fast = http_channel('fast', http_server.script('/fast', Reply()))
+    results = asyncio.run(dispatch([slow, fast], deadline_seconds=5, channel_timeout=0.3))
+    assert results['slow']['status'] == 'timeout'
+    assert 0.25 <= results['slow']['seconds'] < 1.0
+    assert results['fast']['status'] == 'sent'
+
+
+def test_global_deadline_caps_channel_timeout(http_server):
+    slow = http_channel('slow', http_server.script('/slow', Reply(delay=3)))
+    started = time.monotonic()
+    results = asyncio.run(dispatch([slow], deadline_seconds=0.3, channel_timeout=10))
+    assert results['slow']['status'] == 'timeout'
+    assert time.monotonic() - started < 1.0
+
+
+def test_retry_after_past_deadline_gives_up(http_server):
+    url = http_server.script('/busy', Reply(429, headers={'Retry-After': '30'}))
+    results = asyncio.run(dispatch([http_channel('busy', url)], deadline_seconds=2, channel_timeout=2))
+    assert results['busy']['status'] == 'failed'
+    assert len(http_server.requests_to('/busy')) == 1
+
+
+def test_503_is_retried_over_the_kept_alive_connection(http_server):
+    url = http_server.script('/flaky', Reply(503, b'try later'), Reply(503), Reply())
+    results = asyncio.run(dispatch([http_channel('flaky', url)], deadline_seconds=5, retries=3))
+    assert results['flaky']['status'] == 'sent' and results['flaky']['attempts'] == 3
+    requests = http_server.requests_to('/flaky')
+    assert len(requests) == 3
+    assert len({request['client'] for request in requests}) == 1
+    assert requests[0]['json'] == {'text': 'flaky'}
+
+
+def test_400_is_not_retried(http_server):
+    url = http_server.script('/bad', Reply(400, b'invalid_payload'))
+    results = asyncio.run(dispatch([http_channel('bad', url)], deadline_seconds=5, retries=3))
+    assert results['bad']['status'] == 'failed'
+    assert results['bad']['error'] == 'HTTP 400: invalid_payload'
+    assert len(http_server.requests_to('/bad')) == 1
+
+
+def test_chunked_responses_are_read_and_the_connection_reused(http_server):
+    url = http_server.script('/chunked', Reply(502, b'upstream gateway error', chunked=True),
+                             Reply(200, b'{"ok": true}', chunked=True))
+
+    async def send_twice():
+        pool = notify_dispatcher.HTTPPool()
+        try:
+            first = await pool.post_json(url, {'n': 1})
+            second = await pool.post_json(url, {'n': 2})
+        finally:
+            await pool.close()
+        return first, second
+
+    (status1, _, body1), (status2, _, body2) = asyncio.run(send_twice())
+    assert (status1, body1) == (502, b'upstream gateway error')
+    assert (status2, body2) == (200, b'{"ok": true}')
+    requests = http_server.requests_to('/chunked')
+    assert requests[0]['client'] == requests[1]['client']
+
+
+def test_chunked_error_body_in_failure_message(http_server):
+    url = http_server.script('/chunked-error', Reply(404, b'no such hook', chunked=True))
+    results = asyncio.run(dispatch([http_channel('hook', url)], deadline_seconds=5))
+    assert results['hook']['error'] == 'HTTP 404: no such hook'
+
+
+@pytest.mark.parametrize('raw, error', [
+    (b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\n', 'malformed chunk size'),
+    (b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n-5\r\n', 'malformed chunk size'),
+    (b'HTTP/1.1 200 OK\r\nContent-Length: many\r\n\r\n', 'malformed Content-Length'),
+])
+def test_malformed_response_fails_only_its_channel(http_server, raw, error):
+    broken = http_channel('broken', http_server.script('/broken', Reply(raw=raw)))
+    healthy = http_channel('healthy', http_server.script('/healthy', Reply(delay=0.2)))
+    results = asyncio.run(dispatch([broken, healthy], deadline_seconds=5))
+    assert results['broken']['status'] == 'failed' and results['broken']['error'].startswith(error)
+    assert results['healthy']['status'] == 'sent'
+
+
+def test_failing_callback_does_not_cancel_other_channels(http_server):
+    def unwritable_state():
+        raise PermissionError('read-only state directory')
+
+    ticket = http_channel('jira', http_server.script('/jira'))._replace(on_success=unwritable_state)
+    crashing = http_channel('crashing', http_server.script('/crashing'))._replace(payload={'bad': object()})
+    healthy = http_channel('healthy', http_server.script('/healthy', Reply(delay=0.2)))
+    results = asyncio.run(dispatch([ticket, crashing, healthy], deadline_seconds=5))
+    assert results['jira']['status'] == 'sent'
+    assert results['crashing'] == dict(results['crashing'], status='failed')
+    assert results['crashing']['error'].startswith('TypeError')
+    assert results['healthy']['status'] == 'sent'
+
+
+def test_email_goes_out_in_one_session(smtp_server):
+    config = {'notifications': {'email': {
+        'enabled': True, 'smtp_server': '127.0.0.1', 'smtp_port': smtp_server.server_address[1],
+        'sender_email': 'sast@example.com', 'recipients': ['a@example.com', 'b@example.com'],
+        'require_tls': False, 'subject_prefix': '[SAST]'}}}
+    channels = build_channels(config, [event('acme/web')], CONTEXT, only=['email'])
+    results = asyncio.run(dispatch(channels, deadline_seconds=5))
+
+    assert results['email']['status'] == 'sent'
+    assert len(smtp_server.sessions) == 1
+    session = smtp_server.sessions[0]
+    assert session['rcpt_to'] == ['a@example.com', 'b@example.com']
+    assert b'Subject: [SAST] [SAST Scan] FAILURE - acme/web' in session['data']
+
+
+def test_email_without_starttls_is_refused_when_tls_required(smtp_server):
+    config = {'notifications': {'email': {
+        'enabled': True, 'smtp_server': '127.0.0.1', 'smtp_port': smtp_server.server_address[1],
+        'sender_email': 'sast@example.com', 'recipients': ['a@example.com']}}}
+    channels = build_channels(config, [event('acme/web')], CONTEXT, only=['email'])
+    results = asyncio.run(dispatch(channels, deadline_seconds=5))
+    assert results['email'] == dict(results['email'], status='failed')
+    assert 'STARTTLS' in results['email']['error']
+    assert not smtp_server.sessions[0]['rcpt_to']
+
+
+def jira_config(http_server, path='/jira'):
+    http_server.script(path + '/rest/api/2/issue', Reply(201, b'{"key": "SEC-1"}'))
+    return {
+        'integrations': {
+            'jira': {'enabled': True, 'server_url': http_server.url + path, 'project_key': 'SEC'},
+            'slack': {'enabled': True, 'webhook_url': http_server.url + '/slack'},
+        },
+    }
+
+
+def test_many_failures_are_coalesced(http_server, tmp_path, monkeypatch):
+    monkeypatch.setenv('JIRA_API_TOKEN', 'token')
+    config = jira_config(http_server)
+    events = [event(f'acme/repo{i:02d}') for i in range(30)] + [event('acme/ok', 'success', 0, 0)]
+    channels = build_channels(config, events, CONTEXT, str(tmp_path / 'state.json'))
+    assert sorted(channel.name for channel in channels) == ['jira', 'slack']
+    results = asyncio.run(dispatch(channels, deadline_seconds=5))
+    assert {result['status'] for result in results.values()} == {'sent'}
+
+    tickets = http_server.requests_to('/jira/rest/api/2/issue')
+    assert len(tickets) == 1
+    fields = tickets[0]['json']['fields']
+    assert fields['summary'] == 'SAST Scan FAILURE - 30 repositories'
+    assert fields['project'] == {'key': 'SEC'}
+    assert 'acme/repo00@main' in fields['description'] and '... and 10 more' in fields['description']
+    assert tickets[0]['headers']['Authorization'].startswith('Basic ')
+
+    slack = http_server.requests_to('/slack')
+    assert len(slack) == 1
+    assert slack[0]['json']['text'] == '❌ SAST Scan: 30 of 31 repositories failed'
+
+
+def test_recently_ticketed_repositories_are_not_ticketed_again(http_server, tmp_path, monkeypatch):
+    monkeypatch.setenv('JIRA_API_TOKEN', 'token')
+    state_file = str(tmp_path / 'state.json')
+    config = jira_config(http_server)
+    first = build_channels(config, [event('acme/a'), event('acme/b')], CONTEXT, state_file, only=['jira'])
+    asyncio.run(dispatch(first, deadline_seconds=5))
+    assert sorted(json.loads((tmp_path / 'state.json').read_text())['ticketed']) == [
+        'acme/a|main|failure', 'acme/b|main|failure']
+
+    assert build_channels(config, [event('acme/a'), event('acme/b')], CONTEXT, state_file, only=['jira']) == []
+    again = build_channels(config, [event('acme/a'), event('acme/c')], CONTEXT, state_file, only=['jira'])
+    assert len(again) == 1
+    assert again[0].payload['fields']['summary'] == 'SAST Scan FAILURE - acme/c'
+
+
+def test_failed_ticket_is_not_remembered(http_server, tmp_path, monkeypatch):
+    monkeypatch.setenv('JIRA_API_TOKEN', 'token')
+    state_file = tmp_path / 'state.json'
+    config = jira_config(http_server, '/down')
+    http_server.scripts['/down/rest/api/2/issue'] = [Reply(403, b'forbidden')]
+    channels = build_channels(config, [event('acme/a')], CONTEXT, str(state_file), only=['jira'])
+    results = asyncio.run(dispatch(channels, deadline_seconds=5))
+    assert results['jira']['status'] == 'failed'
+    assert not state_file.exists()
+    assert len(build_channels(config, [event('acme/a')], CONTEXT, str(state_file), only=['jira'])) == 1
+
+
+def post_through(pool_options, url, times=1):
+    async def send():
+        pool = notify_dispatcher.HTTPPool(**pool_options)
+        try:
+            return [await pool.post_json(url, {'n': n}) for n in range(times)]
+        finally:
+            await pool.close()
+    return asyncio.run(send())
+
+
+def test_https_is_tunnelled_through_the_proxy(tls_server, proxy_server):
+    server, client_context = tls_server
+    url = server.script('/hook', Reply(200, b'tunnelled'), Reply(200, b'again'))
+    proxy_url = proxy_server.url.replace('http://', 'http://bot:p%40ss@')
+    responses = post_through({'proxies': {'https': proxy_url}, 'ssl_context': client_context}, url, times=2)
+
+    assert [body for _, _, body in responses] == [b'tunnelled', b'again']
+    assert len(proxy_server.requests) == 1  # one tunnel, kept alive for both requests
+    connect = proxy_server.requests[0]
+    assert connect['line'] == f'CONNECT localhost:{server.server_address[1]} HTTP/1.1'
+    assert connect['headers']['Proxy-Authorization'] == 'Basic ' + base64.b64encode(b'bot:p@ss').decode()
+    assert 'Proxy-Authorization' not in server.requests_to('/hook')[0]['headers']
+
+
+def test_http_is_forwarded_in_absolute_form_from_the_environment(http_server, proxy_server, monkeypatch):
+    monkeypatch.setenv('HTTP_PROXY', proxy_server.url)
+    url = http_server.script('/hook', Reply())
+    results = asyncio.run(dispatch([http_channel('hook', url)], deadline_seconds=5))
+
+    assert results['hook']['status'] == 'sent'
+    assert proxy_server.requests[0]['line'] == f'POST {url} HTTP/1.1'
+    assert http_server.requests_to('/hook')[0]['target'] == url
+
+
+def test_no_proxy_connects_directly(http_server, proxy_server, monkeypatch):
+    monkeypatch.setenv('HTTP_PROXY', proxy_server.url)
+    monkeypatch.setenv('NO_PROXY', 'example.com,127.0.0.1')
+    url = http_server.script('/hook', Reply())
+    results = asyncio.run(dispatch([http_channel('hook', url)], deadline_seconds=5))
+
+    assert results['hook']['status'] == 'sent'
+    assert proxy_server.requests == []
+    assert http_server.requests_to('/hook')[0]['target'] == '/hook'
+
+
+def test_refused_connect_fails_without_retry(proxy_server, monkeypatch):
+    monkeypatch.setenv('HTTPS_PROXY', proxy_server.url)
+    proxy_server.refuse = '407 Proxy Authentication Required'
+    results = asyncio.run(dispatch([http_channel('hook', 'https://hooks.example.com/x')], deadline_seconds=5))
+
+    assert results['hook']['status'] == 'failed'
+    assert 'refused CONNECT to hooks.example.com: HTTP/1.1 407' in results['hook']['error']
+    assert len(proxy_server.requests) == 1
@@ -0,0 +1,51 @@
+"""ShardPlanner roots: subprojects are found by their manifest names as written."""
+
+import importlib
+
+import pytest
+
+language_detector = importlib.import_module('language-detector')
+
+
+@pytest.fixture
+def monorepo(tmp_path):
+    layout = {
+        'app.py': '', 'requirements.txt': '',
+        'crates/engine/Cargo.toml': '', 'crates/engine/lib.rs': '', 'crates/engine/util.rs': '',
+        'tools/deploy/Gemfile': '', 'tools/deploy/deploy.rb': '',
+        'native/Makefile': '', 'native/main.c': '',
+        'web/package.json': '', 'web/index.js': '',
+    }
+    for rel_path, content in layout.items():
+        path = tmp_path / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    return tmp_path
+
+
+def shard_roots(path, **options):
+    results = language_detector.LanguageDetector(str(path), plan_shards=True, **options).scan_directory()
+    return {shard['root']: shard for shard in results['shard_plan']}
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_capitalized_manifests_open_shards(monorepo, workers):
+    shards = shard_roots(monorepo, workers=workers)
+    assert set(shards) == {'.', 'crates/engine', 'tools/deploy', 'native', 'web'}
+    assert shards['crates/engine']['manifest_languages'] == ['rust']
+    assert shards['tools/deploy']['languages'] == ['ruby']
+    assert sorted(shards['.']['exclude']) == ['crates/engine', 'native', 'tools/deploy', 'web']
+
+
+def test_shards_survive_the_detection_cache(monorepo):
+    first = shard_roots(monorepo, use_cache=True)
+    second = shard_roots(monorepo, use_cache=True)
+    assert first == second
+    assert 'tools/deploy' in second
+
+
+def test_detector_scores_are_unchanged(monorepo):
+    plain = language_detector.LanguageDetector(str(monorepo)).scan_directory()
+    planned = language_detector.LanguageDetector(str(monorepo), plan_shards=True).scan_directory()
+    planned.pop('shard_plan')
+    assert planned == plain